@@ -0,0 +1,119 @@
+import asyncio
+import itertools
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from aiogram import Bot
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.base import BaseSession
+from aiogram.enums import ParseMode
+from aiogram.methods import (
+    EditMessageCaption,
+    EditMessageMedia,
+    EditMessageReplyMarkup,
+    EditMessageText,
+    SendDocument,
+    SendInvoice,
+    SendMediaGroup,
+    SendMessage,
+    SendPhoto,
+    TelegramMethod,
+)
+from aiogram.types import Chat, InlineKeyboardMarkup, Message, PhotoSize
+
+MESSAGE_METHODS = (
+    SendMessage,
+    SendPhoto,
+    SendInvoice,
+    SendDocument,
+    EditMessageText,
+    EditMessageCaption,
+    EditMessageMedia,
+    EditMessageReplyMarkup,
+)
+
+
+class MockedSession(BaseSession):
+    """Сессия Bot API без сети: отвечает правдоподобными объектами.
+
+    Запоминает последнюю inline-клавиатуру и последний инвойс в каждом чате,
+    чтобы сценарии могли «нажимать» реальные кнопки, которые отрисовал бот.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__()
+        self.latency = latency
+        self.calls: Counter = Counter()
+        self.last_markup: Dict[int, InlineKeyboardMarkup] = {}
+        self.last_message_id: Dict[int, int] = {}
+        self.invoices: Dict[int, List[str]] = defaultdict(list)
+        self._message_ids = itertools.count(1_000_000)
+
+    def _message(self, method: TelegramMethod, chat_id: int, media: Any = None) -> Message:
+        message_id = getattr(method, "message_id", None) or next(self._message_ids)
+        if isinstance(method, SendPhoto):
+            media = method.photo
+        elif isinstance(method, EditMessageMedia):
+            media = method.media.media
+        photo = None
+        if media is not None:
+            if not isinstance(media, str):
+                photo_id = f"uploaded-{message_id}"
+            elif media.startswith(("http://", "https://")):
+                # Как и Telegram, выдаем для скачанного по URL фото новый file_id
+                photo_id = f"url-{message_id}"
+            else:
+                photo_id = media
+            photo = [PhotoSize(file_id=photo_id, file_unique_id=photo_id, width=800, height=600)]
+        return Message(
+            message_id=message_id,
+            date=datetime.utcnow(),
+            chat=Chat(id=chat_id, type="private"),
+            text=getattr(method, "text", None),
+            caption=getattr(method, "caption", None),
+            photo=photo,
+        )
+
+    async def make_request(
+        self, bot: Bot, method: TelegramMethod[Any], timeout: Optional[int] = None
+    ) -> Any:
+        self.calls[type(method).__name__] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        chat_id = getattr(method, "chat_id", None)
+        markup = getattr(method, "reply_markup", None)
+        if chat_id is not None and isinstance(markup, InlineKeyboardMarkup):
+            self.last_markup[chat_id] = markup
+        if isinstance(method, SendInvoice):
+            self.invoices[chat_id].append(method.payload)
+
+        if isinstance(method, SendMediaGroup):
+            return [self._message(method, chat_id, item.media) for item in method.media]
+        if isinstance(method, MESSAGE_METHODS) and chat_id is not None:
+            message = self._message(method, chat_id)
+            self.last_message_id[chat_id] = message.message_id
+            return message
+        return True
+
+    async def stream_content(
+        self,
+        url: str,
+        headers: Optional[Dict[str, Any]] = None,
+        timeout: int = 30,
+        chunk_size: int = 65536,
+        raise_for_status: bool = True,
+    ) -> AsyncGenerator[bytes, None]:
+        yield b""
+
+    async def close(self) -> None:
+        pass
+
+
+def create_mocked_bot(latency: float = 0.0) -> Bot:
+    return Bot(
+        token="42:BENCHMARK",
+        session=MockedSession(latency=latency),
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML),
+    )
@@ -0,0 +1,87 @@
+"""Захват SQL, выполняемого сервисами, и анализ планов через EXPLAIN."""
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+EXPLAINABLE = ("SELECT", "UPDATE", "DELETE")
+
+
+@dataclass
+class CapturedStatement:
+    statement: str
+    parameters: Any
+
+
+@contextmanager
+def capture_statements(engine: AsyncEngine) -> Iterator[List[CapturedStatement]]:
+    """Собрать все одиночные SELECT/UPDATE/DELETE, выполненные на движке."""
+    captured: List[CapturedStatement] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(EXPLAINABLE):
+            captured.append(CapturedStatement(statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield captured
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+async def explain(engine: AsyncEngine, captured: CapturedStatement) -> Any:
+    """Вернуть план запроса: строки detail для SQLite, JSON-план для Postgres."""
+    async with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            result = await conn.exec_driver_sql(
+                "EXPLAIN (FORMAT JSON) " + captured.statement, captured.parameters
+            )
+            plan = result.scalar_one()
+            await conn.rollback()
+            return plan[0]["Plan"]
+
+        result = await conn.exec_driver_sql(
+            "EXPLAIN QUERY PLAN " + captured.statement, captured.parameters
+        )
+        return [row[3] for row in result.all()]
+
+
+def sqlite_plan_problems(plan: Iterable[str], allowed_scans: Iterable[str] = ()) -> List[str]:
+    """Найти полные сканы таблиц и сортировки всего результата во временном B-дереве.
+
+    allowed_scans может содержать имя таблицы или точный хвост строки плана,
+    например "users USING INDEX ix_users_admin" для скана частичного индекса.
+    """
+    allowed = set(allowed_scans)
+    problems = []
+    for detail in plan:
+        if detail.startswith("SCAN "):
+            target = detail[len("SCAN "):]
+            if target.split()[0] not in allowed and target not in allowed:
+                problems.append(detail)
+        elif detail.startswith("USE TEMP B-TREE"):
+            problems.append(detail)
+    return problems
+
+
+def _walk(node: dict) -> Iterator[dict]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk(child)
+
+
+def postgres_plan_problems(
+    plan: dict, allowed_scans: Iterable[str] = (), max_cost: Optional[float] = None
+) -> List[str]:
+    """Найти Seq Scan по неразрешенным таблицам и превышение бюджета стоимости."""
+    allowed = set(allowed_scans)
+    problems = [
+        f"Seq Scan on {node['Relation Name']}"
+        for node in _walk(plan)
+        if node["Node Type"] == "Seq Scan" and node.get("Relation Name") not in allowed
+    ]
+    if max_cost is not None and plan["Total Cost"] > max_cost:
+        problems.append(f"Total Cost {plan['Total Cost']} > {max_cost}")
+    return problems
@@ -0,0 +1,202 @@
+import itertools
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import CallbackQuery, Chat, InlineQuery, Message, SuccessfulPayment, Update
+from aiogram.types import User as TgUser
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from benchmarks.mock_bot import MockedSession
+
+_current_queries: ContextVar[Optional[List[int]]] = ContextVar("bench_queries", default=None)
+
+
+class BenchmarkContext:
+    """Прогоняет синтетические апдейты через feed_update и собирает замеры."""
+
+    def __init__(
+        self, dp: Dispatcher, bot: Bot, engine: AsyncEngine, read_engines: Sequence[AsyncEngine] = ()
+    ):
+        self.dp = dp
+        self.bot = bot
+        self.session: MockedSession = bot.session  # type: ignore[assignment]
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.queries: Dict[str, List[int]] = defaultdict(list)
+        self.errors: Counter = Counter()
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        for item in (engine, *read_engines):
+            event.listen(item.sync_engine, "before_cursor_execute", self._on_query)
+
+    @staticmethod
+    def _on_query(conn, cursor, statement, parameters, context, executemany) -> None:
+        counter = _current_queries.get()
+        if counter is not None:
+            counter[0] += 1
+
+    @staticmethod
+    def _tg_user(user_id: int) -> TgUser:
+        return TgUser(id=user_id, is_bot=False, first_name=f"User{user_id}", username=f"user{user_id}")
+
+    def _message(self, user_id: int, **fields) -> Message:
+        return Message(
+            message_id=next(self._message_ids),
+            date=datetime.utcnow(),
+            chat=Chat(id=user_id, type="private"),
+            from_user=self._tg_user(user_id),
+            **fields,
+        )
+
+    async def feed(self, label: str, update: Update) -> None:
+        # Как и при polling, апдейт десериализуется уже привязанным к боту
+        update = Update.model_validate(
+            update.model_dump(exclude_none=True), context={"bot": self.bot}
+        )
+        counter = [0]
+        token = _current_queries.set(counter)
+        started = time.perf_counter()
+        try:
+            await self.dp.feed_update(self.bot, update)
+        except Exception:  # noqa: BLE001
+            self.errors[label] += 1
+        finally:
+            self.latencies[label].append((time.perf_counter() - started) * 1000)
+            self.queries[label].append(counter[0])
+            _current_queries.reset(token)
+
+    async def send_text(self, label: str, user_id: int, text: str) -> None:
+        update = Update(update_id=next(self._update_ids), message=self._message(user_id, text=text))
+        await self.feed(label, update)
+
+    async def click(self, label: str, user_id: int, data: str) -> None:
+        message_id = self.session.last_message_id.get(user_id, 1)
+        message = Message(
+            message_id=message_id,
+            date=datetime.utcnow(),
+            chat=Chat(id=user_id, type="private"),
+            text="-",
+        )
+        query = CallbackQuery(
+            id=str(next(self._update_ids)),
+            from_user=self._tg_user(user_id),
+            chat_instance=str(user_id),
+            message=message,
+            data=data,
+        )
+        await self.feed(label, Update(update_id=next(self._update_ids), callback_query=query))
+
+    async def pay(self, label: str, user_id: int, payload: str) -> None:
+        payment = SuccessfulPayment(
+            currency="RUB",
+            total_amount=100,
+            invoice_payload=payload,
+            telegram_payment_charge_id=f"tg-{payload}",
+            provider_payment_charge_id=f"pr-{payload}",
+        )
+        update = Update(
+            update_id=next(self._update_ids),
+            message=self._message(user_id, successful_payment=payment),
+        )
+        await self.feed(label, update)
+
+    async def inline(self, label: str, user_id: int, query: str, offset: str = "") -> None:
+        inline_query = InlineQuery(
+            id=str(next(self._update_ids)),
+            from_user=self._tg_user(user_id),
+            query=query,
+            offset=offset,
+        )
+        await self.feed(label, Update(update_id=next(self._update_ids), inline_query=inline_query))
+
+    def find_callback(self, user_id: int, prefix: str, text: Optional[str] = None) -> Optional[str]:
+        """Найти callback_data кнопки из последней клавиатуры, показанной пользователю.
+
+        text - точный текст кнопки, если префикс у нескольких кнопок общий.
+        """
+        markup = self.session.last_markup.get(user_id)
+        if markup is None:
+            return None
+        for row in markup.inline_keyboard:
+            for button in row:
+                if button.callback_data and button.callback_data.startswith(prefix):
+                    if text is None or button.text == text:
+                        return button.callback_data
+        return None
+
+
+async def browse(ctx: BenchmarkContext, user_id: int, steps: int = 5) -> None:
+    """Пользователь листает каталог кнопкой «Вперед» и открывает похожие."""
+    await ctx.send_text("show_cards", user_id, "👀 Посмотреть карточки")
+    for _ in range(steps):
+        data = ctx.find_callback(user_id, "cn:", "Вперед »")
+        if data is None:
+            break
+        await ctx.click("handle_card_navigation", user_id, data)
+    data = ctx.find_callback(user_id, "sim:")
+    if data is not None:
+        await ctx.click("show_similar", user_id, data)
+
+
+async def album(ctx: BenchmarkContext, user_id: int, pages: int = 3) -> None:
+    """Пользователь переключает каталог в альбом и листает страницы по 10 карточек."""
+    await ctx.send_text("show_cards", user_id, "👀 Посмотреть карточки")
+    for _ in range(pages):
+        data = ctx.find_callback(user_id, "alb:")
+        if data is None:
+            break
+        await ctx.click("show_album", user_id, data)
+
+
+async def buy(ctx: BenchmarkContext, user_id: int) -> None:
+    """Пользователь открывает каталог, выставляет счет и оплачивает его."""
+    await ctx.send_text("show_cards", user_id, "👀 Посмотреть карточки")
+    data = ctx.find_callback(user_id, "buy_")
+    if data is None:
+        return
+    await ctx.click("handle_buy", user_id, data)
+    invoices = ctx.session.invoices.get(user_id)
+    if invoices:
+        await ctx.pay("successful_payment", user_id, invoices.pop())
+
+
+async def create_card(ctx: BenchmarkContext, user_id: int) -> None:
+    """Пользователь проходит диалог создания карточки без фото."""
+    await ctx.send_text("start_card_creation", user_id, "📦 Добавить карточку")
+    await ctx.send_text("process_title", user_id, f"Товар от {user_id}")
+    await ctx.send_text("process_description", user_id, "Описание товара для бенчмарка")
+    await ctx.send_text("process_price", user_id, "199.99")
+    data = ctx.find_callback(user_id, "newcat_")
+    if data is not None:
+        await ctx.click("process_category", user_id, data)
+    await ctx.send_text("skip_photo_during_creation", user_id, "/skip")
+
+
+async def moderate(ctx: BenchmarkContext, admin_id: int) -> None:
+    """Администратор открывает модерацию и одобряет первую карточку."""
+    await ctx.send_text("show_moderation", admin_id, "Модерация")
+    data = ctx.find_callback(admin_id, "mod:", "✅ Одобрить")
+    if data is not None:
+        await ctx.click("handle_moderation", admin_id, data)
+
+
+async def inline_search(ctx: BenchmarkContext, user_id: int) -> None:
+    """Пользователь набирает инлайн-запрос по буквам и листает результаты."""
+    query = "товар 1"
+    for end in range(1, len(query) + 1):
+        await ctx.inline("inline_catalog", user_id, query[:end])
+    await ctx.inline("inline_catalog", user_id, query, offset="20")
+
+
+SCENARIOS = {
+    "browse": (browse, 0.4),
+    "album": (album, 0.1),
+    "inline_search": (inline_search, 0.1),
+    "buy": (buy, 0.1),
+    "create_card": (create_card, 0.2),
+    "moderate": (moderate, 0.1),
+}
@@ -0,0 +1,133 @@
+"""Микробенчмарк накладных расходов на построение запросов.
+
+Сравнивает для горячих запросов из src.database.queries три варианта:
+построение select() на каждый вызов (как было в хендлерах), заранее
+построенный запрос с bindparam и lambda_stmt. Запросы выполняются на
+синхронной сессии с SQLite в памяти, чтобы в замер попадала в основном
+работа Python, а не базы.
+
+Пример:
+    python -m benchmarks.statement_bench --iterations 5000
+"""
+import argparse
+import json
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import create_engine, lambda_stmt, select
+from sqlalchemy.orm import Session, selectinload
+
+from src.database import queries
+from src.database.models import Base, Card, User
+
+TELEGRAM_ID = 100_500
+
+
+def _prepare_session() -> Session:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = Session(engine)
+    user = User(telegram_id=TELEGRAM_ID, username="bench", is_admin=True)
+    session.add(user)
+    session.flush()
+    session.add(Card(user_id=user.id, title="bench", description="bench", price=1.0, is_approved=True))
+    session.commit()
+    return session
+
+
+def _cases(card_id: int) -> Dict[str, Dict[str, Callable[[Session], Any]]]:
+    user_params = {"telegram_id": TELEGRAM_ID}
+    card_params = {"card_id": card_id}
+    return {
+        "user_by_telegram_id": {
+            "rebuilt": lambda s: s.execute(
+                select(User).where(User.telegram_id == TELEGRAM_ID)
+            ).scalar_one_or_none(),
+            "precompiled": lambda s: s.execute(
+                queries.USER_BY_TELEGRAM_ID, user_params
+            ).scalar_one_or_none(),
+            "lambda_stmt": lambda s: s.execute(
+                lambda_stmt(lambda: select(User).where(User.telegram_id == TELEGRAM_ID))
+            ).scalar_one_or_none(),
+        },
+        "admin_by_telegram_id": {
+            "rebuilt": lambda s: s.execute(
+                select(User).where(User.telegram_id == TELEGRAM_ID, User.is_admin.is_(True))
+            ).scalar_one_or_none(),
+            "precompiled": lambda s: s.execute(
+                queries.ADMIN_ID_BY_TELEGRAM_ID, user_params
+            ).scalar_one_or_none(),
+            "lambda_stmt": lambda s: s.execute(
+                lambda_stmt(
+                    lambda: select(User).where(
+                        User.telegram_id == TELEGRAM_ID, User.is_admin.is_(True)
+                    )
+                )
+            ).scalar_one_or_none(),
+        },
+        "card_by_id": {
+            "rebuilt": lambda s: s.execute(
+                select(Card).options(selectinload(Card.user)).where(Card.id == card_id)
+            ).scalar_one_or_none(),
+            "precompiled": lambda s: s.execute(
+                queries.CARD_BY_ID, card_params
+            ).scalar_one_or_none(),
+            "lambda_stmt": lambda s: s.execute(
+                lambda_stmt(
+                    lambda: select(Card).options(selectinload(Card.user)).where(Card.id == card_id)
+                )
+            ).scalar_one_or_none(),
+        },
+    }
+
+
+def run(iterations: int) -> Dict[str, Dict[str, float]]:
+    """Среднее время одного вызова в микросекундах по запросам и вариантам."""
+    session = _prepare_session()
+    card_id = session.execute(select(Card.id)).scalar_one()
+    results: Dict[str, Dict[str, float]] = {}
+    try:
+        for query_name, variants in _cases(card_id).items():
+            results[query_name] = {}
+            for variant, call in variants.items():
+                # Прогрев: заполнить кэш компиляции и lambda-кэш
+                for _ in range(50):
+                    call(session)
+                    session.expunge_all()
+                started = time.perf_counter()
+                for _ in range(iterations):
+                    call(session)
+                    session.expunge_all()
+                elapsed = time.perf_counter() - started
+                results[query_name][variant] = elapsed / iterations * 1e6
+    finally:
+        session.close()
+    return results
+
+
+def format_results(results: Dict[str, Dict[str, float]]) -> str:
+    variants: List[str] = list(next(iter(results.values())))
+    header = f"{'query':<24}" + "".join(f"{name + ' us':>16}" for name in variants)
+    lines = [header]
+    for query_name, timings in results.items():
+        lines.append(f"{query_name:<24}" + "".join(f"{timings[name]:>16.1f}" for name in variants))
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Накладные расходы на построение запросов")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--output", help="куда сохранить результаты в JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.iterations)
+    print(format_results(results))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
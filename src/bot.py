@@ -1,69 +1,290 @@
 import asyncio
 import logging
+from typing import Any, Optional
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 from aiogram.fsm.storage.memory import MemoryStorage
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
 from src.config import Config
-from src.database.models import Base
+from src.database.session import (
+    SessionRouter,
+    get_engine,
+    get_replica_engines,
+    get_session_maker,
+    init_models,
+    instrument_pool,
+)
 from src.middlewares.config_middleware import ConfigMiddleware
-from src.middlewares.db_middleware import DatabaseMiddleware
+from src.middlewares.db_middleware import DatabaseMiddleware, ReadSessionReleaseMiddleware
+from src.middlewares.log_context_middleware import LogContextMiddleware
+from src.middlewares.metrics_middleware import (
+    BotApiMetricsMiddleware,
+    MetricsMiddleware,
+    instrument_engine,
+)
+from src.middlewares.photo_capture_middleware import PhotoCaptureMiddleware
+from src.middlewares.profiler_middleware import ProfilerMiddleware
+from src.middlewares.query_budget_middleware import QueryBudgetMiddleware
+from src.middlewares.throttling_middleware import BotApiThrottlingMiddleware
 from src.middlewares.user_middleware import UserMiddleware
+from src.services.card_service import CardService
+from src.services.category_service import CategoryService
+from src.services.draft_store import DraftStore
+from src.services.outbox_dispatcher import OutboxDispatcher
+from src.services.photo_warmer import PhotoWarmer
+from src.services.recommender import Recommender
 from src.services.user_service import UserService
-from src.utils.logger import setup_logger
+from src.services.view_counter import ViewCounter
+from src.utils.health import HealthState
+from src.utils.logger import parse_sampling, setup_logger
+from src.utils.loop_monitor import LoopLagMonitor
+from src.utils.inline_cache import inline_cache
+from src.utils.metrics import labels, metrics
+from src.utils.query_counter import install_query_counter
+from src.utils.render_cache import render_cache
+from src.web_app.server import create_web_app, start_web_server
 
 # Импортируем все handlers
 from src.handlers.common_handlers import router as common_router
 from src.handlers.card_handlers import router as card_router
+from src.handlers.import_handlers import router as import_router
 from src.handlers.payment_handlers import router as payment_router
 from src.handlers.balance_handlers import router as balance_router
 from src.handlers.admin_handlers import router as admin_router
 
 
-async def main():
-    """Основная функция запуска бота."""
-    setup_logger()
-    logger = logging.getLogger(__name__)
+logger = logging.getLogger(__name__)
 
-    config = Config()
-    logger.info("Конфигурация загружена")
 
-    engine = create_async_engine(config.database_url, echo=False)
-    async_session = async_sessionmaker(engine, expire_on_commit=False)
+def create_dispatcher(
+    config: Config,
+    session_pool: async_sessionmaker,
+    health: Optional[HealthState] = None,
+    session_router: Optional[SessionRouter] = None,
+    **workflow_data: Any,
+) -> Dispatcher:
+    """Собрать диспетчер со всеми middleware и роутерами.
 
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    logger.info("База данных инициализирована")
+    Используется как при запуске бота, так и в бенчмарках. Роутеры -
+    синглтоны модулей, поэтому диспетчер можно собрать один раз на процесс.
+    """
+    dp = Dispatcher(storage=MemoryStorage(), **workflow_data)
 
-    # Синхронизируем флаги админов с конфигом
-    async with async_session() as session:
-        await UserService.sync_admin_flags(session, config.admin_ids_list)
-    logger.info("Админы синхронизированы: %s", config.admin_ids_list)
-
-    bot = Bot(token=config.bot_token, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
-    storage = MemoryStorage()
-    dp = Dispatcher(storage=storage)
+    dp.update.outer_middleware(LogContextMiddleware())
+    # Метрики - внешний middleware, чтобы учитывать время всех остальных
+    MetricsMiddleware(metrics, sample_rate=config.metrics_sample_rate, health=health).setup(dp)
+    dp.update.outer_middleware(ProfilerMiddleware())
 
     # Middleware порядок важен: конфиг -> БД -> пользователь
     dp.update.middleware(ConfigMiddleware(config))
-    dp.update.middleware(DatabaseMiddleware(async_session))
+    dp.update.middleware(DatabaseMiddleware(session_pool, session_router))
     dp.update.middleware(UserMiddleware(config.admin_ids_list))
+    if config.debug_queries:
+        QueryBudgetMiddleware(
+            max_queries=config.debug_max_queries, strict=config.debug_queries_strict
+        ).setup(dp)
     logger.info("Middleware зарегистрированы")
 
     dp.include_router(common_router)
     dp.include_router(card_router)
+    dp.include_router(import_router)
     dp.include_router(payment_router)
     dp.include_router(balance_router)
     dp.include_router(admin_router)
-
     logger.info("Все роутеры зарегистрированы")
+
+    return dp
+
+
+def register_runtime_metrics(throttling: BotApiThrottlingMiddleware) -> None:
+    """Вывести в /metrics счетчики кэшей рендера и инлайн-режима и лимитера Bot API."""
+    metrics.register_callback(
+        "bot_render_cache_saved_calls_total",
+        lambda: render_cache.saved_calls,
+        "Правки сообщений, пропущенные кэшем рендера",
+        kind="counter",
+    )
+    metrics.register_callback(
+        "bot_api_coalesced_edits_total",
+        lambda: throttling.coalesced_edits,
+        "Правки, замененные более свежими",
+        kind="counter",
+    )
+    metrics.register_callback(
+        "bot_api_retries_total",
+        lambda: throttling.retries,
+        "Повторы запросов после flood control",
+        kind="counter",
+    )
+    metrics.register_callback(
+        "bot_inline_cache_requests_total",
+        lambda: {
+            labels(result="hit"): inline_cache.hits,
+            labels(result="prefix_hit"): inline_cache.prefix_hits,
+            labels(result="miss"): inline_cache.misses,
+        },
+        "Инлайн-запросы по результату поиска в кэше",
+        kind="counter",
+    )
+
+
+async def main():
+    """Основная функция запуска бота."""
+    config = Config()
+    log_listener = setup_logger(
+        level=config.log_level,
+        json_format=config.log_json,
+        queue_size=config.log_queue_size,
+        sampling=parse_sampling(config.log_sampling),
+    )
+    logger.info("Конфигурация загружена")
+    metrics.register_callback(
+        "bot_log_dropped_total",
+        lambda: log_listener.queue.dropped,
+        "Записи лога, выброшенные из переполненной очереди",
+        kind="counter",
+    )
+    try:
+        await run_bot(config)
+    finally:
+        # Дописываем оставшиеся в очереди записи
+        log_listener.stop()
+
+
+async def run_bot(config: Config) -> None:
+    """Инициализация БД, бота и фоновых задач, затем polling."""
+    engine = get_engine(config)
+    instrument_pool(engine)
+    instrument_engine(engine)
+    if config.debug_queries:
+        install_query_counter(engine)
+    async_session = get_session_maker(engine)
+
+    replica_engines = get_replica_engines(config)
+    for replica in replica_engines:
+        instrument_engine(replica)
+    session_router = SessionRouter(
+        async_session,
+        [get_session_maker(replica) for replica in replica_engines],
+        # В SQLite читатели видят закоммиченное сразу, задержки реплики нет
+        sticky_seconds=0 if config.is_sqlite else config.db_replica_sticky_seconds,
+    )
+    if replica_engines:
+        logger.info("Подключено реплик для чтения: %s", len(replica_engines))
+
+    await init_models(engine)
+    logger.info("База данных инициализирована")
+
+    # Синхронизируем флаги админов с конфигом
+    async with async_session() as session:
+        await UserService.sync_admin_flags(session, config.admin_ids_list)
+        await CategoryService.ensure_defaults(session)
+    logger.info("Админы синхронизированы: %s", config.admin_ids_list)
+
+    recommender = None
+    if config.recommender_enabled:
+        recommender = Recommender(top_k=config.recommender_top_k)
+        async with async_session() as session:
+            await recommender.load(session)
+            popular = await CardService.get_approved_card_views(
+                session, limit=config.recommender_warm_cards, sort="top"
+            )
+        await asyncio.to_thread(recommender.precompute, [card.id for card in popular])
+
+    bot = Bot(token=config.bot_token, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+    throttling = BotApiThrottlingMiddleware(
+        global_rate=config.bot_api_global_rate,
+        chat_rate=config.bot_api_chat_rate,
+        chat_burst=config.bot_api_chat_burst,
+        max_retries=config.bot_api_max_retries,
+    )
+    bot.session.middleware(ReadSessionReleaseMiddleware())
+    bot.session.middleware(throttling)
+    bot.session.middleware(BotApiMetricsMiddleware(metrics, sample_rate=config.metrics_sample_rate))
+    bot.session.middleware(PhotoCaptureMiddleware())
+    register_runtime_metrics(throttling)
+    outbox = OutboxDispatcher(
+        bot,
+        async_session,
+        batch_size=config.outbox_batch_size,
+        poll_interval=config.outbox_poll_interval,
+        max_attempts=config.outbox_max_attempts,
+        lease=config.outbox_lease,
+    )
+    view_counter = ViewCounter(
+        async_session,
+        flush_interval=config.views_flush_interval,
+        popularity_interval=config.popularity_interval,
+        half_life=config.popularity_half_life,
+    )
+    photo_warmer = PhotoWarmer(
+        bot,
+        async_session,
+        chat_id=config.photo_warm_chat_id,
+        interval=config.photo_warm_interval,
+        batch_size=config.photo_warm_batch_size,
+    )
+    draft_store = DraftStore(
+        async_session,
+        flush_interval=config.draft_flush_interval,
+        ttl=config.draft_ttl,
+        purge_interval=config.draft_purge_interval,
+        purge_batch_size=config.draft_purge_batch_size,
+    )
+    loop_monitor = LoopLagMonitor(
+        interval=config.loop_lag_interval, threshold=config.loop_lag_threshold
+    )
+    health = HealthState(
+        loop_monitor,
+        engine,
+        max_loop_lag=config.ready_max_loop_lag,
+        max_update_age=config.ready_max_update_age,
+    )
+    dp = create_dispatcher(
+        config,
+        async_session,
+        health=health,
+        session_router=session_router,
+        outbox=outbox,
+        view_counter=view_counter,
+        recommender=recommender,
+        draft_store=draft_store,
+    )
+
     logger.info("Бот запускается...")
 
-    await bot.delete_webhook(drop_pending_updates=True)
-    await dp.start_polling(bot)
+    web_runner = None
+    if config.web_server_enabled:
+        web_runner = await start_web_server(
+            create_web_app(metrics, health), config.web_server_host, config.web_server_port
+        )
+
+    outbox_task = asyncio.create_task(outbox.run(), name="outbox-dispatcher")
+    monitor_task = asyncio.create_task(loop_monitor.run(), name="loop-lag-monitor")
+    views_task = asyncio.create_task(view_counter.run(), name="view-counter")
+    photos_task = asyncio.create_task(photo_warmer.run(), name="photo-warmer")
+    drafts_task = asyncio.create_task(draft_store.run(), name="draft-store")
+    try:
+        await bot.delete_webhook(drop_pending_updates=True)
+        await dp.start_polling(bot)
+    finally:
+        outbox_task.cancel()
+        monitor_task.cancel()
+        views_task.cancel()
+        photos_task.cancel()
+        drafts_task.cancel()
+        # Дописываем накопленные просмотры, file_id и черновики
+        try:
+            await view_counter.flush()
+            await photo_warmer.flush()
+            await draft_store.flush()
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Не удалось записать буферы при остановке: %s", exc)
+        if web_runner is not None:
+            await web_runner.cleanup()
 
 
 if __name__ == "__main__":
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 from pydantic_settings import BaseSettings
 
@@ -7,19 +7,98 @@ class Config(BaseSettings):
     bot_token: str
     admin_ids: str = ""
     payment_provider_token: str = ""
+    # postgresql или sqlite (однонодовый режим: WAL, один писатель + пул читателей)
+    db_backend: str = "postgresql"
     db_host: str = "localhost"
     db_port: int = 5432
     db_name: str = "product_bot"
     db_user: str = "postgres"
     db_password: str = "postgres"
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_cache_size: int = 100
+    # PgBouncer в режиме transaction: без кэша prepared statements
+    db_pgbouncer: bool = False
+    db_null_pool: bool = False
+    # Реплики для чтения через запятую; пусто - все читается с основной БД
+    db_replica_urls: str = ""
+    db_replica_sticky_seconds: float = 5.0
+    sqlite_path: str = "data/bot.db"
+    sqlite_busy_timeout: int = 5000  # мс
+    sqlite_mmap_size: int = 268435456
+    sqlite_writer_pool_size: int = 1
+    sqlite_reader_pool_size: int = 4
     log_level: str = "INFO"
+    log_json: bool = False
+    log_queue_size: int = 10000
+    # Доля INFO-записей по префиксам логгеров: "aiogram.event=0.1,src.services=0.5"
+    log_sampling: str = "aiogram.event=0.1"
     withdrawal_min_amount: float = 100.0
     withdrawal_fee_percent: float = 5.0
+    outbox_batch_size: int = 50
+    outbox_poll_interval: float = 1.0
+    outbox_max_attempts: int = 10
+    # Сколько секунд забранное сообщение не выдается другим разборщикам
+    outbox_lease: float = 60.0
+    bot_api_global_rate: float = 30.0
+    bot_api_chat_rate: float = 1.0
+    bot_api_chat_burst: int = 3
+    bot_api_max_retries: int = 3
+    metrics_sample_rate: float = 0.1
+    web_server_enabled: bool = True
+    web_server_host: str = "0.0.0.0"
+    web_server_port: int = 8081
+    loop_lag_interval: float = 0.1
+    loop_lag_threshold: float = 0.5
+    ready_max_loop_lag: float = 1.0
+    ready_max_update_age: float = 0.0
+    views_flush_interval: float = 10.0
+    popularity_interval: float = 600.0
+    popularity_half_life: float = 86400.0  # с, за это время вес старых просмотров падает вдвое
+    recommender_enabled: bool = True
+    recommender_top_k: int = 5
+    # Для стольких самых популярных карточек похожие считаются при запуске
+    recommender_warm_cards: int = 500
+    # Чат для заблаговременной загрузки фото, заданных URL (бот должен иметь право писать);
+    # без него file_id запоминаются только при показе карточек
+    photo_warm_chat_id: Optional[int] = None
+    photo_warm_interval: float = 60.0
+    photo_warm_batch_size: int = 20
+    # Черновики создания карточек: задержка записи в БД и очистка заброшенных
+    draft_flush_interval: float = 5.0
+    draft_ttl: float = 604800.0  # с, черновик без изменений дольше удаляется
+    draft_purge_interval: float = 3600.0
+    draft_purge_batch_size: int = 500
+    # Импорт карточек из CSV/JSON: лимиты файла и размер пачки INSERT
+    import_max_file_size: int = 5 * 1024 * 1024
+    import_max_rows: int = 5000
+    import_batch_size: int = 200
+    # Инлайн-режим: cache_time ответа на стороне Telegram и TTL кэша в боте, с
+    inline_cache_time: int = 300
+    inline_results_ttl: float = 60.0
+    inline_page_size: int = 20
+    inline_result_limit: int = 100
+    debug_queries: bool = False
+    debug_max_queries: int = 10
+    debug_queries_strict: bool = False
 
     @property
     def database_url(self) -> str:
+        if self.is_sqlite:
+            return f"sqlite+aiosqlite:///{self.sqlite_path}"
         return f"postgresql+asyncpg://{self.db_user}:{self.db_password}@{self.db_host}:{self.db_port}/{self.db_name}"
 
+    @property
+    def is_sqlite(self) -> bool:
+        return self.db_backend == "sqlite"
+
+    @property
+    def replica_urls(self) -> List[str]:
+        return [url.strip() for url in self.db_replica_urls.split(",") if url.strip()]
+
     @property
     def admin_ids_list(self) -> List[int]:
         if not self.admin_ids:
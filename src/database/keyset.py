@@ -0,0 +1,64 @@
+"""Переход к соседней записи по ключу вместо индекса в списке.
+
+Кнопки «вперед/назад» несут курсор - значение ключа сортировки и id
+текущей записи. Соседняя запись находится одним запросом по индексу:
+
+    WHERE (key, id) < (:cursor_key, :cursor_id) ORDER BY key DESC, id DESC LIMIT 2
+
+Вторая строка нужна только чтобы узнать, есть ли записи дальше, - список
+целиком не загружается и не пересчитывается.
+"""
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+from sqlalchemy import Select, bindparam, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class NavigationStep(NamedTuple):
+    item: Any
+    key: Any  # значение ключа сортировки записи - курсор для следующего шага
+    has_more: bool  # есть ли записи дальше в том же направлении
+
+
+def keyset_step(
+    stmt: Select, key, id_column, descending: bool, forward: bool, after_cursor: bool
+) -> Select:
+    """Запрос следующей записи; key должен быть последней колонкой stmt."""
+    towards_smaller = descending == forward
+    if after_cursor:
+        row = tuple_(key, id_column)
+        cursor = tuple_(
+            bindparam("cursor_key", type_=key.type), bindparam("cursor_id", type_=id_column.type)
+        )
+        stmt = stmt.where(row < cursor if towards_smaller else row > cursor)
+    if towards_smaller:
+        stmt = stmt.order_by(key.desc(), id_column.desc())
+    else:
+        stmt = stmt.order_by(key.asc(), id_column.asc())
+    return stmt.limit(2)
+
+
+def keyset_steps(stmt: Select, key, id_column, descending: bool) -> Dict[Tuple[bool, bool], Select]:
+    """Запросы для всех сочетаний (forward, after_cursor)."""
+    return {
+        (forward, after_cursor): keyset_step(stmt, key, id_column, descending, forward, after_cursor)
+        for forward in (True, False)
+        for after_cursor in (False, True)
+    }
+
+
+async def fetch_step(
+    session: AsyncSession,
+    stmt: Select,
+    params: Dict[str, Any],
+    cursor: Optional[Tuple[Any, int]],
+    make_item: Callable[[tuple], Any],
+) -> Optional[NavigationStep]:
+    """Выполнить запрос шага; make_item строит запись из колонок строки без ключа."""
+    if cursor is not None:
+        params = {**params, "cursor_key": cursor[0], "cursor_id": cursor[1]}
+    rows = (await session.execute(stmt, params)).all()
+    if not rows:
+        return None
+    *columns, key = rows[0]
+    return NavigationStep(make_item(columns), key, len(rows) > 1)
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import String, Integer, Float, Boolean, ForeignKey, DateTime, Text, BigInteger
+from sqlalchemy import String, Integer, Float, Boolean, ForeignKey, DateTime, Text, BigInteger, Index, text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 from typing import Optional, List
 
@@ -12,6 +12,15 @@ class Base(DeclarativeBase):
 class User(Base):
     """Модель пользователя"""
     __tablename__ = "users"
+    __table_args__ = (
+        # Частичный индекс: админов единицы, полный индекс по флагу планировщик игнорирует
+        Index(
+            "ix_users_admin",
+            "telegram_id",
+            postgresql_where=text("is_admin IS TRUE"),
+            sqlite_where=text("is_admin IS 1"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     telegram_id: Mapped[int] = mapped_column(BigInteger, unique=True, nullable=False)
@@ -27,9 +36,34 @@ class User(Base):
     withdrawal_requests: Mapped[List["WithdrawalRequest"]] = relationship(back_populates="user")
 
 
+class Category(Base):
+    """Категория карточек"""
+    __tablename__ = "categories"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    slug: Mapped[str] = mapped_column(String(50), unique=True, nullable=False)
+    name: Mapped[str] = mapped_column(String(100), nullable=False)
+    # Поддерживается при одобрении карточек, чтобы не считать COUNT(*) на каждом экране
+    approved_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+
 class Card(Base):
     """Модель карточки товара"""
     __tablename__ = "cards"
+    __table_args__ = (
+        # Для каждого сочетания фильтра и сортировки каталога - свой индекс,
+        # чтобы страница читалась диапазоном индекса без сортировки
+        Index("ix_cards_approved_created", "is_approved", "created_at", "id"),
+        Index("ix_cards_approved_price", "is_approved", "price", "id"),
+        Index("ix_cards_category_created", "category_id", "is_approved", "created_at", "id"),
+        Index("ix_cards_category_price", "category_id", "is_approved", "price", "id"),
+        Index("ix_cards_approved_popularity", "is_approved", "popularity", "id"),
+        Index("ix_cards_category_popularity", "category_id", "is_approved", "popularity", "id"),
+        Index("ix_cards_approved_id", "is_approved", "id"),
+        Index("ix_cards_category_id_desc", "category_id", "is_approved", "id"),
+        Index("ix_cards_moderation", "is_approved", "is_rejected", "created_at"),
+        Index("ix_cards_user_id", "user_id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     title: Mapped[str] = mapped_column(String(200), nullable=False)
@@ -41,6 +75,12 @@ class Card(Base):
     is_rejected: Mapped[bool] = mapped_column(Boolean, default=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"))
+    category_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("categories.id"))
+    # Пишутся пачками из ViewCounter, а не на каждый просмотр
+    view_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    recent_views: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Затухающая сумма просмотров, пересчитывается фоновой задачей
+    popularity: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
 
     user: Mapped["User"] = relationship(back_populates="cards")
     purchases: Mapped[List["Purchase"]] = relationship(back_populates="card")
@@ -49,6 +89,10 @@ class Card(Base):
 class Purchase(Base):
     """Модель покупки"""
     __tablename__ = "purchases"
+    __table_args__ = (
+        Index("ix_purchases_user_id", "user_id"),
+        Index("ix_purchases_card_id", "card_id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     amount: Mapped[float] = mapped_column(Float, nullable=False)
@@ -65,6 +109,10 @@ class Purchase(Base):
 class WithdrawalRequest(Base):
     """Модель заявки на вывод средств"""
     __tablename__ = "withdrawal_requests"
+    __table_args__ = (
+        Index("ix_withdrawal_pending", "is_processed", "created_at"),
+        Index("ix_withdrawal_user_id", "user_id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     amount: Mapped[float] = mapped_column(Float, nullable=False)
@@ -74,4 +122,35 @@ class WithdrawalRequest(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"))
 
-    user: Mapped["User"] = relationship(back_populates="withdrawal_requests")
\ No newline at end of file
+    user: Mapped["User"] = relationship(back_populates="withdrawal_requests")
+
+
+class OutboxMessage(Base):
+    """Модель исходящего уведомления (transactional outbox)"""
+    __tablename__ = "outbox_messages"
+    __table_args__ = (Index("ix_outbox_pending", "is_sent", "next_attempt_at"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    chat_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    text: Mapped[str] = mapped_column(Text, nullable=False)
+    is_sent: Mapped[bool] = mapped_column(Boolean, default=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    last_error: Mapped[Optional[str]] = mapped_column(Text)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class CardDraft(Base):
+    """Черновик карточки: данные диалога создания между шагами"""
+    __tablename__ = "card_drafts"
+    __table_args__ = (Index("ix_card_drafts_updated_at", "updated_at"),)
+
+    # Один черновик на пользователя
+    telegram_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    step: Mapped[str] = mapped_column(String(100), nullable=False)  # состояние CardCreationStates
+    title: Mapped[Optional[str]] = mapped_column(String(200))
+    description: Mapped[Optional[str]] = mapped_column(Text)
+    price: Mapped[Optional[float]] = mapped_column(Float)
+    category_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("categories.id"))
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
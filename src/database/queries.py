@@ -0,0 +1,140 @@
+"""Заранее построенные запросы для горячих путей.
+
+select() каждый раз строит новое дерево выражений, и SQLAlchemy при каждом
+выполнении заново вычисляет для него ключ кэша компиляции. У объекта,
+созданного один раз на уровне модуля, ключ кэша мемоизирован, поэтому
+выполнение обходится примерно вдвое дешевле по Python-накладным расходам
+(см. benchmarks/statement_bench.py). Значения передаются через bindparam:
+
+    await session.execute(USER_BY_TELEGRAM_ID, {"telegram_id": user_id})
+"""
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import joinedload, selectinload
+
+from src.database.keyset import keyset_steps
+from src.database.models import Card, User, WithdrawalRequest
+
+USER_BY_TELEGRAM_ID = select(User).where(User.telegram_id == bindparam("telegram_id"))
+
+ADMIN_ID_BY_TELEGRAM_ID = select(User.id).where(
+    User.telegram_id == bindparam("telegram_id"),
+    User.is_admin.is_(True),
+)
+
+CARD_BY_ID = select(Card).options(selectinload(Card.user)).where(Card.id == bindparam("card_id"))
+
+CARD_WITH_USER_BY_ID = (
+    select(Card).options(joinedload(Card.user)).where(Card.id == bindparam("card_id"))
+)
+
+APPROVED_CARD_BY_ID = select(Card).where(
+    Card.id == bindparam("card_id"),
+    Card.is_approved.is_(True),
+)
+
+# Колонки для отображения карточки без загрузки ORM-объектов Card и User
+CARD_VIEW_COLUMNS = select(
+    Card.id,
+    Card.title,
+    Card.description,
+    Card.price,
+    Card.photo_url,
+    Card.photo_file_id,
+    User.username,
+).outerjoin(User, Card.user_id == User.id)
+
+# Сортировки каталога; коды без "_", они передаются в callback_data
+CATALOG_SORTS = {
+    "new": (Card.created_at.desc(), Card.id.desc()),
+    "asc": (Card.price.asc(), Card.id.asc()),
+    "desc": (Card.price.desc(), Card.id.desc()),
+    "top": (Card.popularity.desc(), Card.id.desc()),
+}
+
+
+def _catalog_views(by_category: bool, sort: str):
+    stmt = CARD_VIEW_COLUMNS.where(Card.is_approved.is_(True))
+    if by_category:
+        stmt = stmt.where(Card.category_id == bindparam("category_id"))
+    return (
+        stmt.order_by(*CATALOG_SORTS[sort])
+        .offset(bindparam("offset"))
+        .limit(bindparam("limit"))
+    )
+
+
+# Запрос каталога для каждого сочетания (фильтр по категории, сортировка)
+CATALOG_VIEWS = {
+    (by_category, sort): _catalog_views(by_category, sort)
+    for by_category in (False, True)
+    for sort in CATALOG_SORTS
+}
+
+APPROVED_CARD_VIEWS = CATALOG_VIEWS[(False, "new")]
+
+
+def _album_views(by_category: bool, after_cursor: bool):
+    stmt = CARD_VIEW_COLUMNS.where(Card.is_approved.is_(True))
+    if by_category:
+        stmt = stmt.where(Card.category_id == bindparam("category_id"))
+    if after_cursor:
+        stmt = stmt.where(Card.id < bindparam("cursor"))
+    return stmt.order_by(Card.id.desc()).limit(bindparam("limit"))
+
+
+# Страницы альбома по ключу (id последней показанной карточки), новые сначала
+ALBUM_VIEWS = {
+    (by_category, after_cursor): _album_views(by_category, after_cursor)
+    for by_category in (False, True)
+    for after_cursor in (False, True)
+}
+
+# Ключ сортировки каталога и направление: курсор кнопок навигации - (ключ, id)
+CATALOG_KEYS = {
+    "new": (Card.created_at, True),
+    "asc": (Card.price, False),
+    "desc": (Card.price, True),
+    "top": (Card.popularity, True),
+}
+
+
+def _catalog_steps(by_category: bool, sort: str):
+    key, descending = CATALOG_KEYS[sort]
+    stmt = CARD_VIEW_COLUMNS.add_columns(key).where(Card.is_approved.is_(True))
+    if by_category:
+        stmt = stmt.where(Card.category_id == bindparam("category_id"))
+    return keyset_steps(stmt, key, Card.id, descending)
+
+
+# Соседняя карточка каталога: CATALOG_STEPS[(by_category, sort)][(forward, after_cursor)]
+CATALOG_STEPS = {
+    (by_category, sort): _catalog_steps(by_category, sort)
+    for by_category in (False, True)
+    for sort in CATALOG_KEYS
+}
+
+MODERATION_STEPS = keyset_steps(
+    CARD_VIEW_COLUMNS.add_columns(Card.created_at).where(
+        Card.is_approved.is_(False), Card.is_rejected.is_(False)
+    ),
+    Card.created_at,
+    Card.id,
+    descending=False,
+)
+
+WITHDRAWAL_STEPS = keyset_steps(
+    select(WithdrawalRequest, WithdrawalRequest.created_at)
+    .options(joinedload(WithdrawalRequest.user))
+    .where(WithdrawalRequest.is_processed.is_(False)),
+    WithdrawalRequest.created_at,
+    WithdrawalRequest.id,
+    descending=True,
+)
+
+CARD_VIEWS_BY_IDS = CARD_VIEW_COLUMNS.where(
+    Card.id.in_(bindparam("ids", expanding=True)), Card.is_approved.is_(True)
+)
+
+MODERATION_CARD_VIEWS = CARD_VIEW_COLUMNS.where(
+    Card.is_approved.is_(False), Card.is_rejected.is_(False)
+).order_by(Card.created_at.asc())
@@ -0,0 +1,44 @@
+"""Дополнение схемы существующей базы.
+
+create_all создает только отсутствующие таблицы: в уже существующую таблицу
+он не добавляет ни колонки, ни индексы. upgrade_schema() доводит базу,
+созданную раньше, до текущих моделей: добавляет колонки и индексы, а индекс,
+колонки которого отличаются от модели, пересоздает под тем же именем.
+Идемпотентно, запускается при каждом старте.
+"""
+from sqlalchemy import Connection, inspect, text
+
+from src.database.models import Base
+
+# Колонки, появившиеся в существующих таблицах. NOT NULL требует DEFAULT:
+# иначе ALTER TABLE не пройдет на таблице со строками
+ADDED_COLUMNS = {
+    "cards": (
+        ("category_id", "INTEGER REFERENCES categories(id)"),
+        ("view_count", "INTEGER NOT NULL DEFAULT 0"),
+        ("recent_views", "INTEGER NOT NULL DEFAULT 0"),
+        ("popularity", "FLOAT NOT NULL DEFAULT 0"),
+    ),
+}
+
+
+def upgrade_schema(connection: Connection) -> None:
+    """Добавить недостающие колонки, затем создать или пересоздать индексы моделей."""
+    inspector = inspect(connection)
+    for table, columns in ADDED_COLUMNS.items():
+        existing = {column["name"] for column in inspector.get_columns(table)}
+        for name, ddl in columns:
+            if name not in existing:
+                # SQLite не поддерживает ADD COLUMN IF NOT EXISTS - проверяем сами
+                connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+
+    for table in Base.metadata.sorted_tables:
+        existing = {
+            index["name"]: index["column_names"] for index in inspector.get_indexes(table.name)
+        }
+        for index in table.indexes:
+            columns = [column.name for column in index.columns]
+            if index.name in existing and existing[index.name] != columns:
+                # checkfirst смотрит только на имя: старое определение нужно удалить
+                index.drop(connection)
+            index.create(connection, checkfirst=True)
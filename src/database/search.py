@@ -0,0 +1,113 @@
+"""Полнотекстовый поиск по карточкам.
+
+Postgres: генерируемая колонка cards.search_vector (tsvector) с GIN-индексом,
+ее пересчитывает сама база. SQLite: виртуальная таблица FTS5 cards_fts
+(rowid = cards.id) только с одобренными карточками; ее обновляет CardService
+через index_card() при создании, одобрении и изменении карточки.
+
+Ни колонки, ни таблицы FTS нет в ORM-модели: схема создается событием
+after_create таблицы cards, а для уже существующей базы - create_search_schema().
+"""
+import re
+from typing import List
+
+from sqlalchemy import Connection, column, event, func, literal_column, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+
+from src.database.models import Card
+
+# Словарь без стемминга: каталог смешанный (русский и английский)
+SEARCH_CONFIG = "simple"
+MAX_TERMS = 8
+
+_POSTGRES_SCHEMA = (
+    f"""
+    ALTER TABLE cards ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_cards_search ON cards USING GIN (search_vector)",
+)
+
+
+def search_terms(query: str) -> List[str]:
+    """Слова запроса в нижнем регистре; операторы и кавычки отбрасываются."""
+    return re.findall(r"[^\W_]+", query.lower())[:MAX_TERMS]
+
+
+def create_search_schema(connection: Connection) -> None:
+    """Создать поисковый индекс, если его нет. Идемпотентно."""
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        for statement in _POSTGRES_SCHEMA:
+            connection.execute(text(statement))
+    elif dialect == "sqlite":
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'cards_fts'")
+        ).first()
+        if exists:
+            return
+        connection.execute(
+            text(
+                "CREATE VIRTUAL TABLE cards_fts USING fts5("
+                "title, description, tokenize = 'unicode61 remove_diacritics 2')"
+            )
+        )
+        rebuild_search_index(connection)
+
+
+def rebuild_search_index(connection: Connection) -> None:
+    """Перестроить FTS5 по таблице cards (после массовой вставки в обход CardService)."""
+    if connection.dialect.name != "sqlite":
+        return
+    connection.execute(text("DELETE FROM cards_fts"))
+    connection.execute(
+        text(
+            "INSERT INTO cards_fts(rowid, title, description) "
+            "SELECT id, title, description FROM cards WHERE is_approved = 1"
+        )
+    )
+
+
+@event.listens_for(Card.__table__, "after_create")
+def _create_search_schema(target, connection, **kw):
+    create_search_schema(connection)
+
+
+@event.listens_for(Card.__table__, "before_drop")
+def _drop_search_schema(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        connection.execute(text("DROP TABLE IF EXISTS cards_fts"))
+
+
+def _dialect(session: AsyncSession) -> str:
+    return session.get_bind().dialect.name
+
+
+async def index_card(session: AsyncSession, card: Card) -> None:
+    """Обновить запись карточки в FTS5. На Postgres индекс обновляется сам."""
+    if _dialect(session) != "sqlite":
+        return
+    await session.execute(text("DELETE FROM cards_fts WHERE rowid = :id"), {"id": card.id})
+    if card.is_approved:
+        await session.execute(
+            text("INSERT INTO cards_fts(rowid, title, description) VALUES (:id, :title, :description)"),
+            {"id": card.id, "title": card.title, "description": card.description},
+        )
+
+
+def match_condition(session: AsyncSession, terms: List[str]) -> ColumnElement[bool]:
+    """Условие WHERE: карточка содержит все слова (каждое - как префикс)."""
+    if _dialect(session) == "postgresql":
+        tsquery = " & ".join(f"{term}:*" for term in terms)
+        return literal_column("cards.search_vector").op("@@")(
+            func.to_tsquery(SEARCH_CONFIG, tsquery)
+        )
+    fts_query = " ".join(f'"{term}"*' for term in terms)
+    matched = text("SELECT rowid FROM cards_fts WHERE cards_fts MATCH :fts_query").bindparams(
+        fts_query=fts_query
+    )
+    return Card.id.in_(matched.columns(column("rowid")))
@@ -1,21 +1,218 @@
-from typing import Optional
+import itertools
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence
+from uuid import uuid4
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
 
 from src.config import Config
 from src.database.models import Base
+from src.database.schema import upgrade_schema
+from src.database.search import create_search_schema
+from src.utils.health import pool_status
+from src.utils.metrics import MetricsRegistry, labels, metrics
 
 
-def get_engine(config: Optional[Config] = None):
+def _prepared_statement_name() -> str:
+    # Under PgBouncer in transaction mode server connections are shared, so
+    # prepared statement names must be unique across clients.
+    return f"__asyncpg_{uuid4()}__"
+
+
+def engine_options(config: Config, url: Optional[str] = None) -> Dict[str, Any]:
+    """Build create_async_engine() keyword arguments from pool settings in config."""
+    parsed = make_url(url or config.database_url)
+    drivername = parsed.drivername
+    # In-memory SQLite uses a single shared connection, pool sizing does not apply
+    in_memory = drivername.startswith("sqlite") and parsed.database in (None, "", ":memory:")
+    options: Dict[str, Any] = {"echo": False, "pool_pre_ping": config.db_pool_pre_ping}
+
+    if config.db_null_pool:
+        options["poolclass"] = NullPool
+    elif not in_memory:
+        options.update(
+            pool_size=config.db_pool_size,
+            max_overflow=config.db_max_overflow,
+            pool_timeout=config.db_pool_timeout,
+            pool_recycle=config.db_pool_recycle,
+        )
+
+    if drivername == "postgresql+asyncpg":
+        if config.db_pgbouncer:
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": _prepared_statement_name,
+            }
+        else:
+            options["connect_args"] = {
+                "statement_cache_size": config.db_statement_cache_size,
+                "prepared_statement_cache_size": config.db_statement_cache_size,
+            }
+    return options
+
+
+def configure_sqlite(engine: AsyncEngine, config: Config, read_only: bool = False) -> None:
+    """Apply pragmas for the single-node SQLite mode on every new connection."""
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        # In WAL mode NORMAL is durable across application crashes and much faster than FULL
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(config.sqlite_busy_timeout)}")
+        cursor.execute(f"PRAGMA mmap_size={int(config.sqlite_mmap_size)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+
+def _create_sqlite_engine(config: Config, read_only: bool) -> AsyncEngine:
+    """SQLite engine: a writer pool (one connection by default) or a reader pool.
+
+    A single writer connection means writes queue up in the pool instead of
+    failing with "database is locked"; WAL lets readers run alongside it.
+    """
+    directory = os.path.dirname(config.sqlite_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    engine = create_async_engine(
+        config.database_url,
+        echo=False,
+        pool_size=config.sqlite_reader_pool_size if read_only else config.sqlite_writer_pool_size,
+        max_overflow=0,
+        pool_timeout=config.db_pool_timeout,
+        connect_args={"timeout": config.sqlite_busy_timeout / 1000},
+    )
+    configure_sqlite(engine, config, read_only=read_only)
+    return engine
+
+
+def get_engine(config: Optional[Config] = None) -> AsyncEngine:
     """Create async engine based on configuration."""
     cfg = config or Config()
-    return create_async_engine(cfg.database_url, echo=False, future=True)
+    if cfg.is_sqlite:
+        return _create_sqlite_engine(cfg, read_only=False)
+    return create_async_engine(cfg.database_url, **engine_options(cfg))
+
+
+def instrument_pool(engine: AsyncEngine, registry: MetricsRegistry = metrics) -> None:
+    """Export pool state and connection lifecycle counters."""
+    pool = engine.sync_engine.pool
+    connects = registry.counter("bot_db_pool_connects_total", "Новые соединения с БД")
+    checkouts = registry.counter("bot_db_pool_checkouts_total", "Выдачи соединений из пула")
+    invalidations = registry.counter(
+        "bot_db_pool_invalidations_total", "Сброшенные соединения (в т.ч. не прошедшие pre-ping)"
+    )
+    event.listen(pool, "connect", lambda *args: connects.inc())
+    event.listen(pool, "checkout", lambda *args: checkouts.inc())
+    event.listen(pool, "invalidate", lambda *args: invalidations.inc())
+
+    registry.register_callback(
+        "bot_db_pool_connections",
+        lambda: {labels(state=name): value for name, value in pool_status(engine).items()},
+        "Состояние пула соединений с БД",
+    )
+
+
+class WriteTrackingSession(Session):
+    """Session that records in ``info["has_writes"]`` whether it wrote anything."""
+
+
+@event.listens_for(WriteTrackingSession, "after_flush")
+def _mark_flush(session, flush_context):
+    session.info["has_writes"] = True
+
+
+@event.listens_for(WriteTrackingSession, "do_orm_execute")
+def _mark_dml(orm_execute_state):
+    # Core-style update()/delete()/insert() do not go through flush
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info["has_writes"] = True
 
 
 def get_session_maker(engine=None) -> async_sessionmaker[AsyncSession]:
     """Return async session maker bound to provided engine."""
     eng = engine or get_engine()
-    return async_sessionmaker(eng, expire_on_commit=False, class_=AsyncSession)
+    return async_sessionmaker(
+        eng, expire_on_commit=False, class_=AsyncSession, sync_session_class=WriteTrackingSession
+    )
+
+
+def get_replica_engines(config: Config) -> List[AsyncEngine]:
+    """Create engines for read replicas listed in DB_REPLICA_URLS.
+
+    In SQLite mode the "replica" is a read-only connection pool on the same file.
+    """
+    if config.is_sqlite:
+        return [_create_sqlite_engine(config, read_only=True)]
+    return [create_async_engine(url, **engine_options(config, url)) for url in config.replica_urls]
+
+
+class SessionRouter:
+    """Route read-only sessions to replicas with read-your-writes stickiness.
+
+    After a user's own write, their reads go to the primary for
+    ``sticky_seconds`` so they never see replica lag on data they just changed.
+    Without replicas every session comes from the primary.
+    """
+
+    MAX_TRACKED_WRITERS = 10000
+
+    def __init__(
+        self,
+        primary: async_sessionmaker,
+        replicas: Sequence[async_sessionmaker] = (),
+        sticky_seconds: float = 5.0,
+    ):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.sticky_seconds = sticky_seconds
+        self._next_replica = itertools.cycle(self.replicas) if self.replicas else None
+        self._recent_writes: Dict[int, float] = {}
+
+    @property
+    def has_replicas(self) -> bool:
+        return bool(self.replicas)
+
+    def is_sticky(self, user_id: Optional[int]) -> bool:
+        if user_id is None:
+            return False
+        written_at = self._recent_writes.get(user_id)
+        if written_at is None:
+            return False
+        if time.monotonic() - written_at > self.sticky_seconds:
+            del self._recent_writes[user_id]
+            return False
+        return True
+
+    def mark_write(self, user_id: Optional[int]) -> None:
+        if user_id is None or not self.replicas:
+            return
+        if len(self._recent_writes) >= self.MAX_TRACKED_WRITERS:
+            deadline = time.monotonic() - self.sticky_seconds
+            self._recent_writes = {
+                key: value for key, value in self._recent_writes.items() if value > deadline
+            }
+        self._recent_writes[user_id] = time.monotonic()
+
+    def use_replica(self, user_id: Optional[int] = None) -> bool:
+        """Whether reads of the given user may go to a replica right now."""
+        return self._next_replica is not None and not self.is_sticky(user_id)
+
+    def reader(self) -> AsyncSession:
+        """Replica session (round robin); the primary if there are no replicas."""
+        if self._next_replica is None:
+            return self.primary()
+        return next(self._next_replica)()
 
 
 async def init_models(engine=None) -> None:
@@ -23,3 +220,7 @@ async def init_models(engine=None) -> None:
     eng = engine or get_engine()
     async with eng.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        # create_all skips existing tables: add new columns and indexes to them
+        await conn.run_sync(upgrade_schema)
+        # after_create does not fire for an already existing cards table
+        await conn.run_sync(create_search_schema)
@@ -2,10 +2,9 @@ from typing import Union
 
 from aiogram.filters import BaseFilter
 from aiogram.types import CallbackQuery, Message
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.models import User
+from src.database.queries import ADMIN_ID_BY_TELEGRAM_ID
 
 
 class AdminFilter(BaseFilter):
@@ -19,8 +18,5 @@ class AdminFilter(BaseFilter):
 
         user_id = update.from_user.id
 
-        stmt = select(User).where(User.telegram_id == user_id, User.is_admin.is_(True))
-        result = await session.execute(stmt)
-        user = result.scalar_one_or_none()
-
-        return user is not None
\ No newline at end of file
+        result = await session.execute(ADMIN_ID_BY_TELEGRAM_ID, {"telegram_id": user_id})
+        return result.scalar_one_or_none() is not None
\ No newline at end of file
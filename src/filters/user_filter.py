@@ -1,9 +1,8 @@
 from aiogram.filters import BaseFilter
 from aiogram.types import Message
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.models import User
+from src.database.queries import USER_BY_TELEGRAM_ID
 
 
 class UserExistsFilter(BaseFilter):
@@ -16,8 +15,7 @@ class UserExistsFilter(BaseFilter):
     ) -> bool:
         user_id = message.from_user.id
 
-        stmt = select(User).where(User.telegram_id == user_id)
-        result = await session.execute(stmt)
+        result = await session.execute(USER_BY_TELEGRAM_ID, {"telegram_id": user_id})
         user = result.scalar_one_or_none()
 
         return user is not None
\ No newline at end of file
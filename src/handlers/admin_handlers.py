@@ -1,14 +1,16 @@
 import logging
+from html import escape
+from typing import Optional
 
 from aiogram import F, Router
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, InputMediaPhoto, Message
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
-from src.database.models import Card, WithdrawalRequest, User
+from src.database.keyset import NavigationStep
+from src.database.models import WithdrawalRequest
+from src.database.queries import ADMIN_ID_BY_TELEGRAM_ID
 from src.keyboards.admin_keyboards import (
     get_admin_keyboard,
     get_edit_attributes_keyboard,
@@ -16,8 +18,13 @@ from src.keyboards.admin_keyboards import (
     get_statistics_keyboard,
     get_withdrawal_requests_keyboard,
 )
-from src.services.card_service import CardService
+from src.keyboards.callbacks import ModerationAction, WithdrawalAction
+from src.services.card_service import CardService, CardView
+from src.services.recommender import Recommender
 from src.services.user_service import UserService
+from src.utils.photo_cache import photo_cache
+from src.utils.profiler import parse_limit, profiler
+from src.utils.render_cache import edit_message, remember_message
 from src.utils.states import AdminStates
 
 router = Router()
@@ -26,23 +33,15 @@ logger = logging.getLogger(__name__)
 
 async def _check_admin(session: AsyncSession, user_id: int) -> bool:
     """Проверка является ли пользователь админом"""
-    stmt = select(User).where(
-        User.telegram_id == user_id,
-        User.is_admin == True
-    )
-    result = await session.execute(stmt)
+    result = await session.execute(ADMIN_ID_BY_TELEGRAM_ID, {"telegram_id": user_id})
     return result.scalar_one_or_none() is not None
 
 
-async def _get_pending_cards(session: AsyncSession):
-    return await CardService.get_cards_for_moderation(session)
-
-
-async def _format_card_caption(card: Card) -> str:
-    author = f"@{card.user.username}" if card.user and card.user.username else "Без username"
+async def _format_card_caption(card: CardView) -> str:
+    author = f"@{escape(card.seller_username)}" if card.seller_username else "Без username"
     return (
-        f"📦 {card.title}\n\n"
-        f"📝 Описание: {card.description}\n\n"
+        f"📦 {escape(card.title)}\n\n"
+        f"📝 Описание: {escape(card.description)}\n\n"
         f"💰 Цена: {card.price} руб.\n"
         f"👤 Автор: {author}"
     )
@@ -51,9 +50,9 @@ async def _format_card_caption(card: Card) -> str:
 def _format_withdraw_request(request: WithdrawalRequest) -> str:
     return (
         f"💰 Заявка на вывод #{request.id}\n\n"
-        f"👤 Пользователь: @{request.user.username if request.user.username else 'Без username'}\n"
+        f"👤 Пользователь: @{escape(request.user.username) if request.user.username else 'Без username'}\n"
         f"💵 Сумма: {request.amount} руб.\n"
-        f"📋 Реквизиты: {request.requisites}\n"
+        f"📋 Реквизиты: {escape(request.requisites)}\n"
         f"📅 Дата: {request.created_at.strftime('%d.%m.%Y %H:%M')}"
     )
 
@@ -79,78 +78,108 @@ async def _build_stats(session: AsyncSession) -> str:
 
 @router.message(Command("admin"))
 @router.message(F.text == "👨‍💼 Админ меню")
-async def admin_menu(message: Message, session: AsyncSession):
+async def admin_menu(message: Message, read_session: AsyncSession):
     """Меню администратора."""
-    if not await _check_admin(session, message.from_user.id):
+    if not await _check_admin(read_session, message.from_user.id):
         await message.answer("❌ У вас нет доступа к админ-панели")
         return
     await message.answer("👨‍💼 Админ меню", reply_markup=get_admin_keyboard())
 
 
 @router.message(F.text == "Модерация")
-async def show_moderation(message: Message, session: AsyncSession):
+async def show_moderation(message: Message, read_session: AsyncSession):
     """Показ карточек на модерации."""
-    if not await _check_admin(session, message.from_user.id):
+    if not await _check_admin(read_session, message.from_user.id):
         await message.answer("❌ У вас нет доступа к админ-панели")
         return
 
-    cards = await _get_pending_cards(session)
-    if not cards:
+    step = await CardService.moderation_step(read_session)
+    if step is None:
         await message.answer("Нет карточек на модерации.")
         return
 
-    card = cards[0]
+    card = step.item
     caption = await _format_card_caption(card)
+    markup = get_moderation_keyboard(card.id, step.key, False, step.has_more)
 
-    if card.photo_url:
-        await message.answer_photo(
-            photo=card.photo_url,
-            caption=caption,
-            reply_markup=get_moderation_keyboard(0, len(cards), card.id),
-        )
+    photo = photo_cache.photo_for(card)
+    if photo:
+        sent = await message.answer_photo(photo=photo, caption=caption, reply_markup=markup)
     else:
-        await message.answer(
-            caption, reply_markup=get_moderation_keyboard(0, len(cards), card.id)
-        )
+        sent = await message.answer(caption, reply_markup=markup)
+    remember_message(sent, caption, photo, markup)
 
 
 @router.message(F.text == "Статистика")
-async def show_statistics(message: Message, session: AsyncSession):
+async def show_statistics(message: Message, read_session: AsyncSession):
     """Показ статистики."""
-    if not await _check_admin(session, message.from_user.id):
+    if not await _check_admin(read_session, message.from_user.id):
         await message.answer("❌ У вас нет доступа к админ-панели")
         return
 
-    stats_text = await _build_stats(session)
-    await message.answer(stats_text, reply_markup=get_statistics_keyboard())
+    stats_text = await _build_stats(read_session)
+    markup = get_statistics_keyboard()
+    sent = await message.answer(stats_text, reply_markup=markup)
+    remember_message(sent, stats_text, reply_markup=markup)
 
 
 @router.message(F.text == "Заявки на вывод")
-async def show_withdrawal_requests(message: Message, session: AsyncSession):
+async def show_withdrawal_requests(message: Message, read_session: AsyncSession):
     """Показ заявок на вывод."""
-    if not await _check_admin(session, message.from_user.id):
+    if not await _check_admin(read_session, message.from_user.id):
         await message.answer("❌ У вас нет доступа к админ-панели")
         return
 
-    stmt = (
-        select(WithdrawalRequest)
-        .options(selectinload(WithdrawalRequest.user))
-        .where(WithdrawalRequest.is_processed.is_(False))
-        .order_by(WithdrawalRequest.created_at.desc())
-    )
-    requests = (await session.execute(stmt)).scalars().all()
+    step = await UserService.withdrawal_step(read_session)
 
-    if not requests:
+    if step is None:
         await message.answer("Нет заявок на вывод.")
         return
 
-    request = requests[0]
+    request = step.item
     request_text = _format_withdraw_request(request)
+    markup = get_withdrawal_requests_keyboard(request.id, step.key, False, step.has_more)
 
-    await message.answer(
-        request_text,
-        reply_markup=get_withdrawal_requests_keyboard(0, len(requests), request.id),
-    )
+    sent = await message.answer(request_text, reply_markup=markup)
+    remember_message(sent, request_text, reply_markup=markup)
+
+
+PROFILE_USAGE = (
+    "Использование:\n"
+    "/profile cpu 30s - CPU-профиль на 30 секунд\n"
+    "/profile cpu 200 - CPU-профиль на 200 апдейтов\n"
+    "/profile mem 60s - прирост памяти (tracemalloc) за 60 секунд\n"
+    "/profile stop - остановить и получить результат"
+)
+
+
+@router.message(Command("profile"))
+async def profile_command(message: Message, command: CommandObject, read_session: AsyncSession):
+    """Профилирование работающего бота."""
+    if not await _check_admin(read_session, message.from_user.id):
+        await message.answer("❌ У вас нет доступа к админ-панели")
+        return
+
+    args = (command.args or "").split()
+    if args[:1] == ["stop"]:
+        if not await profiler.finish():
+            await message.answer("Профилирование не запущено.")
+        return
+
+    if len(args) != 2 or args[0] not in profiler.MODES:
+        await message.answer(PROFILE_USAGE)
+        return
+    try:
+        seconds, updates = parse_limit(args[1])
+    except ValueError:
+        await message.answer(PROFILE_USAGE)
+        return
+
+    if not profiler.start(args[0], message.bot, message.chat.id, seconds=seconds, updates=updates):
+        await message.answer("⏳ Профилирование уже идет. Остановить: /profile stop")
+        return
+    limit = f"{seconds:g} с" if seconds else f"{updates} апдейтов"
+    await message.answer(f"▶️ Профилирование {args[0]} запущено на {limit}")
 
 
 # ============= ХЕНДЛЕРЫ СОСТОЯНИЙ  =============
@@ -205,7 +234,12 @@ async def choose_attribute(message: Message, state: FSMContext):
 
 
 @router.message(AdminStates.waiting_for_new_value)
-async def apply_new_value(message: Message, state: FSMContext, session: AsyncSession):
+async def apply_new_value(
+    message: Message,
+    state: FSMContext,
+    session: AsyncSession,
+    recommender: Optional[Recommender] = None,
+):
     """Применение нового значения к карточке."""
     data = await state.get_data()
     card_id = data.get("card_id")
@@ -237,6 +271,10 @@ async def apply_new_value(message: Message, state: FSMContext, session: AsyncSes
     if not updated:
         await message.answer("❌ Не удалось обновить карточку.")
     else:
+        if recommender is not None and attribute in ("title", "description"):
+            card = await CardService.get_card_by_id(session, card_id)
+            if card.is_approved:
+                recommender.update(card.id, card.title, card.description)
         await message.answer("✅ Карточка успешно обновлена!")
 
     await state.clear()
@@ -244,27 +282,63 @@ async def apply_new_value(message: Message, state: FSMContext, session: AsyncSes
 
 # ============= CALLBACK ХЕНДЛЕРЫ =============
 
-@router.callback_query(F.data.startswith("mod_"))
-async def handle_moderation(callback: CallbackQuery, state: FSMContext, session: AsyncSession):
+async def _edit_moderation_card(message: Message, step: NavigationStep, has_prev: bool, has_next: bool):
+    card = step.item
+    caption = await _format_card_caption(card)
+    markup = get_moderation_keyboard(card.id, step.key, has_prev, has_next)
+    photo = photo_cache.photo_for(card)
+    if photo:
+        media = InputMediaPhoto(media=photo, caption=caption)
+        await edit_message(message, media=media, reply_markup=markup)
+    else:
+        await edit_message(message, caption=caption, reply_markup=markup)
+
+
+@router.callback_query(ModerationAction.filter())
+async def handle_moderation(
+    callback: CallbackQuery,
+    callback_data: ModerationAction,
+    state: FSMContext,
+    session: AsyncSession,
+    read_session: AsyncSession,
+    recommender: Optional[Recommender] = None,
+):
     """Обработка модерации карточек."""
-    if not await _check_admin(session, callback.from_user.id):
+    if not await _check_admin(read_session, callback.from_user.id):
         await callback.answer("❌ У вас нет доступа")
         return
 
-    action, index_str, card_id_str = callback.data.split("_")[1:]
-    current_index = int(index_str)
-    card_id = int(card_id_str)
+    action, card_id = callback_data.action, callback_data.card_id
 
-    card = await CardService.get_card_by_id(session, card_id)
+    if action in ["prev", "next"]:
+        # Соседняя карточка по курсору из кнопки, без загрузки всего списка
+        forward = action == "next"
+        step = await CardService.moderation_step(
+            read_session, cursor=(callback_data.created_at, card_id), forward=forward
+        )
+        if step is None:
+            await callback.answer("Это последняя карточка" if forward else "Это первая карточка")
+            return
+        has_prev, has_next = (True, step.has_more) if forward else (step.has_more, True)
+        await _edit_moderation_card(callback.message, step, has_prev, has_next)
+        await callback.answer()
+        return
+
+    card = await CardService.get_card_by_id(read_session, card_id)
     if not card:
         await callback.answer("Карточка не найдена")
         return
 
     if action == "approve":
         await CardService.approve_card(session, card_id)
+        if recommender is not None:
+            recommender.update(card.id, card.title, card.description)
         await callback.answer("✅ Карточка одобрена")
     elif action == "reject":
         await CardService.reject_card(session, card_id)
+        if recommender is not None:
+            # Отклоненная карточка не должна оставаться в похожих
+            recommender.remove(card_id)
         await callback.answer("❌ Карточка отклонена")
     elif action == "edit":
         await state.set_state(AdminStates.editing_card_attribute)
@@ -277,51 +351,11 @@ async def handle_moderation(callback: CallbackQuery, state: FSMContext, session:
         )
         await callback.answer()
         return
-    elif action in ["prev", "next"]:
-        cards = await _get_pending_cards(session)
-        if not cards:
-            await callback.answer("Нет карточек на модерации")
-            return
 
-        if action == "prev" and current_index > 0:
-            new_index = current_index - 1
-        elif action == "next" and current_index < len(cards) - 1:
-            new_index = current_index + 1
-        else:
-            await callback.answer()
-            return
-
-        card = cards[new_index]
-        caption = await _format_card_caption(card)
-
-        if card.photo_url:
-            media = InputMediaPhoto(media=card.photo_url, caption=caption)
-            await callback.message.edit_media(
-                media=media,
-                reply_markup=get_moderation_keyboard(new_index, len(cards), card.id),
-            )
-        else:
-            await callback.message.edit_caption(
-                caption=caption,
-                reply_markup=get_moderation_keyboard(new_index, len(cards), card.id),
-            )
-        await callback.answer()
-        return
-
-    # Обновляем список после одобрения/отклонения
-    cards = await _get_pending_cards(session)
-    if cards:
-        card = cards[0]
-        caption = await _format_card_caption(card)
-        if card.photo_url:
-            media = InputMediaPhoto(media=card.photo_url, caption=caption)
-            await callback.message.edit_media(
-                media=media, reply_markup=get_moderation_keyboard(0, len(cards), card.id)
-            )
-        else:
-            await callback.message.edit_caption(
-                caption=caption, reply_markup=get_moderation_keyboard(0, len(cards), card.id)
-            )
+    # После одобрения/отклонения показываем первую карточку в очереди
+    step = await CardService.moderation_step(session)
+    if step is not None:
+        await _edit_moderation_card(callback.message, step, False, step.has_more)
     else:
         await callback.message.answer("✅ Нет карточек на модерации.")
 
@@ -329,39 +363,35 @@ async def handle_moderation(callback: CallbackQuery, state: FSMContext, session:
 
 
 @router.callback_query(F.data == "stats_refresh")
-async def refresh_stats(callback: CallbackQuery, session: AsyncSession):
-    if not await _check_admin(session, callback.from_user.id):
+async def refresh_stats(callback: CallbackQuery, read_session: AsyncSession):
+    if not await _check_admin(read_session, callback.from_user.id):
         await callback.answer("❌ У вас нет доступа")
         return
 
-    stats_text = await _build_stats(session)
-    await callback.message.edit_text(stats_text, reply_markup=get_statistics_keyboard())
+    stats_text = await _build_stats(read_session)
+    await edit_message(callback.message, text=stats_text, reply_markup=get_statistics_keyboard())
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("withdraw_"))
-async def handle_withdrawal_request(callback: CallbackQuery, session: AsyncSession):
+@router.callback_query(WithdrawalAction.filter())
+async def handle_withdrawal_request(
+    callback: CallbackQuery,
+    callback_data: WithdrawalAction,
+    session: AsyncSession,
+    read_session: AsyncSession,
+):
     """Обработка заявок на вывод."""
-    if not await _check_admin(session, callback.from_user.id):
+    if not await _check_admin(read_session, callback.from_user.id):
         await callback.answer("❌ У вас нет доступа")
         return
 
-    action, index_str, request_id_str = callback.data.split("_")[1:]
-    current_index = int(index_str)
-    request_id = int(request_id_str)
-
-    stmt = (
-        select(WithdrawalRequest)
-        .options(selectinload(WithdrawalRequest.user))
-        .where(WithdrawalRequest.id == request_id)
-    )
-    request = (await session.execute(stmt)).scalar_one_or_none()
-
-    if not request:
-        await callback.answer("Заявка не найдена")
-        return
+    action, request_id = callback_data.action, callback_data.request_id
 
     if action == "process":
+        request = await UserService.get_withdrawal_request(session, request_id)
+        if not request:
+            await callback.answer("Заявка не найдена")
+            return
         if request.user.balance >= request.amount:
             request.user.balance -= request.amount
             request.is_processed = True
@@ -370,37 +400,35 @@ async def handle_withdrawal_request(callback: CallbackQuery, session: AsyncSessi
         else:
             await callback.answer("❌ Недостаточно средств у пользователя")
             return
+        # Показываем первую заявку в очереди
+        step = await UserService.withdrawal_step(session)
+        has_prev, has_next = False, step is not None and step.has_more
+    else:
+        forward = action == "next"
+        step = await UserService.withdrawal_step(
+            read_session, cursor=(callback_data.created_at, request_id), forward=forward
+        )
+        if step is None:
+            await callback.answer("Это последняя заявка" if forward else "Это первая заявка")
+            return
+        has_prev, has_next = (True, step.has_more) if forward else (step.has_more, True)
 
-    # Обновляем список заявок
-    stmt = (
-        select(WithdrawalRequest)
-        .options(selectinload(WithdrawalRequest.user))
-        .where(WithdrawalRequest.is_processed.is_(False))
-        .order_by(WithdrawalRequest.created_at.desc())
-    )
-    requests = (await session.execute(stmt)).scalars().all()
-
-    if requests:
-        if action in ["prev", "next"]:
-            if action == "prev" and current_index > 0:
-                new_index = current_index - 1
-            elif action == "next" and current_index < len(requests) - 1:
-                new_index = current_index + 1
-            else:
-                await callback.answer()
-                return
-            request = requests[new_index]
-        else:
-            new_index = 0
-            request = requests[0]
-
+    if step is not None:
+        request = step.item
         request_text = _format_withdraw_request(request)
 
-        await callback.message.edit_text(
-            request_text,
-            reply_markup=get_withdrawal_requests_keyboard(new_index, len(requests), request.id),
+        await edit_message(
+            callback.message,
+            text=request_text,
+            reply_markup=get_withdrawal_requests_keyboard(request.id, step.key, has_prev, has_next),
         )
     else:
         await callback.message.answer("✅ Нет заявок на вывод.")
 
-    await callback.answer()
\ No newline at end of file
+    await callback.answer()
+
+
+@router.callback_query(F.data.startswith(("mod:", "wd:", "mod_", "withdraw_")))
+async def handle_stale_admin_action(callback: CallbackQuery):
+    """Кнопка старого формата или с поврежденными данными - без запросов к БД."""
+    await callback.answer("Кнопка устарела, откройте список заново")
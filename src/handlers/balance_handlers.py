@@ -7,8 +7,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.config import Config
 from src.database.models import User
+from src.database.queries import USER_BY_TELEGRAM_ID
 from src.keyboards.balance_keyboards import get_balance_keyboard, get_cancel_reply_keyboard
 from src.services.user_service import UserService
+from src.utils.render_cache import edit_message, remember_message
 from src.utils.states import BalanceStates
 
 router = Router()
@@ -16,25 +18,25 @@ logger = logging.getLogger(__name__)
 
 
 @router.message(F.text == "💰 Баланс")
-async def show_balance(message: Message, session: AsyncSession, user: User | None = None):
+async def show_balance(message: Message, read_session: AsyncSession, user: User | None = None):
     """Показывает баланс и действия."""
     current_user = user
     if current_user is None:
-        from sqlalchemy import select
-        result = await session.execute(select(User).where(User.telegram_id == message.from_user.id))
+        result = await read_session.execute(USER_BY_TELEGRAM_ID, {"telegram_id": message.from_user.id})
         current_user = result.scalar_one_or_none()
 
     balance_value = current_user.balance if current_user else 0.0
-    await message.answer(
-        f"Ваш баланс: {balance_value:.2f} руб.",
-        reply_markup=get_balance_keyboard(),
-    )
+    text = f"Ваш баланс: {balance_value:.2f} руб."
+    markup = get_balance_keyboard()
+    sent = await message.answer(text, reply_markup=markup)
+    remember_message(sent, text, reply_markup=markup)
 
 
 @router.callback_query(F.data == "balance_refresh")
 async def refresh_balance(callback: CallbackQuery, user: User):
-    await callback.message.edit_text(
-        f"Ваш баланс: {user.balance:.2f} руб.",
+    await edit_message(
+        callback.message,
+        text=f"Ваш баланс: {user.balance:.2f} руб.",
         reply_markup=get_balance_keyboard(),
     )
     await callback.answer()
@@ -59,8 +61,7 @@ async def process_withdraw_amount(
     # Подстраховка если user не был внедрен
     current_user = user
     if current_user is None:
-        from sqlalchemy import select
-        result = await session.execute(select(User).where(User.telegram_id == message.from_user.id))
+        result = await session.execute(USER_BY_TELEGRAM_ID, {"telegram_id": message.from_user.id})
         current_user = result.scalar_one_or_none()
         if current_user is None:
             await message.answer("Пользователь не найден, отправьте /start и попробуйте снова.")
@@ -96,8 +97,7 @@ async def process_withdraw_requisites(
     # Подстраховка если user не был внедрен
     current_user = user
     if current_user is None:
-        from sqlalchemy import select
-        result = await session.execute(select(User).where(User.telegram_id == message.from_user.id))
+        result = await session.execute(USER_BY_TELEGRAM_ID, {"telegram_id": message.from_user.id})
         current_user = result.scalar_one_or_none()
         if current_user is None:
             await message.answer("Пользователь не найден, отправьте /start и попробуйте снова.")
@@ -1,16 +1,52 @@
 import logging
+from html import escape
 
 from aiogram import F, Router
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 from aiogram.fsm.context import FSMContext
-from aiogram.types import CallbackQuery, InputMediaPhoto, Message
+from aiogram.types import (
+    CallbackQuery,
+    InlineQuery,
+    InlineQueryResultArticle,
+    InlineQueryResultCachedPhoto,
+    InputMediaPhoto,
+    InputTextMessageContent,
+    Message,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload, joinedload
 
-from src.database.models import Card, User
-from src.keyboards.card_keyboards import get_cards_keyboard, get_card_creation_cancel_keyboard
-from src.services.card_service import CardService
+from src.config import Config
+from src.database.models import User
+from src.database.queries import CATALOG_SORTS
+from src.database.search import search_terms
+from src.keyboards.callbacks import (
+    AlbumPage,
+    CatalogCategories,
+    CatalogFilter,
+    CatalogNav,
+    SearchPage,
+    SimilarCards,
+    search_token,
+)
+from src.keyboards.card_keyboards import (
+    get_album_keyboard,
+    get_card_creation_cancel_keyboard,
+    get_cards_filter_keyboard,
+    get_cards_keyboard,
+    get_catalog_categories_keyboard,
+    get_category_choice_keyboard,
+    get_draft_keyboard,
+    get_search_keyboard,
+)
+from src.services.card_service import CardService, CardView
+from src.services.category_service import CategoryService
+from src.services.draft_store import DRAFT_FIELDS, DraftStore
+from src.services.recommender import Recommender
 from src.services.user_service import UserService
+from src.services.view_counter import ViewCounter
+from src.utils.inline_cache import inline_cache
+from src.utils.photo_cache import photo_cache
+from src.utils.render_cache import edit_message, remember_message
 from src.utils.states import CardCreationStates
 
 router = Router()
@@ -19,75 +55,214 @@ logger = logging.getLogger(__name__)
 
 # ============= СОЗДАНИЕ КАРТОЧКИ =============
 
-@router.message(F.text == "📦 Добавить карточку")
-async def start_card_creation(message: Message, state: FSMContext):
-    """Начало создания карточки."""
+async def _save_draft(draft_store: DraftStore | None, telegram_id: int, state: FSMContext) -> None:
+    """Запомнить шаг и введенные поля: после перезапуска диалог можно продолжить."""
+    if draft_store is not None:
+        draft_store.save(telegram_id, await state.get_state(), await state.get_data())
+
+
+async def _cancel_creation(
+        message: Message, state: FSMContext, draft_store: DraftStore | None
+) -> None:
     await state.clear()
+    if draft_store is not None:
+        draft_store.discard(message.from_user.id)
+    await message.answer("❌ Создание карточки отменено.")
+
+
+async def _ask_title(message: Message, state: FSMContext) -> None:
     await message.answer("Введите название товара:")
     await state.set_state(CardCreationStates.waiting_for_title)
 
 
+async def _ask_description(message: Message, state: FSMContext) -> None:
+    await message.answer("Введите описание товара:", reply_markup=get_card_creation_cancel_keyboard())
+    await state.set_state(CardCreationStates.waiting_for_description)
+
+
+async def _ask_price(message: Message, state: FSMContext) -> None:
+    await message.answer("Введите цену товара (только число):", reply_markup=get_card_creation_cancel_keyboard())
+    await state.set_state(CardCreationStates.waiting_for_price)
+
+
+async def _ask_category(message: Message, state: FSMContext, read_session: AsyncSession) -> None:
+    categories = await CategoryService.get_categories(read_session)
+    if not categories:
+        await _ask_photo(message, state)
+        return
+
+    await message.answer(
+        "Выберите категорию товара:", reply_markup=get_category_choice_keyboard(categories)
+    )
+    await state.set_state(CardCreationStates.waiting_for_category)
+
+
+async def _ask_photo(message: Message, state: FSMContext) -> None:
+    await message.answer(
+        "Отправьте фото товара или используйте /skip чтобы пропустить:",
+        reply_markup=get_card_creation_cancel_keyboard()
+    )
+    await state.set_state(CardCreationStates.waiting_for_photo)
+
+
+@router.message(F.text == "📦 Добавить карточку")
+async def start_card_creation(
+        message: Message,
+        state: FSMContext,
+        read_session: AsyncSession,
+        draft_store: DraftStore | None = None,
+):
+    """Начало создания карточки (или предложение продолжить черновик)."""
+    await state.clear()
+    draft = await draft_store.get(read_session, message.from_user.id) if draft_store is not None else None
+    if draft is not None and draft["title"]:
+        price = f"{draft['price']:.2f} руб." if draft["price"] is not None else "не указана"
+        await message.answer(
+            f"📝 У вас есть незаконченная карточка:\n\n"
+            f"📦 Название: {escape(draft['title'])}\n"
+            f"💰 Цена: {price}",
+            reply_markup=get_draft_keyboard(),
+        )
+        return
+    await _ask_title(message, state)
+
+
+@router.callback_query(F.data == "draft_resume")
+async def resume_draft(
+        callback: CallbackQuery,
+        state: FSMContext,
+        read_session: AsyncSession,
+        draft_store: DraftStore | None = None,
+):
+    """Продолжение черновика с шага, на котором он был оставлен."""
+    draft = await draft_store.get(read_session, callback.from_user.id) if draft_store is not None else None
+    await callback.answer()
+    await state.clear()
+    if draft is None:
+        await callback.message.answer("Черновик не найден, начнем заново.")
+        await _ask_title(callback.message, state)
+        return
+
+    await state.set_data({name: draft[name] for name in DRAFT_FIELDS if draft[name] is not None})
+    # Шаг определяется по заполненным полям: сохраненный шаг мог записаться раньше полей
+    if not draft["title"]:
+        await _ask_title(callback.message, state)
+    elif not draft["description"]:
+        await _ask_description(callback.message, state)
+    elif draft["price"] is None:
+        await _ask_price(callback.message, state)
+    elif draft["step"] == CardCreationStates.waiting_for_category.state:
+        await _ask_category(callback.message, state, read_session)
+    else:
+        await _ask_photo(callback.message, state)
+
+
+@router.callback_query(F.data == "draft_new")
+async def discard_draft(
+        callback: CallbackQuery, state: FSMContext, draft_store: DraftStore | None = None
+):
+    """Удаление черновика и создание карточки с начала."""
+    if draft_store is not None:
+        draft_store.discard(callback.from_user.id)
+    await callback.answer()
+    await state.clear()
+    await _ask_title(callback.message, state)
+
+
 @router.message(CardCreationStates.waiting_for_title)
-async def process_title(message: Message, state: FSMContext):
+async def process_title(
+        message: Message, state: FSMContext, draft_store: DraftStore | None = None
+):
     """Обработка названия товара."""
     if message.text == "❌ Отмена":
-        await state.clear()
-        await message.answer("❌ Создание карточки отменено.")
+        await _cancel_creation(message, state, draft_store)
         return
 
-    if len(message.text) > 200:
-        await message.answer("❌ Название слишком длинное (макс. 200 символов)")
+    try:
+        title = CardService.validate_title(message.text or "")
+    except ValueError as exc:
+        await message.answer(f"❌ {exc}")
         return
 
-    await state.update_data(title=message.text)
-    await message.answer("Введите описание товара:", reply_markup=get_card_creation_cancel_keyboard())
-    await state.set_state(CardCreationStates.waiting_for_description)
+    await state.update_data(title=title)
+    await _ask_description(message, state)
+    await _save_draft(draft_store, message.from_user.id, state)
 
 
 @router.message(CardCreationStates.waiting_for_description)
-async def process_description(message: Message, state: FSMContext):
+async def process_description(
+        message: Message, state: FSMContext, draft_store: DraftStore | None = None
+):
     """Обработка описания товара."""
     if message.text == "❌ Отмена":
-        await state.clear()
-        await message.answer("❌ Создание карточки отменено.")
+        await _cancel_creation(message, state, draft_store)
         return
 
-    if len(message.text) > 2000:
-        await message.answer("❌ Описание слишком длинное (макс. 2000 символов)")
+    try:
+        description = CardService.validate_description(message.text or "")
+    except ValueError as exc:
+        await message.answer(f"❌ {exc}")
         return
 
-    await state.update_data(description=message.text)
-    await message.answer("Введите цену товара (только число):", reply_markup=get_card_creation_cancel_keyboard())
-    await state.set_state(CardCreationStates.waiting_for_price)
+    await state.update_data(description=description)
+    await _ask_price(message, state)
+    await _save_draft(draft_store, message.from_user.id, state)
 
 
 @router.message(CardCreationStates.waiting_for_price)
-async def process_price(message: Message, state: FSMContext):
+async def process_price(
+        message: Message,
+        state: FSMContext,
+        read_session: AsyncSession,
+        draft_store: DraftStore | None = None,
+):
     """Обработка цены товара."""
     if message.text == "❌ Отмена":
-        await state.clear()
-        await message.answer("❌ Создание карточки отменено.")
+        await _cancel_creation(message, state, draft_store)
         return
 
     try:
-        price = float(message.text.replace(",", "."))
-        if price <= 0:
-            await message.answer("❌ Цена должна быть положительным числом!")
-            return
-        if price > 1000000:
-            await message.answer("❌ Цена слишком высокая (макс. 1,000,000 руб.)")
-            return
-
-    except ValueError:
-        await message.answer("❌ Пожалуйста, введите корректную цену (число, например: 999.99):")
+        price = CardService.parse_price(message.text or "")
+    except ValueError as exc:
+        await message.answer(f"❌ {exc}")
         return
 
     await state.update_data(price=price)
-    await message.answer(
-        "Отправьте фото товара или используйте /skip чтобы пропустить:",
-        reply_markup=get_card_creation_cancel_keyboard()
-    )
-    await state.set_state(CardCreationStates.waiting_for_photo)
+    await _ask_category(message, state, read_session)
+    await _save_draft(draft_store, message.from_user.id, state)
+
+
+@router.callback_query(CardCreationStates.waiting_for_category, F.data.startswith("newcat_"))
+async def process_category(
+        callback: CallbackQuery,
+        state: FSMContext,
+        read_session: AsyncSession,
+        draft_store: DraftStore | None = None,
+):
+    """Выбор категории товара."""
+    category = await CategoryService.get_category(read_session, int(callback.data.split("_")[1]))
+    if category is None:
+        await callback.answer("Категория не найдена")
+        return
+
+    await state.update_data(category_id=category.id)
+    await callback.answer(category.name)
+    await _ask_photo(callback.message, state)
+    await _save_draft(draft_store, callback.from_user.id, state)
+
+
+@router.message(CardCreationStates.waiting_for_category, F.text == "❌ Отмена")
+async def cancel_during_category(
+        message: Message, state: FSMContext, draft_store: DraftStore | None = None
+):
+    """Отмена создания карточки при выборе категории."""
+    await _cancel_creation(message, state, draft_store)
+
+
+@router.message(CardCreationStates.waiting_for_category, F.text != "❌ Отмена")
+async def handle_other_input_during_category(message: Message):
+    """Подсказка, если вместо выбора категории пришел текст."""
+    await message.answer("📂 Выберите категорию кнопкой выше или нажмите ❌ Отмена")
 
 
 # Обработка ФОТО - первым хендлером должен быть /skip
@@ -97,6 +272,7 @@ async def skip_photo_during_creation(
         state: FSMContext,
         session: AsyncSession,
         user: User | None = None,
+        draft_store: DraftStore | None = None,
 ):
     """Пропуск добавления фото (команда /skip)."""
     data = await state.get_data()
@@ -137,7 +313,11 @@ async def skip_photo_during_creation(
             price=data["price"],
             photo_url=None,
             photo_file_id=None,
+            category_id=data.get("category_id"),
+            draft_telegram_id=message.from_user.id,
         )
+        if draft_store is not None:
+            draft_store.discard(message.from_user.id)
 
         logger.info(f"Создана карточка #{card.id} без фото, пользователь {current_user.telegram_id}")
 
@@ -158,10 +338,11 @@ async def skip_photo_during_creation(
 
 # Обработка КНОПКИ ОТМЕНА в состоянии фото
 @router.message(F.text == "❌ Отмена", CardCreationStates.waiting_for_photo)
-async def cancel_during_photo(message: Message, state: FSMContext):
+async def cancel_during_photo(
+        message: Message, state: FSMContext, draft_store: DraftStore | None = None
+):
     """Отмена создания карточки при ожидании фото."""
-    await state.clear()
-    await message.answer("❌ Создание карточки отменено.")
+    await _cancel_creation(message, state, draft_store)
 
 
 # Обработка ФОТО (когда присылают фото)
@@ -171,6 +352,7 @@ async def process_photo_with_photo(
         state: FSMContext,
         session: AsyncSession,
         user: User | None = None,
+        draft_store: DraftStore | None = None,
 ):
     """Обработка фото товара (когда фото есть)."""
     data = await state.get_data()
@@ -212,7 +394,11 @@ async def process_photo_with_photo(
             price=data["price"],
             photo_url=photo.file_id,
             photo_file_id=photo.file_id,
+            category_id=data.get("category_id"),
+            draft_telegram_id=message.from_user.id,
         )
+        if draft_store is not None:
+            draft_store.discard(message.from_user.id)
 
         logger.info(f"Создана карточка #{card.id} с фото, пользователь {current_user.telegram_id}")
 
@@ -245,76 +431,136 @@ async def handle_other_input_during_photo(message: Message):
 
 # ============= ПРОСМОТР КАРТОЧЕК =============
 
-@router.message(F.text == "👀 Посмотреть карточки")
-async def show_cards(message: Message, session: AsyncSession):
-    """Показ карточек товаров."""
-    cards = await CardService.get_approved_cards(session=session, limit=100)
-    if not cards:
-        await message.answer("📭 Пока нет доступных карточек товаров.")
-        return
-
-    card = cards[0]
-    caption = (
-        f"📦 {card.title}\n\n"
-        f"{card.description}\n\n"
+def _format_caption(card: CardView) -> str:
+    # Подпись уходит с parse_mode HTML, в том числе в инлайн-результатах
+    return (
+        f"📦 {escape(card.title)}\n\n"
+        f"{escape(card.description)}\n\n"
         f"💰 Цена: {card.price} руб.\n"
-        f"👤 Продавец: @{card.user.username if card.user and card.user.username else 'Не указан'}"
+        f"👤 Продавец: @{escape(card.seller_username or 'Не указан')}"
     )
 
-    if card.photo_url:
-        await message.answer_photo(
-            photo=card.photo_url,
-            caption=caption,
-            reply_markup=get_cards_keyboard(0, len(cards), card.id),
-        )
-    else:
+
+def _format_card_list(header: str, cards: list[CardView]) -> str:
+    lines = [header]
+    for card in cards:
+        seller = f" · @{escape(card.seller_username)}" if card.seller_username else ""
+        lines.append(f"📦 {escape(card.title)} — {card.price} руб.{seller}")
+    return "\n".join(lines)
+
+
+async def _send_catalog(
+        message: Message,
+        read_session: AsyncSession,
+        category_id: int = 0,
+        sort: str = "new",
+        view_counter: ViewCounter | None = None,
+) -> None:
+    if sort not in CATALOG_SORTS:
+        sort = "new"
+    step = await CardService.catalog_step(read_session, category_id or None, sort)
+    if step is None:
         await message.answer(
-            caption,
-            reply_markup=get_cards_keyboard(0, len(cards), card.id)
+            "📭 Пока нет доступных карточек товаров."
+            if not category_id
+            else "📭 В этой категории пока нет карточек.",
+            reply_markup=get_cards_filter_keyboard(sort) if category_id else None,
         )
+        return
 
+    card = step.item
+    caption = _format_caption(card)
+    if view_counter is not None:
+        view_counter.record(card.id)
 
-@router.callback_query(F.data.startswith("card_"))
-async def handle_card_navigation(callback: CallbackQuery, session: AsyncSession):
-    """Обработка навигации по карточкам."""
-    try:
-        _, action, index_str = callback.data.split("_")
-        current_index = int(index_str)
+    markup = get_cards_keyboard(card.id, step.key, False, step.has_more, category_id, sort)
+    photo = photo_cache.photo_for(card)
+    if photo:
+        sent = await message.answer_photo(photo=photo, caption=caption, reply_markup=markup)
+    else:
+        sent = await message.answer(caption, reply_markup=markup)
+    remember_message(sent, caption, photo, markup)
 
-        cards = await CardService.get_approved_cards(session=session, limit=100)
 
-        if not cards:
-            await callback.answer("Нет доступных карточек")
-            return
+@router.message(F.text == "👀 Посмотреть карточки")
+async def show_cards(
+        message: Message, read_session: AsyncSession, view_counter: ViewCounter | None = None
+):
+    """Показ карточек товаров."""
+    await _send_catalog(message, read_session, view_counter=view_counter)
+
+
+@router.message(F.text == "🔥 Популярное")
+async def show_popular(
+        message: Message, read_session: AsyncSession, view_counter: ViewCounter | None = None
+):
+    """Лента популярных карточек (по затухающему числу просмотров)."""
+    await _send_catalog(message, read_session, sort="top", view_counter=view_counter)
 
-        # Определяем новый индекс
-        if action == "prev":
-            new_index = current_index - 1 if current_index > 0 else len(cards) - 1
-        elif action == "next":
-            new_index = current_index + 1 if current_index < len(cards) - 1 else 0
-        else:
-            await callback.answer()
-            return
 
-        card = cards[new_index]
-        caption = (
-            f"📦 {card.title}\n\n"
-            f"{card.description}\n\n"
-            f"💰 Цена: {card.price} руб.\n"
-            f"👤 Продавец: @{card.user.username if card.user and card.user.username else 'Не указан'}"
+@router.callback_query(CatalogCategories.filter())
+async def choose_catalog_category(
+        callback: CallbackQuery, callback_data: CatalogCategories, read_session: AsyncSession
+):
+    """Список категорий со счетчиками карточек."""
+    categories = await CategoryService.get_categories(read_session)
+    await callback.message.answer(
+        "📂 Выберите категорию:",
+        reply_markup=get_catalog_categories_keyboard(categories, callback_data.sort),
+    )
+    await callback.answer()
+
+
+@router.callback_query(CatalogFilter.filter())
+async def show_catalog(
+        callback: CallbackQuery,
+        callback_data: CatalogFilter,
+        read_session: AsyncSession,
+        view_counter: ViewCounter | None = None,
+):
+    """Каталог с фильтром по категории и сортировкой."""
+    await _send_catalog(
+        callback.message, read_session, callback_data.category_id, callback_data.sort, view_counter
+    )
+    await callback.answer()
+
+
+@router.callback_query(CatalogNav.filter())
+async def handle_card_navigation(
+        callback: CallbackQuery,
+        callback_data: CatalogNav,
+        read_session: AsyncSession,
+        view_counter: ViewCounter | None = None,
+):
+    """Обработка навигации по карточкам: соседняя карточка по курсору из кнопки."""
+    try:
+        forward = callback_data.action == "next"
+        step = await CardService.catalog_step(
+            read_session,
+            callback_data.category_id or None,
+            callback_data.sort,
+            cursor=(callback_data.key, callback_data.card_id),
+            forward=forward,
         )
+        if step is None:
+            await callback.answer("Это последняя карточка" if forward else "Это первая карточка")
+            return
 
-        if card.photo_url:
-            media = InputMediaPhoto(media=card.photo_url, caption=caption)
-            await callback.message.edit_media(
-                media=media,
-                reply_markup=get_cards_keyboard(new_index, len(cards), card.id)
-            )
+        card = step.item
+        caption = _format_caption(card)
+        if view_counter is not None:
+            view_counter.record(card.id)
+
+        has_prev, has_next = (True, step.has_more) if forward else (step.has_more, True)
+        markup = get_cards_keyboard(
+            card.id, step.key, has_prev, has_next, callback_data.category_id, callback_data.sort
+        )
+        photo = photo_cache.photo_for(card)
+        if photo:
+            media = InputMediaPhoto(media=photo, caption=caption)
+            await edit_message(callback.message, media=media, reply_markup=markup)
         else:
-            await callback.message.edit_caption(
-                caption=caption,
-                reply_markup=get_cards_keyboard(new_index, len(cards), card.id),
-            )
+            await edit_message(callback.message, caption=caption, reply_markup=markup)
 
         await callback.answer()
 
@@ -323,6 +569,207 @@ async def handle_card_navigation(callback: CallbackQuery, session: AsyncSession)
         await callback.answer("❌ Произошла ошибка")
 
 
+@router.callback_query(SimilarCards.filter())
+async def show_similar(
+        callback: CallbackQuery,
+        callback_data: SimilarCards,
+        read_session: AsyncSession,
+        recommender: Recommender | None = None,
+):
+    """Похожие карточки по содержанию."""
+    if recommender is None:
+        await callback.answer("Рекомендации недоступны")
+        return
+    similar = recommender.similar(callback_data.card_id)
+    cards = await CardService.get_card_views_by_ids(read_session, similar)
+    if not cards:
+        await callback.answer("Похожих карточек не нашлось")
+        return
+    await callback.message.answer(
+        _format_card_list("🧩 Похожие товары:\n", cards),
+        reply_markup=get_search_keyboard(cards, None),
+    )
+    await callback.answer()
+
+
+# ============= АЛЬБОМ =============
+
+# Больше 10 фото Telegram в одну медиагруппу не принимает
+ALBUM_PAGE_SIZE = 10
+
+
+def _album_item(number: int, card: CardView) -> str:
+    return f"{number}. {escape(card.title)} — {card.price} руб."
+
+
+async def _send_album_page(
+        message: Message,
+        read_session: AsyncSession,
+        category_id: int = 0,
+        cursor: int | None = None,
+        view_counter: ViewCounter | None = None,
+) -> None:
+    """Страница из карточек: фото одной медиагруппой, остальные - нумерованным списком.
+
+    Вместо сообщения и нажатия на каждую карточку - два запроса к Bot API на страницу.
+    """
+    cards, next_cursor = await CardService.get_album_page(
+        read_session, cursor=cursor, limit=ALBUM_PAGE_SIZE, category_id=category_id or None
+    )
+    if not cards:
+        await message.answer("📭 Пока нет доступных карточек." if cursor is None else "Больше карточек нет.")
+        return
+
+    photos = [
+        InputMediaPhoto(media=photo_cache.photo_for(card), caption=_album_item(number, card))
+        for number, card in enumerate(cards, 1)
+        if card.photo_url or card.photo_file_id
+    ]
+    if len(photos) > 1:
+        await message.answer_media_group(photos)
+    elif photos:
+        await message.answer_photo(photo=photos[0].media, caption=photos[0].caption)
+
+    lines = ["🖼 Выберите товар по номеру:"]
+    for number, card in enumerate(cards, 1):
+        if not (card.photo_url or card.photo_file_id):
+            seller = f" · @{escape(card.seller_username)}" if card.seller_username else ""
+            lines.append(f"📦 {_album_item(number, card)}{seller}")
+    await message.answer(
+        "\n".join(lines), reply_markup=get_album_keyboard(cards, category_id, next_cursor)
+    )
+
+    if view_counter is not None:
+        for card in cards:
+            view_counter.record(card.id)
+
+
+@router.callback_query(AlbumPage.filter())
+async def show_album(
+        callback: CallbackQuery,
+        callback_data: AlbumPage,
+        read_session: AsyncSession,
+        view_counter: ViewCounter | None = None,
+):
+    """Страница альбома карточек."""
+    await _send_album_page(
+        callback.message,
+        read_session,
+        callback_data.category_id,
+        callback_data.cursor or None,
+        view_counter,
+    )
+    await callback.answer()
+
+
+# ============= ПОИСК =============
+
+SEARCH_USAGE = "Использование: /search <запрос>, например: /search синий свитер"
+SEARCH_PAGE_SIZE = 10
+
+
+async def _send_search_page(
+        message: Message, read_session: AsyncSession, query: str, cursor: int | None = None
+) -> None:
+    cards, next_cursor = await CardService.search(
+        read_session, query, cursor=cursor, limit=SEARCH_PAGE_SIZE
+    )
+    if not cards:
+        await message.answer("Ничего не найдено." if cursor is None else "Больше результатов нет.")
+        return
+    await message.answer(
+        _format_card_list("🔎 Найдено:\n", cards),
+        reply_markup=get_search_keyboard(cards, next_cursor, query),
+    )
+
+
+@router.message(Command("search"))
+async def search_cards(
+        message: Message, command: CommandObject, state: FSMContext, read_session: AsyncSession
+):
+    """Полнотекстовый поиск по одобренным карточкам."""
+    if not command.args:
+        await message.answer(SEARCH_USAGE)
+        return
+    # Запрос не помещается в callback_data (64 байта), храним его в данных FSM
+    await state.update_data(search_query=command.args)
+    await _send_search_page(message, read_session, command.args)
+
+
+@router.callback_query(SearchPage.filter())
+async def search_more(
+        callback: CallbackQuery,
+        callback_data: SearchPage,
+        state: FSMContext,
+        read_session: AsyncSession,
+):
+    """Следующая страница результатов поиска."""
+    query = (await state.get_data()).get("search_query")
+    if not query or search_token(query) != callback_data.token:
+        # Кнопка от предыдущего запроса: курсор к текущему не относится
+        await callback.answer("Поиск устарел, повторите /search")
+        return
+    await _send_search_page(callback.message, read_session, query, callback_data.cursor)
+    await callback.answer()
+
+
+# Регистрируется после всех типизированных кнопок: сюда попадают только кнопки
+# старого формата и с поврежденными данными, без запросов к БД
+@router.callback_query(F.data.startswith((
+    "cn:", "cc:", "cf:", "sim:", "alb:", "srch:",
+    "card_", "catalog_", "similar_", "album_", "search_more_",
+)))
+async def handle_stale_card_button(callback: CallbackQuery):
+    await callback.answer("Кнопка устарела, откройте каталог заново")
+
+
+# ============= ИНЛАЙН-РЕЖИМ =============
+
+def _inline_result(card: CardView):
+    caption = _format_caption(card)
+    if card.photo_file_id:
+        return InlineQueryResultCachedPhoto(
+            id=str(card.id), photo_file_id=card.photo_file_id, caption=caption
+        )
+    return InlineQueryResultArticle(
+        id=str(card.id),
+        title=card.title,
+        description=f"{card.price} руб.",
+        input_message_content=InputTextMessageContent(message_text=caption),
+    )
+
+
+async def _inline_cards(read_session: AsyncSession, query: str, config: Config) -> list[CardView]:
+    cards = inline_cache.get(query)
+    if cards is not None:
+        return cards
+
+    limit = config.inline_result_limit
+    # Запрос без слов (например, "!!!") - тот же каталог, что и пустой
+    if search_terms(query):
+        cards, next_cursor = await CardService.search(read_session, query, limit=limit)
+        complete = next_cursor is None
+    else:
+        cards = await CardService.get_approved_card_views(read_session, limit=limit)
+        complete = len(cards) < limit
+    inline_cache.put(query, cards, complete, ttl=config.inline_results_ttl)
+    return cards
+
+
+@router.inline_query()
+async def inline_catalog(inline_query: InlineQuery, read_session: AsyncSession, config: Config):
+    """@bot запрос: карточки из каталога для отправки в любой чат."""
+    cards = await _inline_cards(read_session, inline_query.query, config)
+    offset = int(inline_query.offset) if inline_query.offset.isdigit() else 0
+    end = offset + config.inline_page_size
+    await inline_query.answer(
+        [_inline_result(card) for card in cards[offset:end]],
+        cache_time=config.inline_cache_time,
+        is_personal=False,
+        next_offset=str(end) if end < len(cards) else "",
+    )
+
+
 # ============= ОТМЕНА ДЛЯ ДРУГИХ СОСТОЯНИЙ =============
 
 @router.message(F.text == "❌ Отмена")
@@ -1,23 +1,21 @@
 from aiogram import F, Router
 from aiogram.filters import Command
 from aiogram.types import Message
-from sqlalchemy import select
-from src.database.models import User
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.models import User
+from src.database.queries import USER_BY_TELEGRAM_ID
 from src.keyboards.common_keyboards import get_main_keyboard
 
 router = Router()
 
 
 @router.message(Command("start"))
-async def cmd_start(message: Message, session: AsyncSession, user: User | None = None):
+async def cmd_start(message: Message, read_session: AsyncSession, user: User | None = None):
     """Обработка команды /start"""
     current_user = user
     if current_user is None:
-        stmt = select(User).where(User.telegram_id == message.from_user.id)
-        result = await session.execute(stmt)
+        result = await read_session.execute(USER_BY_TELEGRAM_ID, {"telegram_id": message.from_user.id})
         current_user = result.scalar_one_or_none()
 
     welcome_text = (
@@ -42,7 +40,9 @@ async def cmd_help(message: Message):
         "📚 Помощь по боту:\n\n"
         "📦 <b>Добавить карточку</b> - создать карточку товара\n"
         "👀 <b>Посмотреть карточки</b> - просмотр товаров\n"
-        "💰 <b>Баланс</b> - проверка баланса и вывод средств\n\n"
+        "💰 <b>Баланс</b> - проверка баланса и вывод средств\n"
+        "🔎 <b>/search</b> запрос - поиск по карточкам\n"
+        "📥 <b>/import</b> - загрузить карточки из CSV или JSON\n\n"
         "Администраторы также имеют доступ к админ-панели."
     )
 
@@ -50,11 +50,10 @@ async def cmd_help(message: Message):
 
 
 @router.message(F.text == "🔙 Назад")
-async def back_to_main(message: Message, session: AsyncSession):
+async def back_to_main(message: Message, read_session: AsyncSession):
     """Возврат в главное меню"""
     # Получаем пользователя из БД
-    stmt = select(User).where(User.telegram_id == message.from_user.id)
-    result = await session.execute(stmt)
+    result = await read_session.execute(USER_BY_TELEGRAM_ID, {"telegram_id": message.from_user.id})
     user = result.scalar_one_or_none()
 
     if not user:
@@ -0,0 +1,130 @@
+import logging
+import tempfile
+from html import escape
+from typing import Optional
+
+from aiogram import F, Router
+from aiogram.filters import Command
+from aiogram.fsm.context import FSMContext
+from aiogram.types import Message
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import Config
+from src.database.models import User
+from src.services.card_import import CardImportService, ImportReport, iter_csv_rows, iter_json_rows
+from src.services.category_service import CategoryService
+from src.services.outbox_dispatcher import OutboxDispatcher
+from src.services.user_service import UserService
+from src.utils.states import CardImportStates
+
+router = Router()
+logger = logging.getLogger(__name__)
+
+# Файл больше этого размера скачивается во временный файл на диске, а не в память
+SPOOL_MAX_SIZE = 1024 * 1024
+
+IMPORT_HELP = (
+    "📥 <b>Импорт карточек</b>\n\n"
+    "Отправьте файл .csv или .json.\n"
+    "CSV: первая строка - заголовки <code>title;description;price;category;photo_url</code> "
+    "(можно по-русски: название, описание, цена, категория, фото), разделитель - "
+    "запятая, точка с запятой или табуляция.\n"
+    "JSON: массив объектов с теми же ключами или по объекту на строку.\n\n"
+    "Все карточки уйдут на модерацию. /cancel - отмена."
+)
+
+
+def _format_report(report: ImportReport) -> str:
+    lines = [f"📥 Импорт завершен: создано {report.created}, с ошибками {report.failed}."]
+    if report.created:
+        lines.append("Карточки отправлены на модерацию.")
+    if report.truncated:
+        lines.append("⚠️ Достигнут лимит строк, остаток файла не обработан.")
+    if report.fatal:
+        lines.append(f"⚠️ Чтение остановлено: {escape(report.fatal)}")
+    if report.errors:
+        lines.append("")
+        lines.extend(escape(error) for error in report.errors)
+        if report.failed > len(report.errors):
+            lines.append(f"... и еще {report.failed - len(report.errors)}")
+    return "\n".join(lines)
+
+
+@router.message(Command("import"))
+async def start_import(message: Message, state: FSMContext):
+    """Начало импорта карточек из файла."""
+    await state.clear()
+    await state.set_state(CardImportStates.waiting_for_file)
+    await message.answer(IMPORT_HELP)
+
+
+@router.message(CardImportStates.waiting_for_file, F.document)
+async def process_import_file(
+        message: Message,
+        state: FSMContext,
+        session: AsyncSession,
+        config: Config,
+        user: User | None = None,
+        outbox: Optional[OutboxDispatcher] = None,
+):
+    """Скачивание файла и импорт карточек."""
+    document = message.document
+    name = (document.file_name or "").lower()
+    if name.endswith(".csv"):
+        parse_rows = iter_csv_rows
+    elif name.endswith((".json", ".jsonl")):
+        parse_rows = iter_json_rows
+    else:
+        await message.answer("❌ Поддерживаются файлы .csv, .json и .jsonl")
+        return
+    if document.file_size and document.file_size > config.import_max_file_size:
+        await message.answer(
+            f"❌ Файл слишком большой (макс. {config.import_max_file_size // 1024} КБ)"
+        )
+        return
+
+    await state.clear()
+    current_user = user
+    if current_user is None:
+        current_user = await UserService.get_or_create(
+            session=session,
+            telegram_id=message.from_user.id,
+            username=message.from_user.username,
+            first_name=message.from_user.first_name,
+            last_name=message.from_user.last_name,
+        )
+
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as buffer:
+        await message.bot.download(document, destination=buffer)
+        categories = await CategoryService.get_categories(session)
+        try:
+            report = await CardImportService.import_cards(
+                session,
+                current_user.id,
+                parse_rows(buffer),
+                categories=categories,
+                batch_size=config.import_batch_size,
+                max_rows=config.import_max_rows,
+                admin_ids=config.admin_ids_list,
+            )
+        except Exception as e:
+            logger.error(f"Ошибка импорта карточек: {e}", exc_info=True)
+            await message.answer("❌ Не удалось импортировать файл. Попробуйте позже.")
+            return
+
+    if report.created and outbox is not None:
+        outbox.notify()
+    await message.answer(_format_report(report))
+
+
+@router.message(CardImportStates.waiting_for_file, Command("cancel"))
+@router.message(CardImportStates.waiting_for_file, F.text == "❌ Отмена")
+async def cancel_import(message: Message, state: FSMContext):
+    await state.clear()
+    await message.answer("❌ Импорт отменен.")
+
+
+@router.message(CardImportStates.waiting_for_file)
+async def handle_other_input_during_import(message: Message):
+    """Подсказка, если вместо файла пришло что-то другое."""
+    await message.answer("📎 Отправьте файл .csv или .json документом или /cancel для отмены")
@@ -8,6 +8,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.config import Config
 from src.database.models import Card, User
+from src.database.queries import APPROVED_CARD_BY_ID
+from src.services.outbox_dispatcher import OutboxDispatcher
 from src.services.payment_service import PaymentService
 
 router = Router()
@@ -15,8 +17,7 @@ logger = logging.getLogger(__name__)
 
 
 async def _get_card(session: AsyncSession, card_id: int) -> Optional[Card]:
-    stmt = select(Card).where(Card.id == card_id, Card.is_approved.is_(True))
-    result = await session.execute(stmt)
+    result = await session.execute(APPROVED_CARD_BY_ID, {"card_id": card_id})
     return result.scalar_one_or_none()
 
 
@@ -77,11 +78,15 @@ async def pre_checkout_handler(pre_checkout_query: PreCheckoutQuery):
 
 
 @router.message(F.content_type == "successful_payment")
-async def successful_payment(message: Message, session: AsyncSession):
+async def successful_payment(
+    message: Message, session: AsyncSession, outbox: Optional[OutboxDispatcher] = None
+):
     """Отмечаем покупку оплаченной и обновляем баланс продавца."""
     payload = message.successful_payment.invoice_payload
     is_processed = await PaymentService.process_payment(session, payload)
     if is_processed:
+        if outbox is not None:
+            outbox.notify()
         await message.answer("Спасибо за покупку! Продавец уже получил оплату.")
         logger.info("Payment processed for invoice %s", payload)
     else:
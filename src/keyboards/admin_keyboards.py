@@ -1,6 +1,10 @@
+from datetime import datetime
+
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, ReplyKeyboardMarkup, KeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder, ReplyKeyboardBuilder
 
+from src.keyboards.callbacks import ModerationAction, WithdrawalAction
+
 
 def get_admin_keyboard() -> ReplyKeyboardMarkup:
     builder = ReplyKeyboardBuilder()
@@ -12,15 +16,18 @@ def get_admin_keyboard() -> ReplyKeyboardMarkup:
     return builder.as_markup(resize_keyboard=True)
 
 
-def get_moderation_keyboard(current_index: int, total_count: int, card_id: int) -> InlineKeyboardMarkup:
+def get_moderation_keyboard(card_id: int, created_at: datetime, has_prev: bool, has_next: bool) -> InlineKeyboardMarkup:
+    def action(name: str) -> str:
+        return ModerationAction(action=name, card_id=card_id, created_at=created_at).pack()
+
     builder = InlineKeyboardBuilder()
-    if current_index > 0:
-        builder.add(InlineKeyboardButton(text="«", callback_data=f"mod_prev_{current_index}_{card_id}"))
-    builder.add(InlineKeyboardButton(text="✅ Одобрить", callback_data=f"mod_approve_{current_index}_{card_id}"))
-    builder.add(InlineKeyboardButton(text="❌ Отклонить", callback_data=f"mod_reject_{current_index}_{card_id}"))
-    builder.add(InlineKeyboardButton(text="✏️ Изменить", callback_data=f"mod_edit_{current_index}_{card_id}"))
-    if current_index < total_count - 1:
-        builder.add(InlineKeyboardButton(text="»", callback_data=f"mod_next_{current_index}_{card_id}"))
+    if has_prev:
+        builder.add(InlineKeyboardButton(text="«", callback_data=action("prev")))
+    builder.add(InlineKeyboardButton(text="✅ Одобрить", callback_data=action("approve")))
+    builder.add(InlineKeyboardButton(text="❌ Отклонить", callback_data=action("reject")))
+    builder.add(InlineKeyboardButton(text="✏️ Изменить", callback_data=action("edit")))
+    if has_next:
+        builder.add(InlineKeyboardButton(text="»", callback_data=action("next")))
     builder.adjust(2)
     return builder.as_markup()
 
@@ -35,13 +42,16 @@ def get_edit_attributes_keyboard(card_id: int) -> ReplyKeyboardMarkup:
     return builder.as_markup(resize_keyboard=True, one_time_keyboard=True)
 
 
-def get_withdrawal_requests_keyboard(current_index: int, total_count: int, request_id: int) -> InlineKeyboardMarkup:
+def get_withdrawal_requests_keyboard(request_id: int, created_at: datetime, has_prev: bool, has_next: bool) -> InlineKeyboardMarkup:
+    def action(name: str) -> str:
+        return WithdrawalAction(action=name, request_id=request_id, created_at=created_at).pack()
+
     builder = InlineKeyboardBuilder()
-    if current_index > 0:
-        builder.add(InlineKeyboardButton(text="«", callback_data=f"withdraw_prev_{current_index}_{request_id}"))
-    builder.add(InlineKeyboardButton(text="💸 Выплата проведена", callback_data=f"withdraw_process_{current_index}_{request_id}"))
-    if current_index < total_count - 1:
-        builder.add(InlineKeyboardButton(text="»", callback_data=f"withdraw_next_{current_index}_{request_id}"))
+    if has_prev:
+        builder.add(InlineKeyboardButton(text="«", callback_data=action("prev")))
+    builder.add(InlineKeyboardButton(text="💸 Выплата проведена", callback_data=action("process")))
+    if has_next:
+        builder.add(InlineKeyboardButton(text="»", callback_data=action("next")))
     builder.adjust(1)
     return builder.as_markup()
 
@@ -0,0 +1,165 @@
+"""Типизированные callback_data кнопок навигации.
+
+Кнопки «вперед/назад» несут курсор текущей записи (id и ключ сортировки),
+фильтр и сортировку. В обычном формате aiogram ("prefix:поле:поле") дата и
+число с плавающей точкой не помещаются в 64 байта, поэтому поля
+упаковываются struct и кодируются base64: "cn:<base64>".
+"""
+import base64
+import binascii
+import struct
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, ClassVar, Literal
+
+from aiogram.filters.callback_data import MAX_CALLBACK_LENGTH, CallbackData
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def _to_struct(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return (value - EPOCH) // MICROSECOND
+    if isinstance(value, str):
+        return value.encode()
+    return value
+
+
+def _from_struct(annotation: Any, value: Any) -> Any:
+    if annotation is datetime:
+        return EPOCH + value * MICROSECOND
+    if isinstance(value, bytes):
+        return value.decode()
+    return value
+
+
+class PackedCallbackData(CallbackData, prefix="packed"):
+    """CallbackData в двоичном виде.
+
+    Формат полей задается при объявлении: layout - формат struct без
+    порядка байт (datetime - "q", микросекунды; строки - "Np"), version -
+    первый байт данных. После изменения layout нужно поднять version: старые
+    кнопки перестанут распаковываться, и фильтр отвергнет их без запроса к БД.
+    """
+
+    __layout__: ClassVar[struct.Struct]
+    __version__: ClassVar[int]
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        layout = kwargs.pop("layout")
+        version = kwargs.pop("version", 1)
+        super().__init_subclass__(**kwargs)
+        cls.__layout__ = struct.Struct("!B" + layout)
+        cls.__version__ = version
+
+    def pack(self) -> str:
+        values = [_to_struct(getattr(self, name)) for name in type(self).model_fields]
+        try:
+            raw = self.__layout__.pack(self.__version__, *values)
+        except struct.error as exc:
+            raise ValueError(f"Не удалось упаковать {self!r}: {exc}") from exc
+        payload = base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+        callback_data = f"{self.__prefix__}{self.__separator__}{payload}"
+        if len(callback_data) > MAX_CALLBACK_LENGTH:
+            raise ValueError(f"callback_data длиннее {MAX_CALLBACK_LENGTH} байт: {callback_data!r}")
+        return callback_data
+
+    @classmethod
+    def unpack(cls, value: str) -> "PackedCallbackData":
+        prefix, _, payload = value.partition(cls.__separator__)
+        if prefix != cls.__prefix__:
+            raise ValueError(f"Чужой префикс {prefix!r}")
+        try:
+            raw = base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+            version, *values = cls.__layout__.unpack(raw)
+        except (binascii.Error, struct.error) as exc:
+            raise ValueError(f"Поврежденные callback_data {value!r}") from exc
+        if version != cls.__version__:
+            raise ValueError(f"Устаревшая версия callback_data: {version}")
+        return cls(**{
+            name: _from_struct(field.annotation, item)
+            for (name, field), item in zip(cls.model_fields.items(), values)
+        })
+
+
+CatalogSort = Literal["new", "asc", "desc", "top"]
+
+
+class CatalogNav(PackedCallbackData, prefix="cn", layout="5pIqdH5p"):
+    """Соседняя карточка каталога: курсор (ключ, id), фильтр и сортировка."""
+
+    action: Literal["prev", "next"]
+    card_id: int
+    created_at: datetime = EPOCH  # ключ сортировки new
+    value: float = 0.0  # ключ сортировок по цене и популярности
+    category_id: int = 0  # 0 - все категории
+    sort: CatalogSort = "new"
+
+    @classmethod
+    def at(cls, action: str, card_id: int, key: Any, category_id: int, sort: str) -> "CatalogNav":
+        if sort == "new":
+            return cls(action=action, card_id=card_id, created_at=key, category_id=category_id, sort=sort)
+        return cls(action=action, card_id=card_id, value=key, category_id=category_id, sort=sort)
+
+    @property
+    def key(self) -> Any:
+        return self.created_at if self.sort == "new" else self.value
+
+
+class ModerationAction(PackedCallbackData, prefix="mod", layout="8pIq"):
+    """Действие с карточкой на модерации; created_at - курсор навигации."""
+
+    action: Literal["prev", "next", "approve", "reject", "edit"]
+    card_id: int
+    created_at: datetime
+
+
+class WithdrawalAction(PackedCallbackData, prefix="wd", layout="8pIq"):
+    """Действие с заявкой на вывод; created_at - курсор навигации."""
+
+    action: Literal["prev", "next", "process"]
+    request_id: int
+    created_at: datetime
+
+
+# Кнопки с несколькими целыми полями помещаются в обычный формат aiogram;
+# поврежденные данные не проходят валидацию, и фильтр их отвергает
+
+
+class CatalogCategories(CallbackData, prefix="cc"):
+    """Выбор категории каталога с сохранением сортировки."""
+
+    sort: CatalogSort = "new"
+
+
+class CatalogFilter(CallbackData, prefix="cf"):
+    """Первая страница каталога с фильтром и сортировкой."""
+
+    category_id: int = 0  # 0 - все категории
+    sort: CatalogSort = "new"
+
+
+class SimilarCards(CallbackData, prefix="sim"):
+    card_id: int
+
+
+class AlbumPage(CallbackData, prefix="alb"):
+    category_id: int = 0
+    cursor: int = 0  # id последней показанной карточки; 0 - первая страница
+
+
+def search_token(query: str) -> str:
+    """Короткий отпечаток поискового запроса для кнопки «Ещё»."""
+    return format(zlib.crc32(query.encode()), "08x")
+
+
+class SearchPage(CallbackData, prefix="srch"):
+    """Следующая страница поиска.
+
+    Сам запрос хранится в данных FSM; token - его отпечаток, по которому
+    кнопка от предыдущего /search не применится к новому запросу.
+    """
+
+    cursor: int
+    token: str
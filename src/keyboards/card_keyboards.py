@@ -1,39 +1,120 @@
+from typing import Any, Optional, Sequence
+
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
 from aiogram.utils.keyboard import ReplyKeyboardBuilder
 
+from src.keyboards.callbacks import (
+    AlbumPage,
+    CatalogCategories,
+    CatalogFilter,
+    CatalogNav,
+    SearchPage,
+    SimilarCards,
+    search_token,
+)
+
+
+SORT_LABELS = {
+    "new": "🆕 Сначала новые",
+    "asc": "⬆️ Сначала дешевые",
+    "desc": "⬇️ Сначала дорогие",
+    "top": "🔥 Популярное",
+}
+# Кнопка сортировки переключает варианты по кругу
+NEXT_SORT = {"new": "asc", "asc": "desc", "desc": "top", "top": "new"}
+
 
 def get_cards_keyboard(
-        current_index: int,
-        total_count: int,
-        card_id: int
+        card_id: int,
+        key: Any,
+        has_prev: bool,
+        has_next: bool,
+        category_id: int = 0,
+        sort: str = "new",
 ) -> InlineKeyboardMarkup:
-    """Клавиатура для навигации по карточкам"""
+    """Клавиатура для навигации по карточкам (category_id=0 - все категории)
+
+    key - значение ключа сортировки карточки, курсор для соседних карточек.
+    """
     builder = InlineKeyboardBuilder()
+    navigation = []
 
-    if current_index > 0:
-        builder.add(InlineKeyboardButton(
+    if has_prev:
+        navigation.append(InlineKeyboardButton(
             text="« Назад",
-            callback_data=f"card_prev_{current_index}"
+            callback_data=CatalogNav.at("prev", card_id, key, category_id, sort).pack()
         ))
 
-    builder.add(InlineKeyboardButton(
+    navigation.append(InlineKeyboardButton(
         text=f"🛒 Купить",
         callback_data=f"buy_{card_id}"
     ))
 
-    if current_index < total_count - 1:
-        builder.add(InlineKeyboardButton(
+    if has_next:
+        navigation.append(InlineKeyboardButton(
             text="Вперед »",
-            callback_data=f"card_next_{current_index}"
+            callback_data=CatalogNav.at("next", card_id, key, category_id, sort).pack()
         ))
 
+    builder.row(*navigation)
+    builder.row(
+        InlineKeyboardButton(text="🧩 Похожие", callback_data=SimilarCards(card_id=card_id).pack()),
+        InlineKeyboardButton(text="🖼 Альбом", callback_data=AlbumPage(category_id=category_id).pack()),
+    )
+    builder.row(
+        InlineKeyboardButton(text="📂 Категории", callback_data=CatalogCategories(sort=sort).pack()),
+        InlineKeyboardButton(
+            text=SORT_LABELS[NEXT_SORT[sort]],
+            callback_data=CatalogFilter(category_id=category_id, sort=NEXT_SORT[sort]).pack()
+        ),
+    )
+    return builder.as_markup()
+
+
+def get_cards_filter_keyboard(sort: str) -> InlineKeyboardMarkup:
+    """Переход к выбору категории, когда в выбранной ничего нет"""
+    builder = InlineKeyboardBuilder()
+    builder.add(InlineKeyboardButton(text="📂 Категории", callback_data=CatalogCategories(sort=sort).pack()))
+    return builder.as_markup()
+
+
+def get_catalog_categories_keyboard(categories: Sequence, sort: str) -> InlineKeyboardMarkup:
+    """Выбор категории для просмотра, со счетчиками карточек"""
+    builder = InlineKeyboardBuilder()
+    builder.add(InlineKeyboardButton(text="Все категории", callback_data=CatalogFilter(sort=sort).pack()))
+    for category in categories:
+        builder.add(InlineKeyboardButton(
+            text=f"{category.name} ({category.approved_count})",
+            callback_data=CatalogFilter(category_id=category.id, sort=sort).pack()
+        ))
+    builder.adjust(1)
+    return builder.as_markup()
+
+
+def get_category_choice_keyboard(categories: Sequence) -> InlineKeyboardMarkup:
+    """Выбор категории при создании карточки"""
+    builder = InlineKeyboardBuilder()
+    for category in categories:
+        builder.add(InlineKeyboardButton(
+            text=category.name,
+            callback_data=f"newcat_{category.id}"
+        ))
     builder.adjust(2)
     return builder.as_markup()
 
 
+def get_draft_keyboard() -> InlineKeyboardMarkup:
+    """Продолжить незаконченный черновик или начать заново"""
+    builder = InlineKeyboardBuilder()
+    builder.add(InlineKeyboardButton(text="▶️ Продолжить черновик", callback_data="draft_resume"))
+    builder.add(InlineKeyboardButton(text="🆕 Начать заново", callback_data="draft_new"))
+    builder.adjust(1)
+    return builder.as_markup()
+
+
 def get_buy_confirmation_keyboard(card_id: int) -> InlineKeyboardMarkup:
     """Подтверждение покупки"""
     builder = InlineKeyboardBuilder()
@@ -47,6 +128,44 @@ def get_buy_confirmation_keyboard(card_id: int) -> InlineKeyboardMarkup:
     ))
     return builder.as_markup()
 
+def get_search_keyboard(
+        cards: Sequence, next_cursor: Optional[int], query: str = ""
+) -> InlineKeyboardMarkup:
+    """Кнопки покупки найденных карточек и переход к следующей странице"""
+    builder = InlineKeyboardBuilder()
+    for card in cards:
+        builder.add(InlineKeyboardButton(
+            text=f"🛒 {card.title[:40]}",
+            callback_data=f"buy_{card.id}"
+        ))
+    if next_cursor is not None:
+        builder.add(InlineKeyboardButton(
+            text="Ещё »",
+            callback_data=SearchPage(cursor=next_cursor, token=search_token(query)).pack()
+        ))
+    builder.adjust(1)
+    return builder.as_markup()
+
+
+def get_album_keyboard(
+        cards: Sequence, category_id: int, next_cursor: Optional[int]
+) -> InlineKeyboardMarkup:
+    """Кнопки покупки по номерам карточек альбома и переход к следующей странице"""
+    builder = InlineKeyboardBuilder()
+    for number, card in enumerate(cards, 1):
+        builder.add(InlineKeyboardButton(
+            text=f"🛒 {number}",
+            callback_data=f"buy_{card.id}"
+        ))
+    builder.adjust(5)
+    if next_cursor is not None:
+        builder.row(InlineKeyboardButton(
+            text="Ещё »",
+            callback_data=AlbumPage(category_id=category_id, cursor=next_cursor).pack()
+        ))
+    return builder.as_markup()
+
+
 def get_card_creation_cancel_keyboard() -> ReplyKeyboardMarkup:
     """Клавиатура для отмены создания карточки"""
     builder = ReplyKeyboardBuilder()
@@ -8,6 +8,7 @@ def get_main_keyboard(is_admin: bool = False) -> ReplyKeyboardMarkup:
 
     builder.add(KeyboardButton(text="📦 Добавить карточку"))
     builder.add(KeyboardButton(text="👀 Посмотреть карточки"))
+    builder.add(KeyboardButton(text="🔥 Популярное"))
     builder.add(KeyboardButton(text="💰 Баланс"))
 
     if is_admin:
@@ -1,14 +1,32 @@
-from typing import Callable, Dict, Any, Awaitable
-from aiogram import BaseMiddleware
-from aiogram.types import TelegramObject
-from sqlalchemy.ext.asyncio import async_sessionmaker
+import asyncio
+from contextvars import ContextVar
+from typing import Callable, Dict, Any, Awaitable, Optional, Tuple
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+from aiogram.types import TelegramObject, Update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.database.session import SessionRouter
+
+# Отдельная сессия чтения текущего апдейта и задача, которая его обрабатывает
+_read_session: ContextVar[Optional[Tuple[AsyncSession, asyncio.Task]]] = ContextVar(
+    "read_session", default=None
+)
 
 
 class DatabaseMiddleware(BaseMiddleware):
-    """Middleware для инъекции сессии базы данных"""
+    """Middleware для инъекции сессии базы данных.
+
+    data["session"] - сессия основной БД, data["read_session"] - сессия для
+    чистого чтения: реплика, если они настроены и пользователь недавно
+    ничего не записывал, иначе та же основная сессия.
+    """
 
-    def __init__(self, session_pool: async_sessionmaker):
+    def __init__(self, session_pool: async_sessionmaker, router: Optional[SessionRouter] = None):
         self.session_pool = session_pool
+        self.router = router
 
     async def __call__(
             self,
@@ -16,6 +34,51 @@ class DatabaseMiddleware(BaseMiddleware):
             event: TelegramObject,
             data: Dict[str, Any]
     ) -> Any:
+        inner_event = event.event if isinstance(event, Update) else event
+        from_user = getattr(inner_event, "from_user", None)
+        user_id = from_user.id if from_user is not None else None
+
         async with self.session_pool() as session:
             data["session"] = session
-            return await handler(event, data)
\ No newline at end of file
+            try:
+                if self.router is not None and self.router.use_replica(user_id):
+                    async with self.router.reader() as read_session:
+                        data["read_session"] = read_session
+                        token = _read_session.set((read_session, asyncio.current_task()))
+                        try:
+                            return await handler(event, data)
+                        finally:
+                            _read_session.reset(token)
+                data["read_session"] = session
+                return await handler(event, data)
+            finally:
+                if self.router is not None and session.info.get("has_writes"):
+                    self.router.mark_write(user_id)
+
+
+
+class ReadSessionReleaseMiddleware(BaseRequestMiddleware):
+    """Завершать транзакцию сессии чтения перед запросом к Bot API.
+
+    Сессия держит соединение от первого запроса до конца транзакции, то
+    есть обычно до конца апдейта, вместе с ожиданием ответа Telegram. Пул
+    читателей SQLite маленький, и апдейты вставали бы в очередь за ним.
+    Сессия только читает, поэтому ее транзакцию можно закончить в любой
+    момент: загруженные объекты остаются доступны (expire_on_commit=False),
+    следующий запрос возьмет соединение заново. Сессия записи не трогается.
+    Регистрируется первой, до ожидания в лимитах Bot API.
+    """
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        current = _read_session.get()
+        # Запросы из дочерних задач (gather) сессию не трогают: она не потокобезопасна
+        if current is not None and current[1] is asyncio.current_task():
+            read_session = current[0]
+            if read_session.in_transaction():
+                await read_session.commit()
+        return await make_request(bot, method)
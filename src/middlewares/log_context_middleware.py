@@ -0,0 +1,28 @@
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from src.utils.logger import log_context
+
+
+class LogContextMiddleware(BaseMiddleware):
+    """Кладет update_id и user_id апдейта в контекст логирования."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        context: Dict[str, Any] = {}
+        if isinstance(event, Update):
+            context["update_id"] = event.update_id
+            user = getattr(event.event, "from_user", None)
+            if user is not None:
+                context["user_id"] = user.id
+        token = log_context.set(context)
+        try:
+            return await handler(event, data)
+        finally:
+            log_context.reset(token)
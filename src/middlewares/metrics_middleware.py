@@ -0,0 +1,188 @@
+import random
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+from aiogram.types import TelegramObject
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.utils.health import HealthState
+from src.utils.metrics import COUNT_BUCKETS, MetricsRegistry, metrics
+
+
+class UpdateSample:
+    """Данные одного выбранного для замера апдейта."""
+
+    __slots__ = ("handler", "queries", "sql_time")
+
+    def __init__(self) -> None:
+        self.handler = "unhandled"
+        self.queries = 0
+        self.sql_time = 0.0
+
+
+_current_sample: ContextVar[Optional[UpdateSample]] = ContextVar("metrics_sample", default=None)
+
+
+def handler_name(handler: HandlerObject) -> str:
+    """Имя хендлера в виде «модуль.функция», например card_handlers.show_cards."""
+    callback = handler.callback
+    module = getattr(callback, "__module__", "") or ""
+    return f"{module.rsplit('.', 1)[-1]}.{getattr(callback, '__name__', type(callback).__name__)}"
+
+
+class MetricsMiddleware(BaseMiddleware):
+    """Замер времени обработки апдейта и SQL-запросов по хендлерам.
+
+    Регистрируется самым внешним middleware на dp.update. Замеряется только
+    доля апдейтов sample_rate, остальные проходят почти без накладных расходов.
+    Имя хендлера записывает вложенный HandlerNameMiddleware, который
+    регистрируется на всех наблюдателях диспетчера через setup().
+    """
+
+    def __init__(
+        self,
+        registry: MetricsRegistry = metrics,
+        sample_rate: float = 1.0,
+        health: Optional[HealthState] = None,
+    ):
+        self.registry = registry
+        self.sample_rate = sample_rate
+        self.health = health
+        self._updates_total = registry.counter(
+            "bot_updates_total", "Всего обработано апдейтов"
+        )
+
+    def setup(self, dp: Dispatcher) -> None:
+        dp.update.outer_middleware(self)
+        name_middleware = HandlerNameMiddleware()
+        for event_name, observer in dp.observers.items():
+            if event_name not in ("update", "error"):
+                observer.middleware(name_middleware)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        self._updates_total.inc()
+        if self.health is not None:
+            self.health.mark_update()
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return await handler(event, data)
+
+        sample = UpdateSample()
+        token = _current_sample.set(sample)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current_sample.reset(token)
+            self._record(sample, elapsed)
+
+    def _record(self, sample: UpdateSample, elapsed: float) -> None:
+        registry = self.registry
+        registry.histogram(
+            "bot_update_duration_seconds",
+            "Время обработки апдейта по хендлерам",
+            handler=sample.handler,
+        ).observe(elapsed)
+        registry.histogram(
+            "bot_update_sql_queries",
+            "Число SQL-запросов на апдейт",
+            buckets=COUNT_BUCKETS,
+            handler=sample.handler,
+        ).observe(sample.queries)
+        registry.histogram(
+            "bot_update_sql_seconds",
+            "Суммарное время SQL-запросов на апдейт",
+            handler=sample.handler,
+        ).observe(sample.sql_time)
+        registry.counter(
+            "bot_sampled_updates_total",
+            "Апдейты, попавшие в выборку замеров",
+            handler=sample.handler,
+        ).inc()
+
+
+class HandlerNameMiddleware(BaseMiddleware):
+    """Записывает в текущий замер имя сработавшего хендлера."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        sample = _current_sample.get()
+        if sample is not None and "handler" in data:
+            sample.handler = handler_name(data["handler"])
+        return await handler(event, data)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Считать SQL-запросы и их время для замеряемых апдейтов.
+
+    ContextVar с текущим замером виден внутри greenlet, в котором
+    SQLAlchemy вызывает обработчики событий.
+    """
+    sync_engine = engine.sync_engine
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if _current_sample.get() is not None:
+            conn.info.setdefault("metrics_query_started", []).append(time.perf_counter())
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        sample = _current_sample.get()
+        if sample is None:
+            return
+        started = conn.info.get("metrics_query_started")
+        if started:
+            sample.sql_time += time.perf_counter() - started.pop()
+        sample.queries += 1
+
+    event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", after_cursor_execute)
+
+
+class BotApiMetricsMiddleware(BaseRequestMiddleware):
+    """Замер задержки запросов к Bot API по методам.
+
+    Регистрируется после BotApiThrottlingMiddleware, чтобы не учитывать
+    ожидание в очереди лимитов.
+    """
+
+    def __init__(self, registry: MetricsRegistry = metrics, sample_rate: float = 1.0):
+        self.registry = registry
+        self.sample_rate = sample_rate
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return await make_request(bot, method)
+
+        started = time.perf_counter()
+        status = "error"
+        try:
+            result = await make_request(bot, method)
+            status = "ok"
+            return result
+        finally:
+            self.registry.histogram(
+                "bot_api_request_seconds",
+                "Задержка запросов к Bot API",
+                method=method.__api_method__,
+                status=status,
+            ).observe(time.perf_counter() - started)
@@ -0,0 +1,40 @@
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import EditMessageMedia, SendMediaGroup, SendPhoto, TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+from aiogram.types import InputMediaPhoto, Message
+
+from src.utils.photo_cache import PhotoFileCache, is_url, photo_cache
+
+
+class PhotoCaptureMiddleware(BaseRequestMiddleware):
+    """Запоминает file_id из ответа на отправку фото по URL.
+
+    Работает для send_photo, send_media_group и edit_message_media, поэтому
+    хендлерам не нужно самим разбирать ответ: следующая отправка той же
+    карточки через photo_cache.photo_for уже пойдет по file_id.
+    """
+
+    def __init__(self, cache: PhotoFileCache = photo_cache):
+        self.cache = cache
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        result = await make_request(bot, method)
+
+        if isinstance(method, SendPhoto):
+            self._capture(method.photo, result)
+        elif isinstance(method, EditMessageMedia) and isinstance(method.media, InputMediaPhoto):
+            self._capture(method.media.media, result)
+        elif isinstance(method, SendMediaGroup) and isinstance(result, list):
+            for media, message in zip(method.media, result):
+                self._capture(media.media, message)
+        return result
+
+    def _capture(self, photo, message) -> None:
+        if isinstance(photo, str) and is_url(photo) and isinstance(message, Message) and message.photo:
+            self.cache.remember(photo, message.photo[-1].file_id)
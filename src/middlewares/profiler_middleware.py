@@ -0,0 +1,27 @@
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from src.utils.profiler import ProfilerController, profiler
+
+
+class ProfilerMiddleware(BaseMiddleware):
+    """Отсчет апдейтов для профилирования «на N апдейтов»."""
+
+    def __init__(self, controller: ProfilerController = profiler):
+        self.controller = controller
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        # Апдейт, запустивший профилирование, в счет не идет
+        was_active = self.controller.active
+        try:
+            return await handler(event, data)
+        finally:
+            if was_active and self.controller.active:
+                self.controller.on_update()
@@ -0,0 +1,54 @@
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware, Dispatcher
+from aiogram.types import TelegramObject
+
+from src.middlewares.metrics_middleware import handler_name
+from src.utils.query_counter import QueryCounter, TooManyQueries
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetMiddleware(BaseMiddleware):
+    """Отладочный контроль числа SQL-запросов на хендлер.
+
+    Включается в debug-режиме (DEBUG_QUERIES=true). При превышении лимита
+    или повторяющихся запросах пишет в лог отчет с SQL и местом вызова,
+    в строгом режиме - бросает TooManyQueries.
+    """
+
+    def __init__(
+        self,
+        max_queries: int = 10,
+        limits: Optional[Dict[str, int]] = None,
+        strict: bool = False,
+    ):
+        self.max_queries = max_queries
+        self.limits = limits or {}
+        self.strict = strict
+
+    def setup(self, dp: Dispatcher) -> None:
+        for event_name, observer in dp.observers.items():
+            if event_name not in ("update", "error"):
+                observer.middleware(self)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        name = handler_name(data["handler"]) if "handler" in data else "unknown"
+        with QueryCounter() as counter:
+            result = await handler(event, data)
+
+        limit = self.limits.get(name, self.max_queries)
+        try:
+            counter.assert_max(limit, name)
+            counter.assert_no_repeats(name)
+        except TooManyQueries as e:
+            if self.strict:
+                raise
+            logger.warning("Подозрение на N+1 в %s\n%s", name, e)
+        return result
@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import (
+    EditMessageCaption,
+    EditMessageMedia,
+    EditMessageReplyMarkup,
+    EditMessageText,
+    TelegramMethod,
+)
+from aiogram.methods.base import Response, TelegramType
+
+logger = logging.getLogger(__name__)
+
+EDIT_METHODS = (EditMessageText, EditMessageCaption, EditMessageMedia, EditMessageReplyMarkup)
+
+
+class TokenBucket:
+    """Простой token bucket с резервированием (запросы встают в очередь)."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        # Пауза flood control соблюдается и при выключенном лимите (rate <= 0)
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def reserve(self) -> float:
+        """Забрать токен и вернуть время ожидания до его появления."""
+        now = time.monotonic()
+        pause = max(0.0, self.blocked_until - now)
+        if self.rate <= 0:
+            return pause
+        self._refill(now)
+        self.tokens -= 1
+        return max(pause, 0.0 if self.tokens >= 0 else -self.tokens / self.rate)
+
+    def refund(self) -> None:
+        """Вернуть токен, взятый reserve(), если запрос так и не ушел."""
+        if self.rate <= 0:
+            return
+        self._refill(time.monotonic())
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+    def block(self, seconds: float) -> None:
+        """Не выдавать токены ближайшие seconds секунд (flood control)."""
+        now = time.monotonic()
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        if self.rate <= 0:
+            return
+        # Долг по токенам растягивает очередь ожидающих запросов после паузы
+        self._refill(now)
+        self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+    def is_idle(self) -> bool:
+        now = time.monotonic()
+        self._refill(now)
+        return self.tokens >= self.capacity and self.blocked_until <= now
+
+
+class BotApiThrottlingMiddleware(BaseRequestMiddleware):
+    """Ограничение частоты запросов к Bot API.
+
+    Запросы в чат проходят через глобальный и початовый лимиты, на
+    TelegramRetryAfter запрос повторяется после указанной паузы, а
+    из нескольких ожидающих правок одного сообщения уходит только последняя.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = 30.0,
+        chat_rate: float = 1.0,
+        chat_burst: int = 3,
+        max_retries: int = 3,
+    ):
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self._global_bucket = TokenBucket(global_rate, global_rate)
+        self._chat_buckets: Dict[int | str, TokenBucket] = {}
+        self._edit_generations: Dict[Tuple[int | str, int], int] = {}
+        self.coalesced_edits = 0
+        self.retries = 0
+
+    def _get_chat_bucket(self, chat_id: int | str) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self._chat_buckets) > 10000:
+                self._chat_buckets = {
+                    key: value for key, value in self._chat_buckets.items() if not value.is_idle()
+                }
+            bucket = TokenBucket(self.chat_rate, self.chat_burst)
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+
+    async def _acquire(self, chat_id: int | str) -> None:
+        delay = max(self._get_chat_bucket(chat_id).reserve(), self._global_bucket.reserve())
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _release(self, chat_id: int | str) -> None:
+        self._get_chat_bucket(chat_id).refund()
+        self._global_bucket.refund()
+
+    def _superseded(self, edit_key: Optional[Tuple[int | str, int]], generation: int) -> bool:
+        if edit_key is None or self._edit_generations.get(edit_key) == generation:
+            return False
+        self.coalesced_edits += 1
+        logger.debug("Правка сообщения %s пропущена в пользу более новой", edit_key)
+        return True
+
+    @staticmethod
+    def _edit_key(method: TelegramMethod) -> Optional[Tuple[int | str, int]]:
+        if isinstance(method, EDIT_METHODS) and method.chat_id is not None and method.message_id:
+            return method.chat_id, method.message_id
+        return None
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None:
+            # getUpdates, answerCallbackQuery и т.п. не ограничиваем
+            return await make_request(bot, method)
+
+        edit_key = self._edit_key(method)
+        generation = 0
+        if edit_key is not None:
+            generation = self._edit_generations.get(edit_key, 0) + 1
+            self._edit_generations[edit_key] = generation
+
+        try:
+            attempt = 0
+            while True:
+                if self._superseded(edit_key, generation):
+                    return True  # type: ignore[return-value]
+                await self._acquire(chat_id)
+                if self._superseded(edit_key, generation):
+                    # Пока ждали слот, пришла более свежая правка того же сообщения:
+                    # ее токен достается следующим запросам в чат
+                    self._release(chat_id)
+                    return True  # type: ignore[return-value]
+                try:
+                    return await make_request(bot, method)
+                except TelegramRetryAfter as exc:
+                    if attempt >= self.max_retries:
+                        raise
+                    attempt += 1
+                    self.retries += 1
+                    self._get_chat_bucket(chat_id).block(exc.retry_after)
+                    logger.warning(
+                        "Flood control для чата %s: повтор %s через %s с",
+                        chat_id,
+                        attempt,
+                        exc.retry_after,
+                    )
+        finally:
+            if edit_key is not None and self._edit_generations.get(edit_key) == generation:
+                del self._edit_generations[edit_key]
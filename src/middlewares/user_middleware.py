@@ -3,11 +3,13 @@ from typing import Any, Awaitable, Callable, Dict, List, Optional
 import logging
 
 from aiogram import BaseMiddleware
-from aiogram.types import Message, CallbackQuery, TelegramObject  # ← Добавили CallbackQuery
-from sqlalchemy import select
+from aiogram.types import Message, CallbackQuery, TelegramObject, Update
+from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 
 from src.database.models import User
+from src.database.queries import USER_BY_TELEGRAM_ID
 
 
 class UserMiddleware(BaseMiddleware):
@@ -22,9 +24,12 @@ class UserMiddleware(BaseMiddleware):
             event: TelegramObject,
             data: Dict[str, Any],
     ) -> Any:
+        # Middleware висит на dp.update, поэтому достаем вложенное событие
+        inner_event = event.event if isinstance(event, Update) else event
+
         # Извлекаем from_user в зависимости от типа события
-        if isinstance(event, (Message, CallbackQuery)):
-            user_info = event.from_user
+        if isinstance(inner_event, (Message, CallbackQuery)):
+            user_info = inner_event.from_user
         else:
             # Для других типов событий пропускаем
             return await handler(event, data)
@@ -33,9 +38,11 @@ class UserMiddleware(BaseMiddleware):
             return await handler(event, data)
 
         session: AsyncSession = data["session"]
+        # Чтение через read_session: в режиме SQLite соединение писателя одно,
+        # и сессия, начавшая транзакцию поиском, держала бы его весь апдейт
+        read_session: AsyncSession = data.get("read_session", session)
         user_id = user_info.id
-        stmt = select(User).where(User.telegram_id == user_id)
-        result = await session.execute(stmt)
+        result = await read_session.execute(USER_BY_TELEGRAM_ID, {"telegram_id": user_id})
         user = result.scalar_one_or_none()
 
         if not user:
@@ -49,13 +56,16 @@ class UserMiddleware(BaseMiddleware):
             )
             session.add(user)
             await session.commit()
-            await session.refresh(user)
             logging.getLogger(__name__).info("Создан пользователь %s (admin=%s)", user_id, user.is_admin)
         else:
             should_be_admin = user_id in self.admin_ids
             if user.is_admin != should_be_admin:
-                user.is_admin = should_be_admin
+                await session.execute(
+                    update(User).where(User.id == user.id).values(is_admin=should_be_admin)
+                )
                 await session.commit()
+                # Без пометки "изменен": объект может принадлежать сессии только для чтения
+                set_committed_value(user, "is_admin", should_be_admin)
                 logging.getLogger(__name__).info("Флаг админа обновлен %s -> %s", user_id, should_be_admin)
 
         data["user"] = user
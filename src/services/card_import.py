@@ -0,0 +1,264 @@
+"""Массовый импорт карточек из CSV и JSON.
+
+Файл читается потоково: CSV - построчно через csv.reader, JSON - по одному
+объекту инкрементальным декодером (массив объектов или JSON Lines). В памяти
+одновременно находятся только текущая пачка строк и начало отчета об
+ошибках, поэтому расход памяти не зависит от размера файла.
+"""
+import codecs
+import csv
+import io
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import Card, Category
+from src.services.card_service import CardService
+from src.services.outbox_service import OutboxService
+from src.utils.photo_cache import is_url
+
+logger = logging.getLogger(__name__)
+
+MAX_REPORTED_ERRORS = 20
+MAX_PHOTO_URL_LENGTH = 500
+
+# Заголовки колонок (и ключи объектов JSON) -> поля карточки
+FIELD_ALIASES = {
+    "title": "title",
+    "название": "title",
+    "description": "description",
+    "описание": "description",
+    "price": "price",
+    "цена": "price",
+    "category": "category",
+    "категория": "category",
+    "photo_url": "photo_url",
+    "photo": "photo_url",
+    "фото": "photo_url",
+}
+
+ImportRow = Tuple[str, Dict[str, Any]]  # (место в файле для отчета, поля)
+
+
+@dataclass
+class ImportReport:
+    created: int = 0
+    failed: int = 0
+    truncated: bool = False  # строки сверх лимита не читались
+    fatal: Optional[str] = None  # ошибка формата, после которой файл не дочитан
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def total(self) -> int:
+        return self.created + self.failed
+
+    def add_error(self, place: str, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"{place}: {message}")
+
+
+def _normalize(item: Dict[Any, Any]) -> Dict[str, Any]:
+    row = {}
+    for key, value in item.items():
+        name = FIELD_ALIASES.get(str(key).strip().lower())
+        if name is not None:
+            row[name] = value
+    return row
+
+
+def iter_csv_rows(stream: BinaryIO) -> Iterator[ImportRow]:
+    """Строки CSV в кодировке UTF-8; разделитель - запятая, точка с запятой или табуляция."""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        sample = text.read(4096)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        text.seek(0)
+        reader = csv.reader(text, dialect)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = [FIELD_ALIASES.get(name.strip().lower()) for name in header]
+        if "title" not in columns or "price" not in columns:
+            raise ValueError("В первой строке нужны колонки title/название и price/цена")
+        for values in reader:
+            if not any(value.strip() for value in values):
+                continue
+            row = {name: value for name, value in zip(columns, values) if name is not None}
+            yield f"строка {reader.line_num}", row
+    except (csv.Error, UnicodeDecodeError) as exc:
+        raise ValueError(f"Не удалось прочитать CSV: {exc}") from exc
+    finally:
+        text.detach()
+
+
+def iter_json_rows(
+    stream: BinaryIO, chunk_size: int = 65536, max_object_size: int = 65536
+) -> Iterator[ImportRow]:
+    """Объекты из JSON-массива или JSON Lines, по одному, без чтения файла целиком."""
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    position = 0
+    number = 0
+    eof = False
+    while True:
+        # Между объектами допускаются пробелы, запятые и скобки массива
+        while position < len(buffer) and buffer[position] in " \t\r\n,[]":
+            position += 1
+        if position == len(buffer):
+            if eof:
+                return
+            buffer, position = "", 0
+        else:
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as exc:
+                if eof:
+                    raise ValueError(f"Некорректный JSON после записи {number}: {exc.msg}") from None
+                if len(buffer) - position > max_object_size:
+                    raise ValueError(f"Запись {number + 1} длиннее {max_object_size} символов") from None
+            else:
+                # Объект в конце буфера мог быть обрезан (например, число) - дочитываем
+                if end < len(buffer) or eof:
+                    number += 1
+                    position = end
+                    if isinstance(item, dict):
+                        yield f"запись {number}", _normalize(item)
+                    else:
+                        yield f"запись {number}", {"_invalid": item}
+                    continue
+        raw = stream.read(chunk_size)
+        eof = not raw
+        try:
+            chunk = text.decode(raw, final=eof)
+        except UnicodeDecodeError as exc:
+            raise ValueError(f"Файл не в кодировке UTF-8: {exc}") from exc
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
+def _text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        raise ValueError("Ожидалась строка")
+    return str(value)
+
+
+class CardImportService:
+    """Создание карточек из строк файла пачками по batch_size."""
+
+    @staticmethod
+    def build_values(
+        row: Dict[str, Any], user_id: int, categories: Dict[str, int], created_at: datetime
+    ) -> Dict[str, Any]:
+        """Поля новой карточки; ValueError - строка не проходит проверку."""
+        if "_invalid" in row:
+            raise ValueError("Ожидался объект с полями карточки")
+        title = CardService.validate_title(_text(row.get("title")))
+        description = CardService.validate_description(_text(row.get("description")))
+        price = CardService.parse_price(_text(row.get("price")))
+
+        category_id = None
+        category = _text(row.get("category")).strip().lower()
+        if category:
+            category_id = categories.get(category)
+            if category_id is None:
+                raise ValueError(f"Неизвестная категория {category!r}")
+
+        photo_url = _text(row.get("photo_url")).strip() or None
+        if photo_url is not None:
+            if not is_url(photo_url):
+                raise ValueError("Фото должно быть ссылкой http(s)")
+            if len(photo_url) > MAX_PHOTO_URL_LENGTH:
+                raise ValueError(f"Ссылка на фото длиннее {MAX_PHOTO_URL_LENGTH} символов")
+
+        # Все ключи заданы явно: в многострочном INSERT у строк один набор колонок
+        return {
+            "title": title,
+            "description": description,
+            "price": price,
+            "photo_url": photo_url,
+            "photo_file_id": None,
+            "user_id": user_id,
+            "category_id": category_id,
+            "is_approved": False,
+            "is_rejected": False,
+            "created_at": created_at,
+            "view_count": 0,
+            "recent_views": 0,
+            "popularity": 0.0,
+        }
+
+    @staticmethod
+    async def import_cards(
+        session: AsyncSession,
+        user_id: int,
+        rows: Iterable[ImportRow],
+        categories: Sequence[Category] = (),
+        batch_size: int = 200,
+        max_rows: int = 5000,
+        admin_ids: Sequence[int] = (),
+    ) -> ImportReport:
+        """Проверить строки и вставить карточки на модерацию.
+
+        Каждая пачка - один INSERT ... VALUES и отдельный коммит: блокировка
+        записи не держится на все время разбора файла, а уже вставленные
+        пачки сохраняются, даже если дальше в файле ошибка формата.
+        """
+        by_name: Dict[str, int] = {}
+        for category in categories:
+            by_name[category.name.strip().lower()] = category.id
+            by_name[category.slug.strip().lower()] = category.id
+
+        report = ImportReport()
+        batch: List[Dict[str, Any]] = []
+        try:
+            for place, row in rows:
+                if report.total >= max_rows:
+                    report.truncated = True
+                    break
+                try:
+                    batch.append(
+                        CardImportService.build_values(row, user_id, by_name, datetime.utcnow())
+                    )
+                except ValueError as exc:
+                    report.add_error(place, str(exc))
+                    continue
+                report.created += 1
+                if len(batch) >= batch_size:
+                    await CardImportService._insert(session, batch)
+                    batch = []
+        except ValueError as exc:
+            report.fatal = str(exc)
+
+        if batch:
+            await CardImportService._insert(session, batch)
+
+        if report.created:
+            for admin_id in admin_ids:
+                OutboxService.enqueue(
+                    session,
+                    admin_id,
+                    f"📥 Импорт: {report.created} новых карточек ждут модерации (/admin)",
+                )
+            await session.commit()
+        logger.info(
+            "Импорт карточек пользователем %s: создано %s, ошибок %s",
+            user_id, report.created, report.failed,
+        )
+        return report
+
+    @staticmethod
+    async def _insert(session: AsyncSession, batch: List[Dict[str, Any]]) -> None:
+        await session.execute(insert(Card).values(batch))
+        await session.commit()
@@ -1,19 +1,110 @@
 import logging
+import math
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, List, Optional, Tuple
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload, joinedload
 
+from src.database.keyset import NavigationStep, fetch_step
 from src.database.models import Card
+from src.database.queries import (
+    ALBUM_VIEWS,
+    CARD_BY_ID,
+    CARD_VIEW_COLUMNS,
+    CARD_VIEWS_BY_IDS,
+    CARD_WITH_USER_BY_ID,
+    CATALOG_STEPS,
+    CATALOG_VIEWS,
+    MODERATION_CARD_VIEWS,
+    MODERATION_STEPS,
+)
+from src.database.search import index_card, match_condition, search_terms
+from src.services.category_service import CategoryService
+from src.services.draft_store import DraftStore
 
 logger = logging.getLogger(__name__)
 
+MAX_TITLE_LENGTH = 200
+MAX_DESCRIPTION_LENGTH = 2000
+MAX_PRICE = 1_000_000
+
+
+class CardView:
+    """Карточка только для чтения: поля для подписи без ORM-объектов.
+
+    Строится из выборки колонок, поэтому не попадает в identity map сессии
+    и не тянет за собой User и состояние отношений.
+    """
+
+    __slots__ = (
+        "id",
+        "title",
+        "description",
+        "price",
+        "photo_url",
+        "photo_file_id",
+        "seller_username",
+    )
+
+    def __init__(
+            self,
+            id: int,
+            title: str,
+            description: str,
+            price: float,
+            photo_url: Optional[str],
+            photo_file_id: Optional[str],
+            seller_username: Optional[str],
+    ):
+        self.id = id
+        self.title = title
+        self.description = description
+        self.price = price
+        self.photo_url = photo_url
+        self.photo_file_id = photo_file_id
+        self.seller_username = seller_username
+
+    def __repr__(self) -> str:
+        return f"CardView(id={self.id!r}, title={self.title!r})"
+
 
 class CardService:
     """Сервис для работы с карточками."""
 
+    # Проверки полей общие для диалога создания и импорта из файла;
+    # ValueError несет текст для пользователя
+    @staticmethod
+    def validate_title(title: str) -> str:
+        title = title.strip()
+        if not title:
+            raise ValueError("Название не может быть пустым")
+        if len(title) > MAX_TITLE_LENGTH:
+            raise ValueError(f"Название слишком длинное (макс. {MAX_TITLE_LENGTH} символов)")
+        return title
+
+    @staticmethod
+    def validate_description(description: str) -> str:
+        description = description.strip()
+        if not description:
+            raise ValueError("Описание не может быть пустым")
+        if len(description) > MAX_DESCRIPTION_LENGTH:
+            raise ValueError(f"Описание слишком длинное (макс. {MAX_DESCRIPTION_LENGTH} символов)")
+        return description
+
+    @staticmethod
+    def parse_price(value: Any) -> float:
+        try:
+            price = float(str(value).strip().replace(",", "."))
+        except ValueError:
+            raise ValueError("Некорректная цена (число, например: 999.99)") from None
+        if not math.isfinite(price) or price <= 0:
+            raise ValueError("Цена должна быть положительным числом")
+        if price > MAX_PRICE:
+            raise ValueError("Цена слишком высокая (макс. 1,000,000 руб.)")
+        return price
+
     @staticmethod
     async def create_card(
             session: AsyncSession,
@@ -23,7 +114,10 @@ class CardService:
             price: float,
             photo_url: Optional[str] = None,
             photo_file_id: Optional[str] = None,
+            category_id: Optional[int] = None,
+            draft_telegram_id: Optional[int] = None,
     ) -> Card:
+        """Создать карточку; черновик draft_telegram_id удаляется в той же транзакции."""
         card = Card(
             title=title,
             description=description,
@@ -31,12 +125,19 @@ class CardService:
             photo_url=photo_url,
             photo_file_id=photo_file_id,
             user_id=user_id,
+            category_id=category_id,
             is_approved=False,
             created_at=datetime.utcnow(),
         )
+        # Новая карточка ждет модерации: в поиск и счетчик категории она попадет
+        # при одобрении (approve_card)
         session.add(card)
-        await session.commit()
+        if draft_telegram_id is not None:
+            await DraftStore.delete(session, draft_telegram_id)
+        await session.flush()
         await session.refresh(card)
+        # Коммит последним: refresh после коммита снова занял бы соединение до конца апдейта
+        await session.commit()
         logger.info("Создана карточка %s пользователем %s", card.id, user_id)
         return card
 
@@ -72,6 +173,113 @@ class CardService:
         result = await session.execute(stmt)
         return result.scalars().all()
 
+    @staticmethod
+    async def get_approved_card_views(
+            session: AsyncSession,
+            limit: int = 50,
+            offset: int = 0,
+            category_id: Optional[int] = None,
+            sort: str = "new",
+    ) -> List[CardView]:
+        """Одобренные карточки для просмотра: только нужные для подписи колонки.
+
+        sort - код из CATALOG_SORTS: new, asc (дешевые сначала), desc, top (популярные).
+        """
+        stmt = CATALOG_VIEWS[(category_id is not None, sort)]
+        params = {"limit": limit, "offset": offset}
+        if category_id is not None:
+            params["category_id"] = category_id
+        result = await session.execute(stmt, params)
+        return [CardView(*row) for row in result]
+
+    @staticmethod
+    async def catalog_step(
+            session: AsyncSession,
+            category_id: Optional[int] = None,
+            sort: str = "new",
+            cursor: Optional[Tuple[Any, int]] = None,
+            forward: bool = True,
+    ) -> Optional[NavigationStep]:
+        """Соседняя карточка каталога одним запросом по индексу.
+
+        cursor - (ключ сортировки, id) текущей карточки; без него - первая карточка.
+        Возвращает NavigationStep с CardView в item или None, если дальше ничего нет.
+        """
+        stmt = CATALOG_STEPS[(category_id is not None, sort)][(forward, cursor is not None)]
+        params = {} if category_id is None else {"category_id": category_id}
+        return await fetch_step(session, stmt, params, cursor, lambda columns: CardView(*columns))
+
+    @staticmethod
+    async def get_album_page(
+            session: AsyncSession,
+            cursor: Optional[int] = None,
+            limit: int = 10,
+            category_id: Optional[int] = None,
+    ) -> Tuple[List[CardView], Optional[int]]:
+        """Страница альбома: одобренные карточки, новые сначала.
+
+        Постраничность по ключу, как у search: cursor - id последней показанной
+        карточки, вторым значением возвращается курсор следующей страницы или None.
+        """
+        stmt = ALBUM_VIEWS[(category_id is not None, cursor is not None)]
+        params = {"limit": limit + 1}
+        if category_id is not None:
+            params["category_id"] = category_id
+        if cursor is not None:
+            params["cursor"] = cursor
+        result = await session.execute(stmt, params)
+        cards = [CardView(*row) for row in result]
+        if len(cards) > limit:
+            return cards[:limit], cards[limit - 1].id
+        return cards, None
+
+    @staticmethod
+    async def get_card_views_by_ids(session: AsyncSession, card_ids: List[int]) -> List[CardView]:
+        """Одобренные карточки по списку id в том же порядке."""
+        if not card_ids:
+            return []
+        result = await session.execute(CARD_VIEWS_BY_IDS, {"ids": card_ids})
+        views = {row.id: CardView(*row) for row in result}
+        return [views[card_id] for card_id in card_ids if card_id in views]
+
+    @staticmethod
+    async def get_moderation_card_views(session: AsyncSession) -> List[CardView]:
+        """Карточки на модерации в виде CardView."""
+        result = await session.execute(MODERATION_CARD_VIEWS)
+        return [CardView(*row) for row in result]
+
+    @staticmethod
+    async def moderation_step(
+            session: AsyncSession, cursor: Optional[Tuple[Any, int]] = None, forward: bool = True
+    ) -> Optional[NavigationStep]:
+        """Соседняя карточка на модерации (старые сначала), курсор - (created_at, id)."""
+        stmt = MODERATION_STEPS[(forward, cursor is not None)]
+        return await fetch_step(session, stmt, {}, cursor, lambda columns: CardView(*columns))
+
+    @staticmethod
+    async def search(
+            session: AsyncSession, query: str, cursor: Optional[int] = None, limit: int = 10
+    ) -> Tuple[List[CardView], Optional[int]]:
+        """Поиск среди одобренных карточек, новые сначала.
+
+        Постраничность по ключу: cursor - id последней показанной карточки.
+        Возвращает страницу и курсор следующей страницы (None, если это последняя).
+        """
+        terms = search_terms(query)
+        if not terms:
+            return [], None
+        stmt = CARD_VIEW_COLUMNS.where(
+            Card.is_approved.is_(True), match_condition(session, terms)
+        )
+        if cursor is not None:
+            stmt = stmt.where(Card.id < cursor)
+        stmt = stmt.order_by(Card.id.desc()).limit(limit + 1)
+        result = await session.execute(stmt)
+        cards = [CardView(*row) for row in result]
+        if len(cards) > limit:
+            return cards[:limit], cards[limit - 1].id
+        return cards, None
+
     @staticmethod
     async def get_cards_for_moderation(session: AsyncSession) -> List[Card]:
         stmt = (
@@ -87,8 +295,11 @@ class CardService:
     async def approve_card(session: AsyncSession, card_id: int) -> bool:
         card = await CardService.get_card_by_id(session, card_id)
         if card:
+            if not card.is_approved:
+                await CategoryService.add_approved(session, card.category_id)
             card.is_approved = True
             card.is_rejected = False
+            await index_card(session, card)
             await session.commit()
             logger.info("Карточка %s одобрена", card_id)
             return True
@@ -123,26 +334,24 @@ class CardService:
                 return False
         elif attribute == "photo_url":
             card.photo_url = value
+            # Старый file_id относится к прежнему фото; новый запомнится после первой отправки
+            card.photo_file_id = None
         else:
             return False
 
+        if attribute in ("title", "description"):
+            await index_card(session, card)
         await session.commit()
         logger.info("Карточка %s обновлена (поле %s)", card_id, attribute)
         return True
 
     @staticmethod
     async def get_card_by_id(session: AsyncSession, card_id: int) -> Optional[Card]:
-        stmt = select(Card).options(selectinload(Card.user)).where(Card.id == card_id)
-        result = await session.execute(stmt)
+        result = await session.execute(CARD_BY_ID, {"card_id": card_id})
         return result.scalar_one_or_none()
 
     @staticmethod
     async def get_card_with_user(session: AsyncSession, card_id: int) -> Optional[Card]:
         """Получение карточки с загруженным пользователем."""
-        stmt = (
-            select(Card)
-            .options(joinedload(Card.user))  # или selectinload
-            .where(Card.id == card_id)
-        )
-        result = await session.execute(stmt)
+        result = await session.execute(CARD_WITH_USER_BY_ID, {"card_id": card_id})
         return result.unique().scalar_one_or_none()
\ No newline at end of file
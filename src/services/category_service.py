@@ -0,0 +1,69 @@
+import logging
+from typing import List, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import Card, Category
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATEGORIES = [
+    ("electronics", "Электроника"),
+    ("clothes", "Одежда"),
+    ("home", "Дом и сад"),
+    ("hobby", "Хобби"),
+    ("other", "Другое"),
+]
+
+# Полный пересчет счетчиков - только после массовой загрузки в обход CardService
+RECOUNT_APPROVED = update(Category).values(
+    approved_count=(
+        select(func.count(Card.id))
+        .where(Card.category_id == Category.id, Card.is_approved.is_(True))
+        .scalar_subquery()
+    )
+)
+
+
+class CategoryService:
+    """Сервис для работы с категориями."""
+
+    @staticmethod
+    async def ensure_defaults(session: AsyncSession) -> None:
+        """Добавить недостающие категории из DEFAULT_CATEGORIES."""
+        existing = set((await session.execute(select(Category.slug))).scalars())
+        missing = [
+            Category(slug=slug, name=name, approved_count=0)
+            for slug, name in DEFAULT_CATEGORIES
+            if slug not in existing
+        ]
+        if missing:
+            session.add_all(missing)
+            await session.commit()
+            logger.info("Добавлены категории: %s", [category.slug for category in missing])
+
+    @staticmethod
+    async def get_categories(session: AsyncSession) -> List[Category]:
+        result = await session.execute(select(Category).order_by(Category.id))
+        return result.scalars().all()
+
+    @staticmethod
+    async def get_category(session: AsyncSession, category_id: int) -> Optional[Category]:
+        return await session.get(Category, category_id)
+
+    @staticmethod
+    async def add_approved(session: AsyncSession, category_id: Optional[int], delta: int = 1) -> None:
+        """Изменить счетчик одобренных карточек категории (без commit)."""
+        if category_id is None:
+            return
+        await session.execute(
+            update(Category)
+            .where(Category.id == category_id)
+            .values(approved_count=Category.approved_count + delta)
+        )
+
+    @staticmethod
+    async def recount(session: AsyncSession) -> None:
+        await session.execute(RECOUNT_APPROVED)
+        await session.commit()
@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import bindparam, delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.database.models import CardDraft
+
+logger = logging.getLogger(__name__)
+
+DRAFT_FIELDS = ("title", "description", "price", "category_id")
+
+drafts = CardDraft.__table__
+
+DRAFT_BY_OWNER = select(CardDraft).where(CardDraft.telegram_id == bindparam("telegram_id"))
+
+# Core-таблица: DELETE по подзапросу без синхронизации identity map
+PURGE_DRAFTS = delete(drafts).where(
+    drafts.c.telegram_id.in_(
+        select(drafts.c.telegram_id)
+        .where(drafts.c.updated_at < bindparam("cutoff"))
+        .limit(bindparam("limit"))
+        .scalar_subquery()
+    )
+)
+
+
+class DraftStore:
+    """Черновики создания карточек с отложенной записью в card_drafts.
+
+    Каждый шаг диалога только обновляет черновик в памяти; раз в
+    flush_interval все изменения пишутся одной транзакцией (DELETE + INSERT
+    пачкой), поэтому несколько быстрых шагов дают одну запись, а не коммит на
+    каждый шаг. После перезапуска черновик читается из БД, и пользователь
+    может продолжить с того же шага. Черновики, не менявшиеся дольше ttl,
+    удаляются пачками по purge_batch_size раз в purge_interval.
+    Изменения, не записанные до падения процесса, теряются - пользователь
+    продолжит с предыдущего записанного шага.
+    """
+
+    def __init__(
+        self,
+        session_pool: async_sessionmaker[AsyncSession],
+        flush_interval: float = 5.0,
+        ttl: float = 7 * 86400.0,
+        purge_interval: float = 3600.0,
+        purge_batch_size: int = 500,
+    ):
+        self.session_pool = session_pool
+        self.flush_interval = flush_interval
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self.purge_batch_size = purge_batch_size
+        # telegram_id -> поля черновика; None - черновик нужно удалить
+        self._pending: Dict[int, Optional[Dict[str, Any]]] = {}
+        self._purged_at = time.monotonic()
+
+    def save(self, telegram_id: int, step: str, data: Dict[str, Any]) -> None:
+        draft = {name: data.get(name) for name in DRAFT_FIELDS}
+        draft.update(telegram_id=telegram_id, step=step, updated_at=datetime.utcnow())
+        self._pending[telegram_id] = draft
+
+    def discard(self, telegram_id: int) -> None:
+        self._pending[telegram_id] = None
+
+    async def get(self, session: AsyncSession, telegram_id: int) -> Optional[Dict[str, Any]]:
+        """Черновик пользователя: сначала незаписанные изменения, затем БД."""
+        if telegram_id in self._pending:
+            draft = self._pending[telegram_id]
+            return dict(draft) if draft is not None else None
+        result = await session.execute(DRAFT_BY_OWNER, {"telegram_id": telegram_id})
+        row = result.scalar_one_or_none()
+        if row is None:
+            return None
+        return {
+            "telegram_id": row.telegram_id,
+            "step": row.step,
+            "updated_at": row.updated_at,
+            **{name: getattr(row, name) for name in DRAFT_FIELDS},
+        }
+
+    @staticmethod
+    async def delete(session: AsyncSession, telegram_id: int) -> None:
+        """Удалить черновик в транзакции вызывающего (без коммита)."""
+        await session.execute(delete(drafts).where(drafts.c.telegram_id == telegram_id))
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def flush(self) -> int:
+        """Записать изменения черновиков. Возвращает число затронутых пользователей."""
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        owners: List[int] = list(pending)
+        rows = [draft for draft in pending.values() if draft is not None]
+        try:
+            async with self.session_pool() as session:
+                for start in range(0, len(owners), self.purge_batch_size):
+                    chunk = owners[start:start + self.purge_batch_size]
+                    await session.execute(delete(drafts).where(drafts.c.telegram_id.in_(chunk)))
+                if rows:
+                    await session.execute(insert(drafts), rows)
+                await session.commit()
+        except Exception:
+            # Вернуть в буфер то, что не перезаписано более свежими изменениями
+            for telegram_id, draft in pending.items():
+                self._pending.setdefault(telegram_id, draft)
+            raise
+        return len(owners)
+
+    async def purge_expired(self) -> int:
+        """Удалить заброшенные черновики пачками. Возвращает число удаленных."""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.ttl)
+        purged = 0
+        while True:
+            async with self.session_pool() as session:
+                result = await session.execute(
+                    PURGE_DRAFTS, {"cutoff": cutoff, "limit": self.purge_batch_size}
+                )
+                await session.commit()
+            purged += result.rowcount
+            if result.rowcount < self.purge_batch_size:
+                return purged
+
+    async def run(self) -> None:
+        """Периодическая запись и очистка (останавливается отменой задачи)."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                flushed = await self.flush()
+                if flushed:
+                    logger.debug("Записаны черновики %s пользователей", flushed)
+                if time.monotonic() - self._purged_at >= self.purge_interval:
+                    self._purged_at = time.monotonic()
+                    purged = await self.purge_expired()
+                    if purged:
+                        logger.info("Удалено заброшенных черновиков: %s", purged)
+            except Exception as exc:  # noqa: BLE001
+                logger.error("Ошибка записи черновиков: %s", exc, exc_info=True)
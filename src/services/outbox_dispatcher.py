@@ -0,0 +1,114 @@
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.database.models import OutboxMessage
+from src.services.outbox_service import OutboxService
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxDispatcher:
+    """Фоновая отправка уведомлений из outbox пачками.
+
+    Пачка разбирается в три шага: короткая транзакция забирает строки,
+    откладывая их на lease секунд; отправка идет вне транзакции, не держа ни
+    блокировок, ни соединения с БД; вторая короткая транзакция записывает
+    результаты. Сообщение помечается отправленным только после успешного
+    ответа Bot API, поэтому при падении процесса до записи результатов оно
+    уйдет повторно после истечения lease (at-least-once).
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        session_pool: async_sessionmaker[AsyncSession],
+        batch_size: int = 50,
+        poll_interval: float = 1.0,
+        max_attempts: int = 10,
+        retry_base_delay: float = 5.0,
+        retry_max_delay: float = 600.0,
+        lease: float = 60.0,
+    ):
+        self.bot = bot
+        self.session_pool = session_pool
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.lease = lease
+        self._wakeup = asyncio.Event()
+
+    def notify(self) -> None:
+        """Разбудить диспетчер, не дожидаясь следующего опроса."""
+        self._wakeup.set()
+
+    async def _send(self, chat_id: int, text: str) -> Optional[Exception]:
+        """Отправить сообщение; вернуть ошибку вместо исключения."""
+        try:
+            await self.bot.send_message(chat_id=chat_id, text=text)
+        except Exception as exc:  # noqa: BLE001
+            return exc
+        return None
+
+    def _record(self, message: OutboxMessage, error: Optional[Exception]) -> None:
+        if error is None:
+            OutboxService.mark_sent(message)
+        elif isinstance(error, (TelegramForbiddenError, TelegramBadRequest)):
+            # Повтор не поможет: бот заблокирован или чат не существует
+            OutboxService.mark_dropped(message, str(error), self.max_attempts)
+            logger.error(
+                "Уведомление %s для чата %s отброшено: %s", message.id, message.chat_id, error
+            )
+        else:
+            OutboxService.mark_failed(message, str(error), self.retry_base_delay, self.retry_max_delay)
+            logger.warning(
+                "Ошибка отправки уведомления %s (попытка %s): %s", message.id, message.attempts, error
+            )
+
+    async def drain_once(self) -> int:
+        """Отправить одну пачку уведомлений. Возвращает размер пачки."""
+        async with self.session_pool() as session:
+            claimed = await OutboxService.claim_batch(
+                session, limit=self.batch_size, max_attempts=self.max_attempts, lease=self.lease
+            )
+            batch = [(message.id, message.chat_id, message.text) for message in claimed]
+            await session.commit()
+        if not batch:
+            return 0
+
+        errors = await asyncio.gather(*(self._send(chat_id, text) for _, chat_id, text in batch))
+        outcomes: Dict[int, Optional[Exception]] = {
+            message_id: error for (message_id, _, _), error in zip(batch, errors)
+        }
+
+        async with self.session_pool() as session:
+            for message in await OutboxService.get_by_ids(session, list(outcomes)):
+                self._record(message, outcomes[message.id])
+            await session.commit()
+        logger.info("Outbox: обработано уведомлений %s", len(batch))
+        return len(batch)
+
+    async def run(self) -> None:
+        """Бесконечный цикл разбора outbox (останавливается отменой задачи)."""
+        while True:
+            self._wakeup.clear()
+            try:
+                processed = await self.drain_once()
+            except Exception as exc:  # noqa: BLE001
+                logger.error("Ошибка разбора outbox: %s", exc, exc_info=True)
+                processed = 0
+
+            # Полная пачка - вероятно, есть еще, продолжаем без ожидания
+            if processed >= self.batch_size:
+                continue
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
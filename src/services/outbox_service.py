@@ -0,0 +1,93 @@
+import logging
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxService:
+    """Сервис для работы с очередью исходящих уведомлений."""
+
+    @staticmethod
+    def enqueue(session: AsyncSession, chat_id: int, text: str) -> OutboxMessage:
+        """Добавить уведомление в outbox.
+
+        Коммит не выполняется: сообщение сохраняется в той же транзакции,
+        что и бизнес-изменение, которое его породило.
+        """
+        message = OutboxMessage(
+            chat_id=chat_id,
+            text=text,
+            is_sent=False,
+            attempts=0,
+            next_attempt_at=datetime.utcnow(),
+            created_at=datetime.utcnow(),
+        )
+        session.add(message)
+        return message
+
+    @staticmethod
+    async def fetch_batch(
+        session: AsyncSession, limit: int = 50, max_attempts: int = 10
+    ) -> List[OutboxMessage]:
+        """Получить пачку неотправленных уведомлений, готовых к отправке."""
+        stmt = (
+            select(OutboxMessage)
+            .where(
+                OutboxMessage.is_sent.is_(False),
+                OutboxMessage.next_attempt_at <= datetime.utcnow(),
+                OutboxMessage.attempts < max_attempts,
+            )
+            .order_by(OutboxMessage.next_attempt_at, OutboxMessage.id)
+            .limit(limit)
+            # На Postgres несколько инстансов не заберут одни и те же строки
+            .with_for_update(skip_locked=True)
+        )
+        result = await session.execute(stmt)
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def claim_batch(
+        session: AsyncSession, limit: int = 50, max_attempts: int = 10, lease: float = 60.0
+    ) -> List[OutboxMessage]:
+        """Забрать пачку на отправку: отложить ее строки на lease секунд.
+
+        Вызывающий коммитит сразу после выбора, и блокировки строк снимаются
+        до отправки. Если процесс упадет, не записав результат, сообщения
+        вернутся в очередь по истечении lease.
+        """
+        messages = await OutboxService.fetch_batch(session, limit=limit, max_attempts=max_attempts)
+        leased_until = datetime.utcnow() + timedelta(seconds=lease)
+        for message in messages:
+            message.next_attempt_at = leased_until
+        return messages
+
+    @staticmethod
+    async def get_by_ids(session: AsyncSession, ids: List[int]) -> List[OutboxMessage]:
+        result = await session.execute(select(OutboxMessage).where(OutboxMessage.id.in_(ids)))
+        return list(result.scalars().all())
+
+    @staticmethod
+    def mark_sent(message: OutboxMessage) -> None:
+        message.is_sent = True
+        message.sent_at = datetime.utcnow()
+        message.last_error = None
+
+    @staticmethod
+    def mark_failed(message: OutboxMessage, error: str, base_delay: float, max_delay: float) -> None:
+        """Запланировать повторную попытку с экспоненциальной задержкой."""
+        message.attempts += 1
+        delay = min(base_delay * (2 ** (message.attempts - 1)), max_delay)
+        message.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+        message.last_error = error[:1000]
+
+    @staticmethod
+    def mark_dropped(message: OutboxMessage, error: str, max_attempts: int) -> None:
+        """Больше не пытаться отправить сообщение."""
+        message.attempts = max_attempts
+        message.last_error = error[:1000]
@@ -1,12 +1,14 @@
 import logging
 import uuid
 from datetime import datetime
+from html import escape
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from src.database.models import Card, Purchase, User
+from src.services.outbox_service import OutboxService
 
 logger = logging.getLogger(__name__)
 
@@ -28,8 +30,9 @@ class PaymentService:
             created_at=datetime.utcnow(),
         )
         session.add(purchase)
-        await session.commit()
+        await session.flush()
         await session.refresh(purchase)
+        await session.commit()
         logger.info("Создан инвойс %s на сумму %.2f для карточки %s", invoice_id, amount, card_id)
         return purchase
 
@@ -58,6 +61,16 @@ class PaymentService:
 
         seller.balance += purchase.amount
         purchase.is_paid = True
+        # Уведомление продавцу фиксируется в той же транзакции, что и зачисление;
+        # текст уходит с parse_mode HTML, поэтому пользовательские строки экранируются
+        OutboxService.enqueue(
+            session,
+            chat_id=seller.telegram_id,
+            text=(
+                f"💰 Ваш товар «{escape(card.title)}» купили!\n"
+                f"На баланс зачислено {purchase.amount:.2f} руб."
+            ),
+        )
         await session.commit()
         logger.info("Платеж по инвойсу %s успешно обработан, баланс продавца обновлен", invoice_id)
         return True
\ No newline at end of file
@@ -0,0 +1,114 @@
+import asyncio
+import logging
+from typing import Optional, Set
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.database.models import Card
+from src.utils.photo_cache import PhotoFileCache, photo_cache
+
+logger = logging.getLogger(__name__)
+
+PENDING_URL_PHOTOS = (
+    select(Card.photo_url)
+    .where(Card.photo_file_id.is_(None), Card.photo_url.like("http%"))
+    .distinct()
+    .limit(bindparam("limit"))
+)
+
+# Core-таблица, а не Card: для ORM-сущности executemany означал бы UPDATE по первичному ключу
+SAVE_FILE_ID = (
+    update(Card.__table__)
+    .where(Card.__table__.c.photo_url == bindparam("url"), Card.__table__.c.photo_file_id.is_(None))
+    .values(photo_file_id=bindparam("file_id"))
+)
+
+
+class PhotoWarmer:
+    """Запись file_id в Card.photo_file_id и прогрев фото, заданных URL.
+
+    file_id, пойманные PhotoCaptureMiddleware при показе карточек, раз в
+    interval записываются в БД одним executemany. Если задан chat_id
+    (приватный чат или канал, где бот может писать), фоновая задача заранее
+    отправляет туда фото карточек, у которых есть только URL, забирает
+    file_id из ответа и удаляет сообщение - пользователи уже получают фото
+    из хранилища Telegram.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        session_pool: async_sessionmaker[AsyncSession],
+        chat_id: Optional[int] = None,
+        interval: float = 60.0,
+        batch_size: int = 20,
+        cache: PhotoFileCache = photo_cache,
+    ):
+        self.bot = bot
+        self.session_pool = session_pool
+        self.chat_id = chat_id
+        self.interval = interval
+        self.batch_size = batch_size
+        self.cache = cache
+        # URL, которые Telegram не смог скачать: не пытаемся снова до перезапуска
+        self._failed: Set[str] = set()
+
+    async def flush(self) -> int:
+        """Записать пойманные file_id. Возвращает число записанных URL."""
+        pending = self.cache.take_pending()
+        if not pending:
+            return 0
+        try:
+            async with self.session_pool() as session:
+                await session.execute(
+                    SAVE_FILE_ID,
+                    [{"url": url, "file_id": file_id} for url, file_id in pending.items()],
+                )
+                await session.commit()
+        except Exception:
+            self.cache.restore_pending(pending)
+            raise
+        return len(pending)
+
+    async def warm_once(self) -> int:
+        """Загрузить в Telegram одну пачку фото, заданных только URL."""
+        if self.chat_id is None:
+            return 0
+        async with self.session_pool() as session:
+            result = await session.execute(
+                PENDING_URL_PHOTOS, {"limit": self.batch_size + len(self._failed)}
+            )
+            urls = [url for url in result.scalars() if url not in self._failed][:self.batch_size]
+
+        warmed = 0
+        for url in urls:
+            try:
+                message = await self.bot.send_photo(
+                    chat_id=self.chat_id, photo=url, disable_notification=True
+                )
+            except TelegramBadRequest as exc:
+                self._failed.add(url)
+                logger.warning("Не удалось загрузить фото %s: %s", url, exc)
+                continue
+            self.cache.remember(url, message.photo[-1].file_id)
+            warmed += 1
+            try:
+                await self.bot.delete_message(chat_id=self.chat_id, message_id=message.message_id)
+            except TelegramBadRequest:
+                pass
+        return warmed
+
+    async def run(self) -> None:
+        """Периодическая запись и прогрев (останавливается отменой задачи)."""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                warmed = await self.warm_once()
+                saved = await self.flush()
+                if warmed or saved:
+                    logger.info("Фото: прогрето %s, записано file_id %s", warmed, saved)
+            except Exception as exc:  # noqa: BLE001
+                logger.error("Ошибка прогрева фото: %s", exc, exc_info=True)
@@ -0,0 +1,294 @@
+import asyncio
+import logging
+import math
+import re
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import Card
+
+logger = logging.getLogger(__name__)
+
+# Слова из названия весят больше, чем из описания
+TITLE_WEIGHT = 2
+
+
+def tokenize(title: str, description: str) -> Counter:
+    words = Counter()
+    for text, weight in ((title, TITLE_WEIGHT), (description, 1)):
+        for word in re.findall(r"[^\W_]+", (text or "").lower()):
+            if len(word) > 1:
+                words[word] += weight
+    return words
+
+
+Row = Tuple[np.ndarray, np.ndarray]
+Matrix = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+def _build_matrix(rows: Dict[int, Row], vocab_size: int) -> Matrix:
+    """Склеить строки в CSC-матрицу: (id карточек, colptr, позиции, веса)."""
+    ids = np.fromiter(rows.keys(), dtype=np.int64, count=len(rows))
+    values = list(rows.values())
+    if values:
+        indices = np.concatenate([row[0] for row in values])
+        data = np.concatenate([row[1] for row in values])
+        positions = np.repeat(
+            np.arange(len(values), dtype=np.int32),
+            [len(row_indices) for row_indices, _ in values],
+        )
+    else:
+        indices = np.zeros(0, np.int32)
+        data = np.zeros(0, np.float32)
+        positions = np.zeros(0, np.int32)
+    # Транспонирование CSR -> CSC: стабильная сортировка ненулевых по слову
+    order = np.argsort(indices, kind="stable")
+    colptr = np.zeros(vocab_size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(indices, minlength=vocab_size), out=colptr[1:])
+    return ids, colptr, positions[order], data[order]
+
+
+def _matrix_scores(matrix: Matrix, row: Row) -> np.ndarray:
+    """Скалярные произведения строки со всеми строками матрицы."""
+    _, colptr, positions, data = matrix
+    row_indices, row_data = row
+    # Слова, появившиеся после сборки матрицы, в ней не встречаются
+    known = row_indices < len(colptr) - 1
+    starts, ends = colptr[row_indices[known]], colptr[row_indices[known] + 1]
+    ranges = [np.arange(start, end) for start, end in zip(starts, ends)]
+    postings = np.concatenate(ranges) if ranges else np.zeros(0, np.int64)
+    weights = np.repeat(row_data[known], ends - starts) * data[postings]
+    return np.bincount(positions[postings], weights=weights, minlength=len(matrix[0]))
+
+
+class Recommender:
+    """Похожие карточки по TF-IDF названий и описаний.
+
+    Векторы одобренных карточек хранятся построчно (индексы слов и веса,
+    нормированные по L2) и склеиваются в разреженную матрицу по столбцам
+    (CSC, обратный индекс слово -> карточки) из трех массивов NumPy.
+    Сходство карточки со всеми остальными - сумма по спискам карточек только
+    ее слов, без плотных промежуточных массивов размером с матрицу: память
+    на запрос - O(карточек). Top-k для карточки кэшируется.
+
+    Одобрение, правка и снятие карточки матрицу не перестраивают: карточка
+    попадает в список измененных, ее строка в матрице не учитывается, а
+    сходство с новым вектором считается по маленькой матрице измененных
+    карточек. Из кэша удаляются только
+    записи, на которые изменение могло повлиять. Когда измененных набирается
+    max_pending, матрица пересобирается в отдельном потоке и подменяется.
+    """
+
+    def __init__(self, top_k: int = 5, cache_size: int = 10000, max_pending: int = 1000):
+        self.top_k = top_k
+        self.cache_size = cache_size
+        self.max_pending = max_pending
+        self._vocab: Dict[str, int] = {}
+        self._idf = np.zeros(0, dtype=np.float32)
+        self._rows: Dict[int, Row] = {}
+        self._cache: "OrderedDict[int, List[int]]" = OrderedDict()
+        # Сходство с последней карточкой закэшированного top-k (0 - список неполный)
+        self._floors: Dict[int, float] = {}
+        self._matrix: Optional[Matrix] = None
+        # id карточки -> номер ее строки в матрице
+        self._positions: Dict[int, int] = {}
+        # Карточки, чьи строки в матрице устарели или отсутствуют
+        self._pending: Set[int] = set()
+        # Матрица измененных карточек и номера устаревших строк основной
+        self._delta: Optional[Tuple[Matrix, np.ndarray]] = None
+        self._compaction: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    async def load(self, session: AsyncSession) -> None:
+        """Построить векторы по всем одобренным карточкам (в отдельном потоке)."""
+        result = await session.execute(
+            select(Card.id, Card.title, Card.description).where(Card.is_approved.is_(True))
+        )
+        rows = result.all()
+        await asyncio.to_thread(self.build, rows)
+        logger.info("Рекомендации: векторизовано карточек %s, слов %s", len(self._rows), len(self._vocab))
+
+    def build(self, cards: Iterable[Tuple[int, str, str]]) -> None:
+        documents = [(card_id, tokenize(title, description)) for card_id, title, description in cards]
+        document_frequency: Counter = Counter()
+        for _, words in documents:
+            document_frequency.update(words.keys())
+
+        total = len(documents)
+        vocab = {word: index for index, word in enumerate(document_frequency)}
+        idf = np.array(
+            [math.log((1 + total) / (1 + document_frequency[word])) + 1 for word in vocab],
+            dtype=np.float32,
+        )
+        self._vocab, self._idf = vocab, idf
+        rows = {}
+        for card_id, words in documents:
+            row = self._vectorize(words)
+            if row is not None:
+                rows[card_id] = row
+        self._rows = rows
+        self._swap(rows, _build_matrix(rows, len(self._idf)))
+        self._cache.clear()
+        self._floors.clear()
+
+    def _vectorize(self, words: Counter) -> Optional[Row]:
+        if not words:
+            return None
+        new_words = [word for word in words if word not in self._vocab]
+        if new_words:
+            # Слово, которого не было при построении, считаем редким
+            rare_idf = float(self._idf.max()) if len(self._idf) else 1.0
+            for word in new_words:
+                self._vocab[word] = len(self._vocab)
+            self._idf = np.concatenate([self._idf, np.full(len(new_words), rare_idf, dtype=np.float32)])
+
+        indices = np.fromiter((self._vocab[word] for word in words), dtype=np.int32, count=len(words))
+        order = np.argsort(indices)
+        indices = indices[order]
+        data = np.fromiter(words.values(), dtype=np.float32, count=len(words))[order]
+        data *= self._idf[indices]
+        data /= np.linalg.norm(data)
+        return indices, data
+
+    def update(self, card_id: int, title: str, description: str) -> None:
+        """Пересчитать вектор одобренной карточки."""
+        row = self._vectorize(tokenize(title, description))
+        if row is None:
+            self.remove(card_id)
+            return
+        self._rows[card_id] = row
+        self._pending.add(card_id)
+        self._delta = None
+        self._evict(card_id)
+        # Карточка вытесняет последнего в top-k тех, кому она ближе него
+        ids, scores = self._scores(card_id)
+        related = scores > 0
+        for neighbour, score in zip(ids[related].tolist(), scores[related].tolist()):
+            if neighbour in self._cache and score >= self._floors[neighbour]:
+                self._forget(neighbour)
+        self._maybe_compact()
+
+    def remove(self, card_id: int) -> None:
+        if self._rows.pop(card_id, None) is not None:
+            self._pending.add(card_id)
+            self._delta = None
+            self._evict(card_id)
+            self._maybe_compact()
+
+    def _evict(self, card_id: int) -> None:
+        """Удалить из кэша саму карточку и списки, в которые она входит."""
+        self._forget(card_id)
+        for cached_id in [key for key, similar in self._cache.items() if card_id in similar]:
+            self._forget(cached_id)
+
+    def _forget(self, card_id: int) -> None:
+        self._cache.pop(card_id, None)
+        self._floors.pop(card_id, None)
+
+    def _swap(self, rows: Dict[int, Row], matrix: Matrix) -> None:
+        """Подменить матрицу, собранную по снимку строк rows."""
+        self._matrix = matrix
+        self._positions = {card_id: position for position, card_id in enumerate(matrix[0].tolist())}
+        # Строки, измененные после снимка, остаются в списке измененных
+        self._pending = {
+            card_id for card_id in self._pending if self._rows.get(card_id) is not rows.get(card_id)
+        }
+        self._delta = None
+
+    def _maybe_compact(self) -> None:
+        if len(self._pending) < self.max_pending or self._compaction is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Вне event loop (скрипты, тесты) - просто пересобрать на месте
+            rows = dict(self._rows)
+            self._swap(rows, _build_matrix(rows, len(self._idf)))
+            return
+        self._compaction = loop.create_task(self.compact())
+
+    async def compact(self) -> None:
+        """Пересобрать матрицу в отдельном потоке и подменить ее."""
+        rows = dict(self._rows)
+        try:
+            matrix = await asyncio.to_thread(_build_matrix, rows, len(self._idf))
+        except Exception as exc:  # noqa: BLE001
+            logger.error("Ошибка пересборки матрицы рекомендаций: %s", exc, exc_info=True)
+        else:
+            self._swap(rows, matrix)
+        finally:
+            self._compaction = None
+
+    def _csc(self) -> Matrix:
+        if self._matrix is None:
+            self._swap(dict(self._rows), _build_matrix(self._rows, len(self._idf)))
+        return self._matrix
+
+    def _overlay(self) -> Tuple[Matrix, np.ndarray]:
+        if self._delta is None:
+            fresh = {card_id: self._rows[card_id] for card_id in self._pending if card_id in self._rows}
+            stale = [self._positions[card_id] for card_id in self._pending if card_id in self._positions]
+            self._delta = (_build_matrix(fresh, len(self._idf)), np.array(stale, dtype=np.int64))
+        return self._delta
+
+    def _scores(self, card_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Id карточек-кандидатов и скалярные произведения с вектором карточки."""
+        matrix = self._csc()
+        row = self._rows[card_id]
+        scores = _matrix_scores(matrix, row)
+        if not self._pending:
+            return matrix[0], scores
+
+        delta, stale = self._overlay()
+        scores[stale] = 0.0
+        return (
+            np.concatenate([matrix[0], delta[0]]),
+            np.concatenate([scores, _matrix_scores(delta, row)]),
+        )
+
+    def _compute(self, card_ids: Sequence[int]) -> Dict[int, Tuple[List[int], float]]:
+        """Top-k для пачки карточек по обратному индексу и сходство с последней в нем."""
+        result: Dict[int, Tuple[List[int], float]] = {card_id: ([], 0.0) for card_id in card_ids}
+        for card_id in card_ids:
+            if card_id not in self._rows:
+                continue
+            ids, row_scores = self._scores(card_id)
+            if len(ids) < 2:
+                continue
+            k = min(self.top_k, len(ids) - 1)
+            row_scores[ids == card_id] = -1.0
+            top = np.argpartition(-row_scores, k - 1)[:k]
+            top = top[np.argsort(-row_scores[top])]
+            top = [index for index in top if row_scores[index] > 0]
+            floor = float(row_scores[top[-1]]) if len(top) == self.top_k else 0.0
+            result[card_id] = ([int(ids[index]) for index in top], floor)
+        return result
+    def _remember(self, card_id: int, similar: List[int], floor: float) -> None:
+        self._cache[card_id] = similar
+        self._floors[card_id] = floor
+        self._cache.move_to_end(card_id)
+        while len(self._cache) > self.cache_size:
+            evicted, _ = self._cache.popitem(last=False)
+            del self._floors[evicted]
+
+    def similar(self, card_id: int) -> List[int]:
+        """Id похожих одобренных карточек, самые похожие первыми."""
+        cached = self._cache.get(card_id)
+        if cached is not None:
+            self._cache.move_to_end(card_id)
+            return cached
+        similar, floor = self._compute([card_id])[card_id]
+        self._remember(card_id, similar, floor)
+        return similar
+
+    def precompute(self, card_ids: Sequence[int], batch_size: int = 64) -> None:
+        """Заполнить кэш для списка карточек пачками (например, для популярных)."""
+        for start in range(0, len(card_ids), batch_size):
+            for card_id, (similar, floor) in self._compute(card_ids[start:start + batch_size]).items():
+                self._remember(card_id, similar, floor)
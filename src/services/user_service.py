@@ -1,11 +1,14 @@
 import logging
-from typing import List, Optional
+from typing import Any, List, Optional, Tuple
 
 from sqlalchemy import func, select, update
 from sqlalchemy import Integer
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
+from src.database.keyset import NavigationStep, fetch_step
 from src.database.models import Card, User, WithdrawalRequest
+from src.database.queries import USER_BY_TELEGRAM_ID, WITHDRAWAL_STEPS
 
 logger = logging.getLogger(__name__)
 
@@ -23,8 +26,7 @@ class UserService:
         admin_ids: Optional[List[int]] = None,
     ) -> User:
         """Получить пользователя или создать нового."""
-        stmt = select(User).where(User.telegram_id == telegram_id)
-        result = await session.execute(stmt)
+        result = await session.execute(USER_BY_TELEGRAM_ID, {"telegram_id": telegram_id})
         user = result.scalar_one_or_none()
 
         if not user:
@@ -36,8 +38,9 @@ class UserService:
                 is_admin=telegram_id in (admin_ids or []),
             )
             session.add(user)
-            await session.commit()
+            await session.flush()
             await session.refresh(user)
+            await session.commit()
             logger.info("Создан пользователь %s (admin=%s)", telegram_id, user.is_admin)
         else:
             # Обновляем флаг админа, если изменился конфиг
@@ -86,12 +89,44 @@ class UserService:
             user_id=user.id,
         )
         session.add(request)
-        await session.commit()
+        await session.flush()
         await session.refresh(request)
+        await session.commit()
         logger.info("Создана заявка на вывод %s для пользователя %s", request.id, user.id)
         return request
 
     @staticmethod
+    async def get_pending_withdrawal_requests(session: AsyncSession) -> List[WithdrawalRequest]:
+        """Необработанные заявки на вывод (новые первыми) с пользователями."""
+        stmt = (
+            select(WithdrawalRequest)
+            .options(selectinload(WithdrawalRequest.user))
+            .where(WithdrawalRequest.is_processed.is_(False))
+            .order_by(WithdrawalRequest.created_at.desc())
+        )
+        result = await session.execute(stmt)
+        return result.scalars().all()
+
+    @staticmethod
+    async def withdrawal_step(
+        session: AsyncSession, cursor: Optional[Tuple[Any, int]] = None, forward: bool = True
+    ) -> Optional[NavigationStep]:
+        """Соседняя необработанная заявка (новые первыми), курсор - (created_at, id)."""
+        stmt = WITHDRAWAL_STEPS[(forward, cursor is not None)]
+        return await fetch_step(session, stmt, {}, cursor, lambda columns: columns[0])
+
+    @staticmethod
+    async def get_withdrawal_request(
+        session: AsyncSession, request_id: int
+    ) -> Optional[WithdrawalRequest]:
+        stmt = (
+            select(WithdrawalRequest)
+            .options(selectinload(WithdrawalRequest.user))
+            .where(WithdrawalRequest.id == request_id)
+        )
+        result = await session.execute(stmt)
+        return result.scalar_one_or_none()
+
     @staticmethod
     async def get_statistics(session: AsyncSession):
         """Получить статистику по пользователям и карточкам."""
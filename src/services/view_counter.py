@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+RECOMPUTE_POPULARITY = text(
+    "UPDATE cards SET popularity = popularity * :decay + recent_views, recent_views = 0 "
+    "WHERE recent_views > 0 OR popularity > :epsilon"
+)
+
+
+def _bulk_update_sql(rows: int) -> str:
+    # CTE со списком колонок понимают и Postgres, и SQLite (в отличие от VALUES ... AS v(id, n))
+    values = ", ".join(
+        f"(CAST(:id_{i} AS INTEGER), CAST(:n_{i} AS INTEGER))" for i in range(rows)
+    )
+    return (
+        f"WITH v(id, n) AS (VALUES {values}) "
+        "UPDATE cards SET view_count = cards.view_count + v.n, "
+        "recent_views = cards.recent_views + v.n "
+        "FROM v WHERE cards.id = v.id"
+    )
+
+
+class ViewCounter:
+    """Буферизованные счетчики просмотров карточек.
+
+    Хендлеры только увеличивают счетчик в памяти; раз в flush_interval
+    накопленное пишется в БД одним UPDATE ... FROM (VALUES ...) на пачку.
+    Раз в popularity_interval фоновая задача пересчитывает затухающую
+    популярность: popularity = popularity * 0.5 ** (прошло / half_life) + новые просмотры.
+    Просмотры, не сброшенные до падения процесса, теряются - это допустимо.
+    """
+
+    def __init__(
+        self,
+        session_pool: async_sessionmaker[AsyncSession],
+        flush_interval: float = 10.0,
+        popularity_interval: float = 600.0,
+        half_life: float = 86400.0,
+        batch_size: int = 500,
+    ):
+        self.session_pool = session_pool
+        self.flush_interval = flush_interval
+        self.popularity_interval = popularity_interval
+        self.half_life = half_life
+        self.batch_size = batch_size
+        self._pending: Dict[int, int] = {}
+        self._recomputed_at = time.monotonic()
+
+    def record(self, card_id: int) -> None:
+        self._pending[card_id] = self._pending.get(card_id, 0) + 1
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def flush(self) -> int:
+        """Записать накопленные просмотры. Возвращает число обновленных карточек."""
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        items: List[Tuple[int, int]] = list(pending.items())
+        try:
+            async with self.session_pool() as session:
+                for start in range(0, len(items), self.batch_size):
+                    chunk = items[start:start + self.batch_size]
+                    params = {}
+                    for i, (card_id, views) in enumerate(chunk):
+                        params[f"id_{i}"] = card_id
+                        params[f"n_{i}"] = views
+                    await session.execute(text(_bulk_update_sql(len(chunk))), params)
+                await session.commit()
+        except Exception:
+            # Вернуть просмотры в буфер, чтобы записать их в следующий раз
+            for card_id, views in items:
+                self._pending[card_id] = self._pending.get(card_id, 0) + views
+            raise
+        return len(items)
+
+    async def recompute_popularity(self) -> None:
+        now = time.monotonic()
+        decay = 0.5 ** ((now - self._recomputed_at) / self.half_life)
+        self._recomputed_at = now
+        async with self.session_pool() as session:
+            await session.execute(RECOMPUTE_POPULARITY, {"decay": decay, "epsilon": 1e-3})
+            await session.commit()
+
+    async def run(self) -> None:
+        """Периодический сброс и пересчет (останавливается отменой задачи)."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                flushed = await self.flush()
+                if flushed:
+                    logger.debug("Записаны просмотры %s карточек", flushed)
+                if time.monotonic() - self._recomputed_at >= self.popularity_interval:
+                    await self.recompute_popularity()
+                    logger.info("Популярность карточек пересчитана")
+            except Exception as exc:  # noqa: BLE001
+                logger.error("Ошибка записи просмотров: %s", exc, exc_info=True)
@@ -0,0 +1,91 @@
+import asyncio
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.utils.loop_monitor import LoopLagMonitor
+
+
+def pool_status(engine: AsyncEngine) -> Dict[str, int]:
+    """Состояние пула соединений (для пулов без счетчиков - пустой словарь)."""
+    pool = engine.sync_engine.pool
+    status = {}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if callable(method):
+            status[name] = method()
+    return status
+
+
+class HealthState:
+    """Сведения для /healthz и /readyz."""
+
+    def __init__(
+        self,
+        loop_monitor: Optional[LoopLagMonitor] = None,
+        engine: Optional[AsyncEngine] = None,
+        max_loop_lag: float = 1.0,
+        max_update_age: float = 0.0,
+        db_timeout: float = 2.0,
+    ):
+        self.loop_monitor = loop_monitor
+        self.engine = engine
+        self.max_loop_lag = max_loop_lag
+        self.max_update_age = max_update_age
+        self.db_timeout = db_timeout
+        self.started_at = time.monotonic()
+        self.last_update_at: Optional[float] = None
+
+    def mark_update(self) -> None:
+        self.last_update_at = time.monotonic()
+
+    @property
+    def update_age(self) -> Optional[float]:
+        if self.last_update_at is None:
+            return None
+        return time.monotonic() - self.last_update_at
+
+    def snapshot(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {
+            "uptime_s": round(time.monotonic() - self.started_at, 3),
+            "last_update_age_s": None if self.update_age is None else round(self.update_age, 3),
+        }
+        if self.loop_monitor is not None:
+            data["loop_lag_s"] = round(self.loop_monitor.last_lag, 4)
+            data["loop_lag_max_s"] = round(self.loop_monitor.max_lag, 4)
+            data["loop_lag_max_window_s"] = self.loop_monitor.max_window
+            data["loop_stalls"] = self.loop_monitor.stalls
+        if self.engine is not None:
+            data["db_pool"] = pool_status(self.engine)
+        return data
+
+    async def _ping_db(self) -> None:
+        async with self.engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def _check_db(self) -> Optional[str]:
+        if self.engine is None:
+            return None
+        try:
+            await asyncio.wait_for(self._ping_db(), self.db_timeout)
+        except Exception as e:  # noqa: BLE001
+            return f"db: {type(e).__name__}: {e}"
+        return None
+
+    async def readiness(self) -> Tuple[bool, Dict[str, Any]]:
+        """Готов ли бот принимать трафик и почему нет."""
+        problems = []
+        db_problem = await self._check_db()
+        if db_problem:
+            problems.append(db_problem)
+        if self.loop_monitor is not None and self.loop_monitor.last_lag > self.max_loop_lag:
+            problems.append(f"loop lag {self.loop_monitor.last_lag:.3f} s > {self.max_loop_lag} s")
+        age = self.update_age
+        if self.max_update_age and age is not None and age > self.max_update_age:
+            problems.append(f"нет апдейтов {age:.0f} s")
+
+        data = self.snapshot()
+        data["problems"] = problems
+        return not problems, data
@@ -0,0 +1,92 @@
+import time
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional, Sequence
+
+from src.database.search import search_terms
+
+
+class _Entry(NamedTuple):
+    expires_at: float
+    cards: Sequence
+    complete: bool
+
+
+def normalize_query(query: str) -> str:
+    """Ключ кэша: слова запроса в том виде, в каком их ищет CardService.search."""
+    return " ".join(search_terms(query))
+
+
+def matches(card, terms: List[str]) -> bool:
+    """Та же семантика, что у полнотекстового поиска: каждое слово - префикс слова карточки."""
+    words = search_terms(f"{card.title} {card.description}")
+    return all(any(word.startswith(term) for word in words) for term in terms)
+
+
+class InlineResultCache:
+    """TTL/LRU-кеш результатов инлайн-запросов по префиксам.
+
+    Инлайн-запросы приходят на каждое нажатие клавиши: «кв», «ква», «квас».
+    Если для более короткого префикса в кеше лежит полный список совпадений
+    (complete - база вернула меньше лимита), результат для длинного запроса
+    отфильтровывается из него в памяти без обращения к БД.
+    """
+
+    def __init__(self, maxsize: int = 1000):
+        self.maxsize = maxsize
+        self._items: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.hits = 0
+        self.prefix_hits = 0
+        self.misses = 0
+
+    def get(self, query: str) -> Optional[Sequence]:
+        key = normalize_query(query)
+        now = time.monotonic()
+        entry = self._fresh(key, now)
+        if entry is not None:
+            self.hits += 1
+            return entry.cards
+
+        terms = key.split()
+        for end in range(len(key) - 1, -1, -1):
+            prefix_entry = self._fresh(key[:end], now)
+            if prefix_entry is not None and prefix_entry.complete:
+                self.prefix_hits += 1
+                cards = [card for card in prefix_entry.cards if matches(card, terms)]
+                self._store(key, _Entry(prefix_entry.expires_at, cards, True))
+                return cards
+
+        self.misses += 1
+        return None
+
+    def put(self, query: str, cards: Sequence, complete: bool, ttl: float) -> None:
+        key = normalize_query(query)
+        # Под пустым ключом лежит весь каталог: от него фильтруются любые запросы.
+        # Запрос из одних знаков препинания дает тот же ключ, но не каталог - не кэшируем
+        if not key and query.strip():
+            return
+        self._store(key, _Entry(time.monotonic() + ttl, list(cards), complete))
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    def _fresh(self, key: str, now: float) -> Optional[_Entry]:
+        entry = self._items.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= now:
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return entry
+
+    def _store(self, key: str, entry: _Entry) -> None:
+        self._items[key] = entry
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+inline_cache = InlineResultCache()
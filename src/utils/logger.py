@@ -1,23 +1,153 @@
+import copy
+import json
 import logging
-import sys
-from logging.handlers import RotatingFileHandler
 import os
+import queue
+import random
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Dict, Mapping, Optional
+
+# Контекст текущего апдейта (update_id, user_id), попадает в каждую запись лога
+log_context: ContextVar[Mapping[str, Any]] = ContextVar("log_context", default={})
+
+CONTEXT_FIELDS = ("update_id", "user_id")
+
+
+class DropOldestQueue(queue.Queue):
+    """Ограниченная очередь: при переполнении выбрасывается самая старая запись.
+
+    Event loop никогда не ждет на записи в лог, даже если диск не успевает.
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        super().__init__(maxsize)
+        self.dropped = 0
+
+    def put_nowait(self, item: Any) -> None:
+        while True:
+            try:
+                super().put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+
+class ContextFilter(logging.Filter):
+    """Добавляет в запись поля из log_context.
+
+    Вешается на QueueHandler, т.е. выполняется в потоке, где вызван логгер,
+    пока ContextVar еще доступен.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = log_context.get()
+        for name in CONTEXT_FIELDS:
+            setattr(record, name, context.get(name))
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускает только долю INFO/DEBUG записей от «болтливых» логгеров.
+
+    rates: {"aiogram.event": 0.1} - префикс имени логгера и доля записей.
+    WARNING и выше проходят всегда.
+    """
+
+    def __init__(self, rates: Mapping[str, float]):
+        super().__init__()
+        # Сначала более длинные префиксы, чтобы src.services.x перекрывал src.services
+        self.rates = sorted(rates.items(), key=lambda item: -len(item[0]))
 
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        for prefix, rate in self.rates:
+            if record.name == prefix or record.name.startswith(prefix + "."):
+                return random.random() < rate
+        return True
 
-def setup_logger():
-    """Настройка логирования"""
+
+class JsonFormatter(logging.Formatter):
+    """Одна JSON-строка на запись."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for name in CONTEXT_FIELDS:
+            value = getattr(record, name, None)
+            if value is not None:
+                payload[name] = value
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False)
+
+
+class ContextQueueHandler(QueueHandler):
+    """QueueHandler, который сохраняет трейсбек отдельно от текста сообщения.
+
+    Стандартный prepare() склеивает трейсбек с сообщением, из-за чего в JSON
+    он оказывается внутри поля message.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        message = record.getMessage()
+        exc_text = record.exc_text
+        if record.exc_info and not exc_text:
+            exc_text = logging.Formatter().formatException(record.exc_info)
+        record = copy.copy(record)
+        record.message = message
+        record.msg = message
+        record.args = None
+        record.exc_info = None
+        record.exc_text = exc_text
+        return record
+
+
+def parse_sampling(value: str) -> Dict[str, float]:
+    """«aiogram.event=0.1,src.services=0.5» -> {"aiogram.event": 0.1, ...}."""
+    rates = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, _, rate = item.partition("=")
+        rates[name.strip()] = float(rate)
+    return rates
+
+
+def setup_logger(
+    level: str = "INFO",
+    json_format: bool = False,
+    queue_size: int = 10000,
+    sampling: Optional[Mapping[str, float]] = None,
+) -> QueueListener:
+    """Настройка логирования.
+
+    Логгеры пишут в ограниченную очередь, а файл и консоль обслуживает
+    QueueListener в отдельном потоке. Возвращает запущенный listener,
+    который нужно остановить при завершении (listener.stop()).
+    """
     # Создание папки logs если не существует
     if not os.path.exists('logs'):
         os.makedirs('logs')
 
-    logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
-
-    # Форматтер
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    if json_format:
+        formatter: logging.Formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
 
     # Хендлер для файла
     file_handler = RotatingFileHandler(
@@ -27,14 +157,24 @@ def setup_logger():
         encoding='utf-8'
     )
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
 
     # Хендлер для консоли
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+
+    log_queue = DropOldestQueue(queue_size)
+    queue_handler = ContextQueueHandler(log_queue)
+    if sampling:
+        queue_handler.addFilter(SamplingFilter(sampling))
+    queue_handler.addFilter(ContextFilter())
+
+    logger = logging.getLogger()
+    logger.setLevel(level.upper())
+    logger.addHandler(queue_handler)
 
     # Логи для SQLAlchemy
     logging.getLogger('sqlalchemy.engine').setLevel(logging.WARNING)
 
-    return logger
\ No newline at end of file
+    listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    return listener
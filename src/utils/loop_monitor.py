@@ -0,0 +1,122 @@
+"""Мониторинг задержек event loop.
+
+Корутина раз в interval секунд засыпает и измеряет, насколько позже
+запланированного она проснулась - это и есть lag. Если loop заблокирован
+дольше threshold, сторожевой поток снимает стек потока loop и пишет его
+в лог: так видно, какой код держит loop.
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from src.utils.metrics import MetricsRegistry, metrics
+
+logger = logging.getLogger(__name__)
+
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class LoopLagMonitor:
+    def __init__(
+        self,
+        interval: float = 0.1,
+        threshold: float = 0.5,
+        registry: MetricsRegistry = metrics,
+        max_window: float = 60.0,
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        # max_lag - максимум за последние max_window..2*max_window секунд,
+        # чтобы одно давнее зависание не висело в /healthz до перезапуска
+        self.max_window = max_window
+        self.last_lag = 0.0
+        self.stalls = 0
+        self._window_started = time.monotonic()
+        self._window_max = 0.0
+        self._previous_max = 0.0
+        self._histogram = registry.histogram(
+            "bot_event_loop_lag_seconds", "Задержка event loop", buckets=LAG_BUCKETS
+        )
+        self._heartbeat = time.monotonic()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id = 0
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    async def run(self) -> None:
+        """Замер lag; запускается фоновой задачей."""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._start_watchdog()
+        try:
+            while True:
+                expected = time.monotonic() + self.interval
+                await asyncio.sleep(self.interval)
+                now = time.monotonic()
+                self._heartbeat = now
+                self.observe(max(0.0, now - expected))
+        finally:
+            self._stop.set()
+
+    def observe(self, lag: float) -> None:
+        self._rotate(time.monotonic())
+        self.last_lag = lag
+        self._window_max = max(self._window_max, lag)
+        self._histogram.observe(lag)
+
+    def _rotate(self, now: float) -> None:
+        elapsed = now - self._window_started
+        if elapsed < self.max_window:
+            return
+        # Предыдущее окно учитывается, только если оно закончилось только что
+        self._previous_max = self._window_max if elapsed < 2 * self.max_window else 0.0
+        self._window_max = 0.0
+        self._window_started = now
+
+    @property
+    def max_lag(self) -> float:
+        """Максимальный lag за последнее окно (и предыдущее, если оно только что закрылось)."""
+        self._rotate(time.monotonic())
+        return max(self._previous_max, self._window_max)
+
+    @property
+    def blocked_for(self) -> float:
+        """Сколько loop не отвечает прямо сейчас (с учетом интервала сна)."""
+        return max(0.0, time.monotonic() - self._heartbeat - self.interval)
+
+    def _start_watchdog(self) -> None:
+        if self._watchdog is not None and self._watchdog.is_alive():
+            return
+        self._stop.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def _watch(self) -> None:
+        reported_heartbeat = None
+        while not self._stop.wait(self.threshold / 2):
+            heartbeat = self._heartbeat
+            if heartbeat == reported_heartbeat or self.blocked_for < self.threshold:
+                continue
+            # Один отчет на каждое зависание
+            reported_heartbeat = heartbeat
+            self.stalls += 1
+            self._report_stall()
+
+    def _report_stall(self) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else "<нет стека>"
+        try:
+            task = asyncio.current_task(self._loop) if self._loop is not None else None
+        except RuntimeError:
+            task = None
+        logger.warning(
+            "Event loop заблокирован %.3f с (задача %s)\n%s",
+            self.blocked_for,
+            task.get_name() if task is not None else "-",
+            stack,
+        )
@@ -0,0 +1,183 @@
+import math
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+# Бакеты в секундах: от 1 мс до 10 с
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+COUNT_BUCKETS: Tuple[float, ...] = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+LabelsKey = Tuple[Tuple[str, str], ...]
+GaugeValue = Union[float, Mapping[LabelsKey, float]]
+
+
+def _labels_key(labels: Mapping[str, object]) -> LabelsKey:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    parts = []
+    for key, value in labels:
+        escaped = value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{escaped}"')
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Histogram:
+    """Гистограмма с фиксированными бакетами.
+
+    Блокировки не нужны: все наблюдения делаются из потока event loop,
+    а observe - это несколько операций над списком без await.
+    """
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Оценка квантиля по верхней границе бакета."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return math.inf
+
+
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class MetricsRegistry:
+    """Реестр метрик с выводом в текстовом формате Prometheus."""
+
+    def __init__(self) -> None:
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._histograms: Dict[str, Dict[LabelsKey, Histogram]] = {}
+        self._counters: Dict[str, Dict[LabelsKey, Counter]] = {}
+        self._callbacks: Dict[str, Callable[[], GaugeValue]] = {}
+
+    def _describe(self, name: str, kind: str, documentation: str) -> None:
+        known = self._help.get(name)
+        if known is not None and known[0] != kind:
+            raise ValueError(f"Метрика {name} уже зарегистрирована как {known[0]}")
+        self._help[name] = (kind, documentation)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str = "",
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+        **labels: object,
+    ) -> Histogram:
+        series = self._histograms.get(name)
+        if series is None:
+            self._describe(name, "histogram", documentation)
+            series = self._histograms[name] = {}
+        key = _labels_key(labels)
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram(buckets)
+        return histogram
+
+    def counter(self, name: str, documentation: str = "", **labels: object) -> Counter:
+        series = self._counters.get(name)
+        if series is None:
+            self._describe(name, "counter", documentation)
+            series = self._counters[name] = {}
+        key = _labels_key(labels)
+        counter = series.get(key)
+        if counter is None:
+            counter = series[key] = Counter()
+        return counter
+
+    def register_callback(
+        self,
+        name: str,
+        callback: Callable[[], GaugeValue],
+        documentation: str = "",
+        kind: str = "gauge",
+    ) -> None:
+        """Метрика, значение которой вычисляется в момент выгрузки.
+
+        callback возвращает число или словарь {labels_key: value}.
+        """
+        self._describe(name, kind, documentation)
+        self._callbacks[name] = callback
+
+    def render(self) -> str:
+        lines: List[str] = []
+
+        def header(name: str) -> None:
+            kind, documentation = self._help[name]
+            if documentation:
+                lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for name, series in sorted(self._counters.items()):
+            header(name)
+            for key, counter in series.items():
+                lines.append(f"{name}{_format_labels(key)} {_format_value(counter.value)}")
+
+        for name, series in sorted(self._histograms.items()):
+            header(name)
+            for key, histogram in series.items():
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (math.inf,), histogram.counts):
+                    cumulative += count
+                    bucket_labels = key + (("le", _format_value(bound)),)
+                    lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(key)} {_format_value(histogram.sum)}")
+                lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+
+        for name, callback in sorted(self._callbacks.items()):
+            value = callback()
+            header(name)
+            if isinstance(value, Mapping):
+                for key, item in value.items():
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(item)}")
+            else:
+                lines.append(f"{name} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+def labels(**values: object) -> LabelsKey:
+    """Ключ меток для значений, возвращаемых из register_callback."""
+    return _labels_key(values)
+
+
+def get_histogram(
+    registry: Optional[MetricsRegistry], name: str, **label_values: object
+) -> Optional[Histogram]:
+    """Найти уже созданную гистограмму (для тестов и отчетов)."""
+    registry = registry or metrics
+    return registry._histograms.get(name, {}).get(_labels_key(label_values))
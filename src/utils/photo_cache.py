@@ -0,0 +1,60 @@
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+def is_url(photo: Optional[str]) -> bool:
+    return bool(photo) and photo.startswith(("http://", "https://"))
+
+
+class PhotoFileCache:
+    """file_id фото, которые отправлялись по URL.
+
+    Фото по URL Telegram скачивает заново при каждой отправке, а по file_id
+    берет из своего хранилища. Первый ответ Bot API на отправку по URL
+    содержит file_id; он запоминается здесь (LRU по URL) и попадает в очередь
+    на запись в Card.photo_file_id (см. PhotoWarmer.flush).
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._items: "OrderedDict[str, str]" = OrderedDict()
+        self._pending: Dict[str, str] = {}
+
+    def photo_for(self, card) -> Optional[str]:
+        """Что отправлять для карточки: file_id, если он известен, иначе URL."""
+        if card.photo_file_id:
+            return card.photo_file_id
+        file_id = self._items.get(card.photo_url) if card.photo_url else None
+        if file_id is not None:
+            self._items.move_to_end(card.photo_url)
+            return file_id
+        return card.photo_url
+
+    def remember(self, url: str, file_id: str) -> None:
+        if self._items.get(url) == file_id:
+            return
+        self._items[url] = file_id
+        self._items.move_to_end(url)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+        self._pending[url] = file_id
+
+    def take_pending(self) -> Dict[str, str]:
+        """Забрать накопленные пары URL -> file_id для записи в БД."""
+        pending, self._pending = self._pending, {}
+        return pending
+
+    def restore_pending(self, pending: Dict[str, str]) -> None:
+        """Вернуть пары в очередь после неудачной записи."""
+        for url, file_id in pending.items():
+            self._pending.setdefault(url, file_id)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+photo_cache = PhotoFileCache()
@@ -0,0 +1,224 @@
+"""Профилирование работающего бота по команде администратора.
+
+CPU: отдельный поток раз в interval секунд снимает стек потока event loop
+(sys._current_frames) и копит collapsed stacks - формат, который понимают
+flamegraph.pl и speedscope. Память: разница двух снимков tracemalloc.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from typing import Optional, Tuple
+
+from aiogram import Bot
+from aiogram.types import BufferedInputFile
+
+logger = logging.getLogger(__name__)
+
+# Кадры, в которых event loop ждет событий: такие сэмплы не интересны
+IDLE_FRAMES = {("selectors.py", "select"), ("base_events.py", "_run_once")}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Статистический профайлер одного потока."""
+
+    def __init__(self, interval: float = 0.005, include_idle: bool = False):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._target_id = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self, thread_id: Optional[int] = None) -> None:
+        self._target_id = thread_id or threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target_id)
+            if frame is None:
+                continue
+            code = frame.f_code
+            if not self.include_idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """Стеки в формате «корень;...;лист число»."""
+        return "\n".join(
+            f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common()
+        ) + "\n"
+
+
+class MemoryDiff:
+    """Разница аллокаций между двумя снимками tracemalloc."""
+
+    def __init__(self, frames: int = 25):
+        self.frames = frames
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._started_tracing = False
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracing = True
+        self._baseline = tracemalloc.take_snapshot()
+
+    def stop(self, limit: int = 50) -> str:
+        snapshot = tracemalloc.take_snapshot()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ]
+        stats = snapshot.filter_traces(filters).compare_to(
+            self._baseline.filter_traces(filters), "traceback"
+        )
+        self._baseline = None
+
+        growth = sum(stat.size_diff for stat in stats)
+        lines = [f"Прирост памяти: {growth / 1024:.1f} KiB, топ-{limit} мест аллокаций", ""]
+        for stat in stats[:limit]:
+            lines.append(
+                f"{stat.size_diff / 1024:+.1f} KiB ({stat.count_diff:+d} блоков), "
+                f"всего {stat.size / 1024:.1f} KiB"
+            )
+            lines.extend(f"    {line}" for line in stat.traceback.format(most_recent_first=True))
+            lines.append("")
+        return "\n".join(lines)
+
+
+class ProfilerController:
+    """Одна активная сессия профилирования с доставкой результата в чат.
+
+    Сессия заканчивается через seconds секунд или после updates апдейтов
+    (их отсчитывает ProfilerMiddleware), либо по команде остановки.
+    """
+
+    MODES = ("cpu", "mem")
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.mode: Optional[str] = None
+        self._cpu: Optional[SamplingProfiler] = None
+        self._mem: Optional[MemoryDiff] = None
+        self._bot: Optional[Bot] = None
+        self._chat_id: Optional[int] = None
+        self._updates_left: Optional[int] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._started_at = 0.0
+
+    @property
+    def active(self) -> bool:
+        return self.mode is not None
+
+    def start(
+        self,
+        mode: str,
+        bot: Bot,
+        chat_id: int,
+        seconds: Optional[float] = None,
+        updates: Optional[int] = None,
+    ) -> bool:
+        if self.active or mode not in self.MODES:
+            return False
+        self.mode = mode
+        self._bot = bot
+        self._chat_id = chat_id
+        self._updates_left = updates
+        self._started_at = time.monotonic()
+        if mode == "cpu":
+            self._cpu = SamplingProfiler(self.interval)
+            self._cpu.start()
+        else:
+            self._mem = MemoryDiff()
+            self._mem.start()
+        if seconds:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(seconds, lambda: loop.create_task(self.finish()))
+        logger.info("Профилирование %s запущено (сек=%s, апдейтов=%s)", mode, seconds, updates)
+        return True
+
+    def on_update(self) -> None:
+        if self._updates_left is None:
+            return
+        self._updates_left -= 1
+        if self._updates_left <= 0:
+            self._updates_left = None
+            asyncio.get_running_loop().create_task(self.finish())
+
+    def _collect(self) -> Tuple[str, bytes, str]:
+        elapsed = time.monotonic() - self._started_at
+        stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+        if self.mode == "cpu":
+            self._cpu.stop()
+            caption = f"🔥 CPU-профиль: {self._cpu.samples} сэмплов за {elapsed:.1f} с"
+            return f"profile-{stamp}.collapsed", self._cpu.collapsed().encode(), caption
+        report = self._mem.stop()
+        return f"memory-{stamp}.txt", report.encode(), f"🧠 Снимок памяти за {elapsed:.1f} с"
+
+    async def finish(self) -> bool:
+        """Остановить профилирование и отправить результат документом."""
+        if not self.active:
+            return False
+        if self._timer is not None:
+            self._timer.cancel()
+        filename, payload, caption = self._collect()
+        bot, chat_id = self._bot, self._chat_id
+        self.mode = None
+        self._cpu = self._mem = self._bot = self._chat_id = self._timer = None
+        self._updates_left = None
+
+        logger.info("Профилирование завершено: %s (%s байт)", filename, len(payload))
+        try:
+            await bot.send_document(chat_id, BufferedInputFile(payload, filename), caption=caption)
+        except Exception as e:  # noqa: BLE001
+            logger.error("Не удалось отправить результат профилирования: %s", e)
+        return True
+
+
+profiler = ProfilerController()
+
+
+def parse_limit(value: str) -> Tuple[Optional[float], Optional[int]]:
+    """«30s» - 30 секунд, «100» - 100 апдейтов."""
+    value = value.strip().lower()
+    if value.endswith("s"):
+        seconds, updates = float(value[:-1]), None
+    else:
+        seconds, updates = None, int(value)
+    if (seconds or updates or 0) <= 0:
+        raise ValueError("Лимит профилирования должен быть положительным")
+    return seconds, updates
@@ -0,0 +1,127 @@
+"""Подсчет SQL-запросов и поиск N+1.
+
+Счетчик включается на время блока ``with QueryCounter() as counter`` и видит
+только запросы текущей задачи asyncio (через ContextVar), поэтому
+параллельные апдейты друг другу не мешают. Движок нужно один раз
+подготовить через install_query_counter(engine).
+"""
+import os
+import re
+import sys
+import traceback
+from collections import defaultdict
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import greenlet
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_THIS_FILE = os.path.abspath(__file__)
+_NORMALIZE_RE = re.compile(r"\b\d+\b|'[^']*'")
+
+_current_counter: ContextVar[Optional["QueryCounter"]] = ContextVar("query_counter", default=None)
+
+
+class TooManyQueries(AssertionError):
+    """Хендлер выполнил больше запросов, чем разрешено."""
+
+
+@dataclass
+class RecordedQuery:
+    statement: str
+    origin: Tuple[str, ...]
+
+
+@dataclass
+class QueryCounter:
+    """Запросы, выполненные внутри блока with."""
+
+    capture_origin: bool = True
+    queries: List[RecordedQuery] = field(default_factory=list)
+    _token: Optional[Token] = field(default=None, repr=False)
+    _parent: Optional["QueryCounter"] = field(default=None, repr=False)
+
+    def __enter__(self) -> "QueryCounter":
+        # Вложенные счетчики: запрос попадает во все активные блоки
+        self._parent = _current_counter.get()
+        self._token = _current_counter.set(self)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        _current_counter.reset(self._token)
+        self._token = None
+        self._parent = None
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    def repeated(self, threshold: int = 2) -> Dict[str, List[RecordedQuery]]:
+        """Запросы, повторившиеся не менее threshold раз с точностью до параметров."""
+        groups: Dict[str, List[RecordedQuery]] = defaultdict(list)
+        for query in self.queries:
+            groups[normalize_sql(query.statement)].append(query)
+        return {sql: items for sql, items in groups.items() if len(items) >= threshold}
+
+    def report(self, threshold: int = 2) -> str:
+        lines = [f"Выполнено запросов: {self.count}"]
+        for sql, items in sorted(self.repeated(threshold).items(), key=lambda kv: -len(kv[1])):
+            lines.append(f"  x{len(items)}: {sql}")
+            origins = {item.origin for item in items if item.origin}
+            for origin in sorted(origins):
+                lines.extend(f"      {frame}" for frame in origin)
+        return "\n".join(lines)
+
+    def assert_max(self, limit: int, name: str = "блок") -> None:
+        if self.count > limit:
+            raise TooManyQueries(f"{name}: {self.count} запросов при лимите {limit}\n{self.report()}")
+
+    def assert_no_repeats(self, name: str = "блок", threshold: int = 2) -> None:
+        """Упасть, если одинаковый запрос выполнился несколько раз (типичный N+1)."""
+        if self.repeated(threshold):
+            raise TooManyQueries(f"{name}: повторяющиеся запросы\n{self.report(threshold)}")
+
+
+def normalize_sql(statement: str) -> str:
+    """Схлопнуть литералы и пробелы, чтобы группировать одинаковые запросы."""
+    return " ".join(_NORMALIZE_RE.sub("?", statement).split())
+
+
+def _caller_frames(limit: int = 3) -> Tuple[str, ...]:
+    """Ближайшие к запросу кадры кода проекта.
+
+    Обработчик события SQLAlchemy работает в дочернем greenlet, поэтому
+    стек корутин, из которых сделан запрос, берется у родительского greenlet.
+    """
+    current = greenlet.getcurrent()
+    frame = current.parent.gr_frame if current.parent is not None else sys._getframe(1)
+    origin = []
+    for summary in reversed(traceback.extract_stack(frame)):
+        filename = os.path.abspath(summary.filename)
+        if filename == _THIS_FILE or not filename.startswith(PROJECT_ROOT):
+            continue
+        if f"{os.sep}site-packages{os.sep}" in filename:
+            continue
+        origin.append(f"{os.path.relpath(filename, PROJECT_ROOT)}:{summary.lineno} in {summary.name}")
+        if len(origin) >= limit:
+            break
+    return tuple(origin)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    counter = _current_counter.get()
+    origin: Optional[Tuple[str, ...]] = None
+    while counter is not None:
+        if origin is None:
+            origin = _caller_frames() if counter.capture_origin else ()
+        counter.queries.append(RecordedQuery(statement, origin))
+        counter = counter._parent
+
+
+def install_query_counter(engine: AsyncEngine) -> None:
+    """Подключить счетчик к движку (повторный вызов ничего не делает)."""
+    if not event.contains(engine.sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
@@ -0,0 +1,118 @@
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import InlineKeyboardMarkup, InputMediaPhoto, Message
+
+logger = logging.getLogger(__name__)
+
+
+class RenderCache:
+    """LRU-кеш отпечатков последнего отрисованного содержимого сообщений.
+
+    Ключ - (chat_id, message_id), значение - хеш текста/подписи, фото и
+    клавиатуры. Позволяет не отправлять правку, которая ничего не меняет.
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._items: "OrderedDict[Tuple[int, int], str]" = OrderedDict()
+        self.saved_calls = 0
+        self.sent_edits = 0
+
+    @staticmethod
+    def fingerprint(
+        text: Optional[str],
+        photo: Optional[str] = None,
+        reply_markup: Optional[InlineKeyboardMarkup] = None,
+    ) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update((text or "").encode())
+        digest.update(b"\x00")
+        digest.update((photo or "").encode())
+        digest.update(b"\x00")
+        if reply_markup is not None:
+            digest.update(reply_markup.model_dump_json(exclude_none=True).encode())
+        return digest.hexdigest()
+
+    def get(self, chat_id: int, message_id: int) -> Optional[str]:
+        key = (chat_id, message_id)
+        value = self._items.get(key)
+        if value is not None:
+            self._items.move_to_end(key)
+        return value
+
+    def remember(self, chat_id: int, message_id: int, fingerprint: str) -> None:
+        key = (chat_id, message_id)
+        self._items[key] = fingerprint
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def forget(self, chat_id: int, message_id: int) -> None:
+        self._items.pop((chat_id, message_id), None)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+render_cache = RenderCache()
+
+
+def remember_message(
+    message: Message,
+    text: Optional[str],
+    photo: Optional[str] = None,
+    reply_markup: Optional[InlineKeyboardMarkup] = None,
+    cache: RenderCache = render_cache,
+) -> None:
+    """Запомнить содержимое только что отправленного сообщения."""
+    if isinstance(message, Message):
+        cache.remember(
+            message.chat.id, message.message_id, cache.fingerprint(text, photo, reply_markup)
+        )
+
+
+async def edit_message(
+    message: Message,
+    *,
+    text: Optional[str] = None,
+    caption: Optional[str] = None,
+    media: Optional[InputMediaPhoto] = None,
+    reply_markup: Optional[InlineKeyboardMarkup] = None,
+    cache: RenderCache = render_cache,
+) -> bool:
+    """Отредактировать сообщение, если его содержимое действительно изменится.
+
+    Возвращает True, если запрос к Bot API был отправлен.
+    """
+    if media is not None:
+        content, photo = media.caption, str(media.media)
+    else:
+        content, photo = (text if text is not None else caption), None
+
+    chat_id, message_id = message.chat.id, message.message_id
+    fingerprint = cache.fingerprint(content, photo, reply_markup)
+    if cache.get(chat_id, message_id) == fingerprint:
+        cache.saved_calls += 1
+        return False
+
+    try:
+        if media is not None:
+            await message.edit_media(media=media, reply_markup=reply_markup)
+        elif text is not None:
+            await message.edit_text(text, reply_markup=reply_markup)
+        else:
+            await message.edit_caption(caption=caption, reply_markup=reply_markup)
+    except TelegramBadRequest as exc:
+        if "message is not modified" in str(exc):
+            cache.remember(chat_id, message_id, fingerprint)
+            return False
+        cache.forget(chat_id, message_id)
+        raise
+
+    cache.sent_edits += 1
+    cache.remember(chat_id, message_id, fingerprint)
+    return True
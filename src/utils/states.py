@@ -5,6 +5,7 @@ class CardCreationStates(StatesGroup):
     waiting_for_title = State()
     waiting_for_description = State()
     waiting_for_price = State()
+    waiting_for_category = State()
     waiting_for_photo = State()
 
 class BalanceStates(StatesGroup):
@@ -19,4 +20,8 @@ class AdminStates(StatesGroup):
 
 class PaymentStates(StatesGroup):
     """Состояния для платежей"""
-    waiting_for_payment_confirmation = State()
\ No newline at end of file
+    waiting_for_payment_confirmation = State()
+
+class CardImportStates(StatesGroup):
+    """Состояния для импорта карточек из файла"""
+    waiting_for_file = State()
@@ -0,0 +1,60 @@
+import logging
+from typing import Optional
+
+from aiohttp import web
+
+from src.utils.health import HealthState
+from src.utils.metrics import MetricsRegistry, metrics
+
+logger = logging.getLogger(__name__)
+
+METRICS_REGISTRY_KEY = web.AppKey("metrics_registry", MetricsRegistry)
+HEALTH_KEY = web.AppKey("health", HealthState)
+
+
+async def metrics_handler(request: web.Request) -> web.Response:
+    """Метрики в текстовом формате Prometheus."""
+    registry = request.app[METRICS_REGISTRY_KEY]
+    return web.Response(
+        text=registry.render(),
+        content_type="text/plain",
+        headers={"X-Content-Type-Options": "nosniff"},
+        charset="utf-8",
+    )
+
+
+async def healthz_handler(request: web.Request) -> web.Response:
+    """Liveness: отвечает, пока event loop не заблокирован."""
+    return web.json_response({"status": "ok", **request.app[HEALTH_KEY].snapshot()})
+
+
+async def readyz_handler(request: web.Request) -> web.Response:
+    """Readiness: БД доступна, loop не перегружен, апдейты приходят."""
+    ready, data = await request.app[HEALTH_KEY].readiness()
+    return web.json_response(
+        {"status": "ok" if ready else "fail", **data}, status=200 if ready else 503
+    )
+
+
+def create_web_app(
+    registry: MetricsRegistry = metrics, health: Optional[HealthState] = None
+) -> web.Application:
+    """Служебное HTTP-приложение бота."""
+    app = web.Application()
+    app[METRICS_REGISTRY_KEY] = registry
+    app.router.add_get("/metrics", metrics_handler)
+    if health is not None:
+        app[HEALTH_KEY] = health
+        app.router.add_get("/healthz", healthz_handler)
+        app.router.add_get("/readyz", readyz_handler)
+    return app
+
+
+async def start_web_server(app: web.Application, host: str, port: int) -> web.AppRunner:
+    """Запустить приложение в текущем event loop. Остановка - runner.cleanup()."""
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    logger.info("HTTP-сервер метрик запущен на %s:%s", host, port)
+    return runner
@@ -3,6 +3,8 @@ import pytest
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from src.database.models import Base
+import src.database.search  # noqa: F401  (DDL поискового индекса для create_all)
+from src.utils.query_counter import QueryCounter, install_query_counter
 
 
 @pytest.fixture(scope="session")
@@ -27,3 +29,10 @@ async def session(engine) -> AsyncSession:
     async with maker() as session:
         yield session
 
+
+
+@pytest.fixture
+def count_queries(engine):
+    """Фабрика счетчиков SQL: ``with count_queries() as counter: ...``."""
+    install_query_counter(engine)
+    return QueryCounter
@@ -0,0 +1,14 @@
+import pytest
+
+from benchmarks.dispatcher_bench import compare_with_baseline, run_benchmark
+
+
+@pytest.mark.asyncio
+async def test_benchmark_runs_all_scenarios_without_errors():
+    results = await run_benchmark(users=4, iterations=5, seed_cards=20)
+
+    handlers = results["handlers"]
+    assert {"show_cards", "handle_card_navigation", "skip_photo_during_creation"} <= set(handlers)
+    assert all(stats["errors"] == 0 for stats in handlers.values())
+    assert results["throughput_ups"] > 0
+    assert compare_with_baseline(results, results, max_regression=0.2) == []
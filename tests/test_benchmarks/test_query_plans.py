@@ -0,0 +1,168 @@
+"""Регрессионные тесты планов запросов сервисов.
+
+По умолчанию прогоняются на SQLite. Для проверки на Postgres задайте
+PLAN_TEST_POSTGRES_DSN (база будет пересоздана).
+"""
+import os
+from datetime import datetime
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from benchmarks.query_plans import (
+    capture_statements,
+    explain,
+    postgres_plan_problems,
+    sqlite_plan_problems,
+)
+from benchmarks.seed import TELEGRAM_ID_BASE, seed_database
+from src.handlers.admin_handlers import _check_admin
+from src.services.card_service import CardService
+from src.services.outbox_service import OutboxService
+from src.services.payment_service import PaymentService
+from src.services.user_service import UserService
+
+# Бюджет стоимости запроса на Postgres для запросов, отдающих одну страницу
+PAGE_COST_BUDGET = 2000.0
+
+CASES = [
+    ("CardService.get_approved_cards", lambda s: CardService.get_approved_cards(s, limit=100), (), True),
+    ("CardService.get_approved_cards_simple", lambda s: CardService.get_approved_cards_simple(s, limit=100), (), True),
+    ("CardService.get_cards_for_moderation", lambda s: CardService.get_cards_for_moderation(s), (), False),
+    ("CardService.get_approved_card_views", lambda s: CardService.get_approved_card_views(s, limit=100), (), True),
+    *[
+        (
+            f"CardService.get_approved_card_views[{category_id}-{sort}]",
+            lambda s, category_id=category_id, sort=sort: CardService.get_approved_card_views(
+                s, limit=100, category_id=category_id, sort=sort
+            ),
+            (),
+            True,
+        )
+        for category_id in (None, 2)
+        for sort in ("new", "asc", "desc", "top")
+    ],
+    *[
+        (
+            f"CardService.get_album_page[{category_id}-{cursor}]",
+            lambda s, category_id=category_id, cursor=cursor: CardService.get_album_page(
+                s, cursor=cursor, category_id=category_id
+            ),
+            (),
+            True,
+        )
+        for category_id in (None, 2)
+        for cursor in (None, 4000)
+    ],
+    *[
+        (
+            f"CardService.catalog_step[{category_id}-{sort}-{forward}]",
+            lambda s, category_id=category_id, sort=sort, forward=forward: _catalog_walk(
+                s, category_id, sort, forward
+            ),
+            (),
+            True,
+        )
+        for category_id in (None, 2)
+        for sort in ("new", "asc", "desc", "top")
+        for forward in (True, False)
+    ],
+    (
+        "CardService.moderation_step",
+        lambda s: CardService.moderation_step(s, cursor=(datetime(2030, 1, 1), 100)),
+        (),
+        True,
+    ),
+    (
+        "UserService.withdrawal_step",
+        lambda s: UserService.withdrawal_step(s, cursor=(datetime(2000, 1, 1), 100), forward=False),
+        (),
+        True,
+    ),
+    ("CardService.get_moderation_card_views", lambda s: CardService.get_moderation_card_views(s), (), False),
+    (
+        "CardService.search",
+        lambda s: CardService.search(s, "товар 42"),
+        # MATCH по FTS5 выглядит в плане как SCAN виртуальной таблицы по ее индексу
+        ("cards_fts VIRTUAL TABLE INDEX 0:M2",),
+        True,
+    ),
+    ("CardService.get_card_by_id", lambda s: CardService.get_card_by_id(s, 42), (), True),
+    ("CardService.get_card_with_user", lambda s: CardService.get_card_with_user(s, 42), (), True),
+    ("CardService.update_card_attribute", lambda s: CardService.update_card_attribute(s, 43, "price", "10"), (), True),
+    ("PaymentService.process_payment", lambda s: PaymentService.process_payment(s, "seed-000000000007"), (), True),
+    (
+        "UserService.get_or_create",
+        lambda s: UserService.get_or_create(s, TELEGRAM_ID_BASE + 5, "u", "f", None, []),
+        (),
+        True,
+    ),
+    (
+        "UserService.sync_admin_flags",
+        lambda s: UserService.sync_admin_flags(s, [TELEGRAM_ID_BASE + 1]),
+        # Частичный индекс содержит только админов
+        ("users USING INDEX ix_users_admin",),
+        True,
+    ),
+    ("UserService.get_statistics", lambda s: UserService.get_statistics(s), ("users",), False),
+    ("UserService.get_pending_withdrawal_requests", lambda s: UserService.get_pending_withdrawal_requests(s), (), False),
+    ("UserService.get_withdrawal_request", lambda s: UserService.get_withdrawal_request(s, 5), (), True),
+    ("admin._check_admin", lambda s: _check_admin(s, TELEGRAM_ID_BASE + 3), (), True),
+    ("OutboxService.fetch_batch", lambda s: OutboxService.fetch_batch(s), (), True),
+]
+
+async def _catalog_walk(session, category_id, sort, forward):
+    """Первая карточка и шаг от нее: оба запроса должны идти по индексу."""
+    step = await CardService.catalog_step(session, category_id, sort)
+    await CardService.catalog_step(
+        session, category_id, sort, cursor=(step.key, step.item.id), forward=forward
+    )
+
+
+BACKENDS = ["sqlite"]
+if os.getenv("PLAN_TEST_POSTGRES_DSN"):
+    BACKENDS.append("postgresql")
+
+
+@pytest.fixture(scope="module", params=BACKENDS)
+async def plan_engine(request, tmp_path_factory):
+    if request.param == "postgresql":
+        engine = create_async_engine(os.environ["PLAN_TEST_POSTGRES_DSN"])
+        scale = 20
+    else:
+        path = tmp_path_factory.mktemp("plans") / "plans.db"
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        scale = 1
+    await seed_database(
+        engine,
+        users=2000 * scale,
+        cards=5000 * scale,
+        purchases=5000 * scale,
+        withdrawals=1000 * scale,
+    )
+    yield engine
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name, call, allowed_scans, page_query", CASES, ids=[c[0] for c in CASES])
+async def test_service_query_plans(plan_engine, name, call, allowed_scans, page_query):
+    maker = async_sessionmaker(plan_engine, class_=AsyncSession, expire_on_commit=False)
+    with capture_statements(plan_engine) as captured:
+        async with maker() as session:
+            await call(session)
+            await session.rollback()
+
+    assert captured, f"{name}: не выполнено ни одного запроса"
+    problems = []
+    for statement in captured:
+        plan = await explain(plan_engine, statement)
+        if plan_engine.dialect.name == "postgresql":
+            found = postgres_plan_problems(
+                plan, allowed_scans, PAGE_COST_BUDGET if page_query else None
+            )
+        else:
+            found = sqlite_plan_problems(plan, allowed_scans)
+        problems.extend(f"{problem}\n    {statement.statement}" for problem in found)
+
+    assert not problems, f"{name}: плохой план запроса:\n" + "\n".join(problems)
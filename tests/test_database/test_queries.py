@@ -0,0 +1,45 @@
+import pytest
+
+from benchmarks.statement_bench import run
+from src.database.models import Card, User
+from src.database.queries import (
+    ADMIN_ID_BY_TELEGRAM_ID,
+    APPROVED_CARD_BY_ID,
+    CARD_BY_ID,
+    USER_BY_TELEGRAM_ID,
+)
+
+
+@pytest.mark.asyncio
+async def test_precompiled_queries_bind_parameters(session):
+    admin = User(telegram_id=3901, username="admin39", is_admin=True)
+    regular = User(telegram_id=3902, username="user39")
+    session.add_all([admin, regular])
+    await session.flush()
+    approved = Card(user_id=regular.id, title="a", description="d", price=1.0, is_approved=True)
+    pending = Card(user_id=regular.id, title="p", description="d", price=1.0)
+    session.add_all([approved, pending])
+    await session.commit()
+
+    found = (await session.execute(USER_BY_TELEGRAM_ID, {"telegram_id": 3902})).scalar_one()
+    assert found.id == regular.id
+
+    admin_id = ADMIN_ID_BY_TELEGRAM_ID
+    assert (await session.execute(admin_id, {"telegram_id": 3901})).scalar_one_or_none() == admin.id
+    assert (await session.execute(admin_id, {"telegram_id": 3902})).scalar_one_or_none() is None
+
+    card = (await session.execute(CARD_BY_ID, {"card_id": pending.id})).scalar_one()
+    assert card.user.telegram_id == 3902
+
+    approved_stmt = APPROVED_CARD_BY_ID
+    assert (await session.execute(approved_stmt, {"card_id": approved.id})).scalar_one_or_none() is not None
+    assert (await session.execute(approved_stmt, {"card_id": pending.id})).scalar_one_or_none() is None
+
+
+def test_statement_bench_reports_all_variants():
+    results = run(iterations=5)
+
+    assert set(results) == {"user_by_telegram_id", "admin_by_telegram_id", "card_by_id"}
+    for timings in results.values():
+        assert set(timings) == {"rebuilt", "precompiled", "lambda_stmt"}
+        assert all(value > 0 for value in timings.values())
@@ -0,0 +1,50 @@
+import pytest
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.database.session import init_models
+from src.services.card_service import CardService
+
+# Таблицы в том виде, в каком их создавала первая версия бота
+OLD_SCHEMA = (
+    "CREATE TABLE users (id INTEGER PRIMARY KEY, telegram_id BIGINT NOT NULL UNIQUE, "
+    "username VARCHAR(100), first_name VARCHAR(100), last_name VARCHAR(100), balance FLOAT, "
+    "is_admin BOOLEAN, created_at DATETIME)",
+    "CREATE TABLE cards (id INTEGER PRIMARY KEY, title VARCHAR(200) NOT NULL, description TEXT NOT NULL, "
+    "price FLOAT NOT NULL, photo_url VARCHAR(500), photo_file_id VARCHAR(500), is_approved BOOLEAN, "
+    "is_rejected BOOLEAN, created_at DATETIME, user_id INTEGER REFERENCES users(id))",
+    "CREATE INDEX ix_cards_approved_created ON cards (is_approved, created_at)",
+    "INSERT INTO users (id, telegram_id, username) VALUES (1, 4301, 'old')",
+    "INSERT INTO cards (id, title, description, price, is_approved, is_rejected, created_at, user_id) "
+    "VALUES (1, 'Old card', 'Desc', 10.0, 1, 0, '2024-01-01 00:00:00', 1)",
+)
+
+
+@pytest.mark.asyncio
+async def test_init_models_upgrades_existing_tables(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'old.db'}")
+    try:
+        async with engine.begin() as conn:
+            for statement in OLD_SCHEMA:
+                await conn.execute(text(statement))
+
+        await init_models(engine)
+        await init_models(engine)  # повторный запуск ничего не ломает
+
+        async with engine.connect() as conn:
+            columns, indexes = await conn.run_sync(
+                lambda sync: (
+                    {column["name"] for column in inspect(sync).get_columns("cards")},
+                    {index["name"]: index["column_names"] for index in inspect(sync).get_indexes("cards")},
+                )
+            )
+        assert {"category_id", "view_count", "recent_views", "popularity"} <= columns
+        assert {"ix_cards_approved_created", "ix_cards_approved_popularity"} <= set(indexes)
+        # Индекс со старым набором колонок пересоздан по модели
+        assert indexes["ix_cards_approved_created"] == ["is_approved", "created_at", "id"]
+
+        async with async_sessionmaker(engine, class_=AsyncSession)() as session:
+            cards = await CardService.get_approved_card_views(session, limit=10)
+        assert [card.title for card in cards] == ["Old card"]
+    finally:
+        await engine.dispose()
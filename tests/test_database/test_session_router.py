@@ -0,0 +1,79 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.database.models import Base, User
+from src.database.session import SessionRouter, get_session_maker
+from src.middlewares.db_middleware import DatabaseMiddleware
+
+USER_ID = 3701
+
+
+@pytest.fixture
+async def databases(tmp_path):
+    engines = [
+        create_async_engine(f"sqlite+aiosqlite:///{tmp_path / name}")
+        for name in ("primary.db", "replica.db")
+    ]
+    for engine in engines:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    yield engines
+    for engine in engines:
+        await engine.dispose()
+
+
+def _event(user_id: int):
+    return SimpleNamespace(from_user=SimpleNamespace(id=user_id))
+
+
+async def _count_users(event, data):
+    return await data["read_session"].scalar(select(func.count(User.id)))
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replica_until_own_write(databases):
+    primary, replica = databases
+    router = SessionRouter(get_session_maker(primary), [get_session_maker(replica)], sticky_seconds=60)
+    middleware = DatabaseMiddleware(router.primary, router)
+
+    async def register(event, data):
+        data["session"].add(User(telegram_id=event.from_user.id))
+        await data["session"].commit()
+
+    assert await middleware(_count_users, _event(USER_ID), {}) == 0
+    await middleware(register, _event(USER_ID), {})
+
+    # Свои записи видны сразу: чтение липнет к основной БД
+    assert router.is_sticky(USER_ID)
+    assert await middleware(_count_users, _event(USER_ID), {}) == 1
+    # Остальные пользователи по-прежнему читают с реплики
+    assert await middleware(_count_users, _event(USER_ID + 1), {}) == 0
+
+    router.sticky_seconds = 0
+    assert await middleware(_count_users, _event(USER_ID), {}) == 0
+
+
+@pytest.mark.asyncio
+async def test_core_update_marks_session_as_writer(databases):
+    primary, _ = databases
+    maker = get_session_maker(primary)
+    async with maker() as session:
+        await session.execute(select(User))
+        assert not session.info.get("has_writes")
+        await session.execute(update(User).where(User.telegram_id == USER_ID).values(balance=1))
+        assert session.info["has_writes"]
+
+
+@pytest.mark.asyncio
+async def test_without_replicas_read_session_is_primary(databases):
+    primary, _ = databases
+    router = SessionRouter(get_session_maker(primary))
+    middleware = DatabaseMiddleware(router.primary, router)
+
+    async def handler(event, data):
+        return data["read_session"] is data["session"]
+
+    assert await middleware(handler, _event(USER_ID), {})
@@ -0,0 +1,95 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from aiogram.methods import SendMessage
+from aiogram.types import Chat, Message, Update
+from aiogram.types import User as TelegramUser
+from sqlalchemy import func, select, text
+from sqlalchemy.exc import OperationalError
+
+from src.config import Config
+from src.database.models import Base, User
+from src.database.session import SessionRouter, get_engine, get_replica_engines, get_session_maker
+from src.middlewares.db_middleware import DatabaseMiddleware, ReadSessionReleaseMiddleware
+from src.middlewares.user_middleware import UserMiddleware
+
+
+@pytest.fixture
+async def sqlite_engines(tmp_path):
+    config = Config(bot_token="42:TEST", db_backend="sqlite", sqlite_path=str(tmp_path / "db" / "bot.db"))
+    writer = get_engine(config)
+    readers = get_replica_engines(config)
+    async with writer.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield writer, readers[0]
+    await writer.dispose()
+    await readers[0].dispose()
+
+
+@pytest.mark.asyncio
+async def test_pragmas_applied(sqlite_engines):
+    writer, reader = sqlite_engines
+    async with writer.connect() as conn:
+        assert (await conn.scalar(text("PRAGMA journal_mode"))) == "wal"
+        assert (await conn.scalar(text("PRAGMA synchronous"))) == 1
+        assert (await conn.scalar(text("PRAGMA busy_timeout"))) == 5000
+    async with reader.connect() as conn:
+        assert (await conn.scalar(text("PRAGMA query_only"))) == 1
+        with pytest.raises(OperationalError):
+            await conn.execute(text("INSERT INTO users (telegram_id) VALUES (3801)"))
+
+
+@pytest.mark.asyncio
+async def test_concurrent_writes_and_reads(sqlite_engines):
+    writer, reader = sqlite_engines
+    write_maker, read_maker = get_session_maker(writer), get_session_maker(reader)
+
+    async def register(telegram_id: int) -> None:
+        async with write_maker() as session:
+            session.add(User(telegram_id=telegram_id))
+            await session.commit()
+
+    async def count() -> int:
+        async with read_maker() as session:
+            return await session.scalar(select(func.count(User.id)))
+
+    results = await asyncio.gather(*(register(3810 + i) for i in range(20)), *(count() for _ in range(10)))
+
+    assert all(value <= 20 for value in results[20:])
+    assert await count() == 20
+
+
+@pytest.mark.asyncio
+async def test_read_only_update_leaves_connections_free(sqlite_engines):
+    writer, reader = sqlite_engines
+    write_maker, read_maker = get_session_maker(writer), get_session_maker(reader)
+    async with write_maker() as session:
+        session.add(User(telegram_id=3850))
+        await session.commit()
+
+    database = DatabaseMiddleware(write_maker, SessionRouter(write_maker, [read_maker], sticky_seconds=0))
+    users = UserMiddleware()
+    release = ReadSessionReleaseMiddleware()
+    seen = {}
+
+    async def make_request(bot, method):
+        # Пока ждем Telegram, апдейт не держит ни писателя, ни читателя
+        seen["connections"] = (writer.sync_engine.pool.checkedout(), reader.sync_engine.pool.checkedout())
+        return True
+
+    async def handler(event, data):
+        seen["user"] = data["user"].telegram_id
+        await data["read_session"].scalar(select(func.count(User.id)))
+        return await release(make_request, None, SendMessage(chat_id=3850, text="hi"))
+
+    message = Message(
+        message_id=1,
+        date=datetime.now(),
+        chat=Chat(id=3850, type="private"),
+        from_user=TelegramUser(id=3850, is_bot=False, first_name="t"),
+        text="hi",
+    )
+    await database(lambda event, data: users(handler, event, data), Update(update_id=1, message=message), {})
+
+    assert seen == {"user": 3850, "connections": (0, 0)}
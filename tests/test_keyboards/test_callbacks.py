@@ -0,0 +1,86 @@
+from datetime import datetime
+
+import pytest
+from aiogram.filters.callback_data import MAX_CALLBACK_LENGTH
+from aiogram.types import CallbackQuery, User
+
+from src.keyboards.callbacks import (
+    AlbumPage,
+    CatalogFilter,
+    CatalogNav,
+    ModerationAction,
+    SearchPage,
+    SimilarCards,
+    WithdrawalAction,
+    search_token,
+)
+
+
+def test_catalog_nav_roundtrip_fits_limit():
+    created_at = datetime(2026, 10, 19, 12, 30, 15, 123456)
+    for key, sort in ((created_at, "new"), (199.99, "asc"), (0.125, "top")):
+        data = CatalogNav.at("next", 2 ** 31, key, 65535, sort).pack()
+        assert len(data.encode()) <= MAX_CALLBACK_LENGTH
+        nav = CatalogNav.unpack(data)
+        assert (nav.action, nav.card_id, nav.key, nav.category_id, nav.sort) == (
+            "next", 2 ** 31, key, 65535, sort,
+        )
+
+
+def test_admin_actions_roundtrip():
+    created_at = datetime(2025, 1, 2, 3, 4, 5)
+    action = ModerationAction(action="approve", card_id=7, created_at=created_at)
+    assert ModerationAction.unpack(action.pack()) == action
+    withdrawal = WithdrawalAction(action="process", request_id=9, created_at=created_at)
+    assert WithdrawalAction.unpack(withdrawal.pack()) == withdrawal
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        "card_next_3_0_new",  # старый формат
+        "cn:",
+        "cn:!!!",
+        "cn:AQ",  # обрезанные данные
+        "mod:" + ModerationAction(action="edit", card_id=1, created_at=datetime(2025, 1, 1)).pack()[4:],
+        "cn:" + CatalogNav.at("next", 1, 1.0, 0, "asc").pack()[3:].replace("AQ", "Ag", 1),  # версия 2
+    ],
+)
+async def test_filter_rejects_malformed_payloads(data):
+    query = CallbackQuery(
+        id="1", from_user=User(id=1, is_bot=False, first_name="t"), chat_instance="c", data=data
+    )
+    assert await CatalogNav.filter()(query) is False
+
+
+def test_card_buttons_roundtrip():
+    page = AlbumPage(category_id=3, cursor=120)
+    assert AlbumPage.unpack(page.pack()) == page
+    assert CatalogFilter.unpack(CatalogFilter(sort="top").pack()) == CatalogFilter(category_id=0, sort="top")
+
+
+def test_search_page_is_bound_to_query():
+    page = SearchPage(cursor=42, token=search_token("синий свитер"))
+    assert SearchPage.unpack(page.pack()) == page
+    assert len(page.pack().encode()) <= MAX_CALLBACK_LENGTH
+    assert page.token == search_token("синий свитер")
+    assert page.token != search_token("красный свитер")
+
+
+@pytest.mark.parametrize(
+    "factory, data",
+    [
+        (SimilarCards, "sim:abc"),
+        (SimilarCards, "similar_12"),  # старый формат
+        (AlbumPage, "alb:1"),
+        (AlbumPage, "alb:x:0"),
+        (SearchPage, "srch:"),
+        (SearchPage, "srch:10"),  # без отпечатка запроса
+        (CatalogFilter, "cf:1:bogus"),
+    ],
+)
+async def test_card_buttons_reject_malformed_payloads(factory, data):
+    query = CallbackQuery(
+        id="1", from_user=User(id=1, is_bot=False, first_name="t"), chat_instance="c", data=data
+    )
+    assert await factory.filter()(query) is False
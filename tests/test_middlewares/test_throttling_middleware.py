@@ -0,0 +1,95 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import EditMessageText, SendMessage
+
+from src.middlewares.throttling_middleware import BotApiThrottlingMiddleware
+
+
+@pytest.mark.asyncio
+async def test_retry_after_is_honoured():
+    middleware = BotApiThrottlingMiddleware(global_rate=0, chat_rate=0, max_retries=2)
+    method = SendMessage(chat_id=1, text="hi")
+    calls = []
+
+    async def make_request(bot, method):
+        calls.append(method)
+        if len(calls) == 1:
+            raise TelegramRetryAfter(method=method, message="Too Many Requests", retry_after=0)
+        return "ok"
+
+    assert await middleware(make_request, None, method) == "ok"
+    assert len(calls) == 2
+    assert middleware.retries == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("chat_rate", [0, 1.0])
+async def test_retry_after_pause_is_waited_out(chat_rate):
+    middleware = BotApiThrottlingMiddleware(global_rate=0, chat_rate=chat_rate, max_retries=2)
+    method = SendMessage(chat_id=2, text="hi")
+    calls = []
+
+    async def make_request(bot, method):
+        calls.append(method)
+        if len(calls) == 1:
+            raise TelegramRetryAfter(method=method, message="Too Many Requests", retry_after=5)
+        return "ok"
+
+    sleep = AsyncMock()
+    with patch("src.middlewares.throttling_middleware.asyncio.sleep", sleep):
+        assert await middleware(make_request, None, method) == "ok"
+
+    assert len(calls) == 2
+    assert sleep.await_count == 1
+    # Не меньше паузы flood control; при включенном лимите добавляется ожидание токена
+    assert 4.9 <= sleep.await_args.args[0] <= 6.1
+
+
+@pytest.mark.asyncio
+async def test_rapid_edits_of_same_message_are_coalesced():
+    middleware = BotApiThrottlingMiddleware(global_rate=0, chat_rate=50.0, chat_burst=1)
+    sent = []
+
+    async def make_request(bot, method):
+        sent.append(method.text)
+        return method.text
+
+    results = await asyncio.gather(
+        *(
+            middleware(make_request, None, EditMessageText(chat_id=7, message_id=3, text=f"v{i}"))
+            for i in range(4)
+        )
+    )
+
+    assert sent == ["v0", "v3"]
+    assert results == ["v0", True, True, "v3"]
+    assert middleware.coalesced_edits == 2
+
+
+@pytest.mark.asyncio
+async def test_coalesced_edit_returns_its_token():
+    middleware = BotApiThrottlingMiddleware(global_rate=0, chat_rate=0.5, chat_burst=1)
+    sent = []
+    real_sleep = asyncio.sleep
+
+    async def make_request(bot, method):
+        sent.append(method.text)
+        return method.text
+
+    async def fake_sleep(delay):
+        await real_sleep(0)
+
+    with patch("src.middlewares.throttling_middleware.asyncio.sleep", fake_sleep):
+        await asyncio.gather(
+            *(
+                middleware(make_request, None, EditMessageText(chat_id=9, message_id=1, text=f"v{i}"))
+                for i in range(4)
+            )
+        )
+
+    assert sent == ["v0", "v3"]
+    # Списаны токены только двух отправленных правок, а не всех четырех
+    assert middleware._chat_buckets[9].tokens == pytest.approx(-1, abs=0.05)
@@ -0,0 +1,97 @@
+import io
+import json
+
+import pytest
+from sqlalchemy import delete, select
+
+from src.database.models import Card, Category, OutboxMessage, User
+from src.services.card_import import CardImportService, iter_csv_rows, iter_json_rows
+
+
+def test_iter_json_rows_streams_array_and_lines():
+    items = [{"title": f"Товар {i}", "цена": i + 1} for i in range(50)]
+    as_array = json.dumps(items, ensure_ascii=False).encode()
+    as_lines = "\n".join(json.dumps(item, ensure_ascii=False) for item in items).encode()
+
+    for data in (as_array, as_lines):
+        rows = list(iter_json_rows(io.BytesIO(data), chunk_size=7))
+        assert [row["title"] for _, row in rows] == [item["title"] for item in items]
+        assert rows[-1] == ("запись 50", {"title": "Товар 49", "price": 50})
+
+    with pytest.raises(ValueError):
+        list(iter_json_rows(io.BytesIO(b'[{"title": "a"}, {"title": '), chunk_size=4))
+    with pytest.raises(ValueError):
+        list(iter_json_rows(io.BytesIO(b'[{"title": "' + b"x" * 100 + b'"}]'), chunk_size=8, max_object_size=32))
+
+
+@pytest.mark.asyncio
+async def test_import_csv_reports_row_errors(session):
+    user = User(telegram_id=4901, username="importer")
+    category = Category(slug="import-4901", name="Импорт")
+    session.add_all([user, category])
+    await session.commit()
+
+    data = (
+        "название;описание;цена;категория;фото\n"
+        "Телефон;Почти новый;1500,50;import-4901;https://example.com/1.jpg\n"
+        ";Без названия;10;;\n"
+        "Чехол;Силикон;-5;;\n"
+        "Зарядка;USB-C;300;нет такой;\n"
+        "Кабель;Метр;abc;;\n"
+        "\n"
+        "Наушники;Проводные;250;Импорт;ftp://example.com/x.jpg\n"
+        "Сумка;Кожа;2000;ИМПОРТ;\n"
+    ).encode("utf-8-sig")
+
+    report = await CardImportService.import_cards(
+        session,
+        user.id,
+        iter_csv_rows(io.BytesIO(data)),
+        categories=[category],
+        batch_size=1,
+        admin_ids=[4900],
+    )
+
+    assert (report.created, report.failed, report.fatal) == (2, 5, None)
+    assert report.errors[0] == "строка 3: Название не может быть пустым"
+    assert report.errors[-1].startswith("строка 8: ")
+
+    cards = (await session.execute(select(Card).where(Card.user_id == user.id))).scalars().all()
+    assert sorted((card.title, card.price) for card in cards) == [("Сумка", 2000.0), ("Телефон", 1500.5)]
+    assert all(card.category_id == category.id for card in cards)
+    assert not any(card.is_approved or card.is_rejected for card in cards)
+
+    notices = (await session.execute(
+        select(OutboxMessage).where(OutboxMessage.chat_id == 4900)
+    )).scalars().all()
+    assert len(notices) == 1
+
+    await session.execute(delete(OutboxMessage).where(OutboxMessage.chat_id == 4900))
+    await session.execute(delete(Card).where(Card.user_id == user.id))
+    await session.delete(category)
+    await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_import_json_stops_at_max_rows(session):
+    user = User(telegram_id=4902, username="bulk")
+    session.add(user)
+    await session.commit()
+
+    items = [{"title": f"Лот {i}", "description": "Описание", "price": 100 + i} for i in range(30)]
+    items.insert(3, ["не объект"])
+    data = json.dumps(items, ensure_ascii=False).encode()
+
+    report = await CardImportService.import_cards(
+        session, user.id, iter_json_rows(io.BytesIO(data), chunk_size=16), batch_size=7, max_rows=20
+    )
+
+    assert (report.created, report.failed, report.truncated) == (19, 1, True)
+    assert report.errors == ["запись 4: Ожидался объект с полями карточки"]
+    titles = (await session.execute(
+        select(Card.title).where(Card.user_id == user.id).order_by(Card.id)
+    )).scalars().all()
+    assert titles == [f"Лот {i}" for i in range(19)]
+
+    await session.execute(delete(Card).where(Card.user_id == user.id))
+    await session.commit()
@@ -1,6 +1,6 @@
 import pytest
 
-from src.database.models import Card, User
+from src.database.models import Card, Category, User
 from src.services.card_service import CardService
 
 
@@ -50,3 +50,144 @@ async def test_update_card_attribute(session):
     assert updated is True
     assert refreshed.price == pytest.approx(12.5)
 
+
+
+@pytest.mark.asyncio
+async def test_card_views_are_column_only(session, count_queries):
+    user = User(telegram_id=4001, username="viewer")
+    session.add(user)
+    await session.flush()
+    approved = Card(user_id=user.id, title="Shown", description="d", price=3.0, is_approved=True)
+    pending = Card(user_id=user.id, title="Pending", description="d", price=4.0)
+    session.add_all([approved, pending])
+    await session.commit()
+    session.expunge_all()
+
+    with count_queries() as counter:
+        views = await CardService.get_approved_card_views(session, limit=100)
+    counter.assert_max(1)
+
+    view = next(v for v in views if v.id == approved.id)
+    assert (view.title, view.price, view.seller_username) == ("Shown", 3.0, "viewer")
+    assert not hasattr(view, "__dict__")
+    assert all(v.id != pending.id for v in views)
+    assert len(session.identity_map) == 0
+
+    pending_views = await CardService.get_moderation_card_views(session)
+    assert pending.id in {v.id for v in pending_views}
+
+
+@pytest.mark.asyncio
+async def test_search_follows_approval_and_edits(session):
+    user = User(telegram_id=4101, username="searcher")
+    session.add(user)
+    await session.commit()
+
+    cards = []
+    for i in range(3):
+        card = await CardService.create_card(
+            session=session, user_id=user.id, title=f"Квазарный свитер {i}", description="шерсть", price=1.0
+        )
+        cards.append(card)
+
+    found, _ = await CardService.search(session, "квазарн")
+    assert found == []
+
+    for card in cards:
+        await CardService.approve_card(session, card.id)
+
+    first_page, cursor = await CardService.search(session, "Квазар шерсть", limit=2)
+    assert [view.id for view in first_page] == [cards[2].id, cards[1].id]
+    assert first_page[0].seller_username == "searcher"
+    second_page, last_cursor = await CardService.search(session, "квазар", cursor=cursor, limit=2)
+    assert [view.id for view in second_page] == [cards[0].id]
+    assert last_cursor is None
+
+    await CardService.update_card_attribute(session, cards[0].id, "title", "Пульсарная шапка")
+    assert [view.id for view in (await CardService.search(session, "пульсар"))[0]] == [cards[0].id]
+    assert cards[0].id not in {view.id for view in (await CardService.search(session, "квазар"))[0]}
+
+    assert await CardService.search(session, "\"*:() &") == ([], None)
+
+
+@pytest.mark.asyncio
+async def test_card_views_by_ids_keep_order(session):
+    user = User(telegram_id=4502, username="ordered")
+    session.add(user)
+    await session.flush()
+    first = Card(user_id=user.id, title="First", description="d", price=1.0, is_approved=True)
+    second = Card(user_id=user.id, title="Second", description="d", price=2.0, is_approved=True)
+    pending = Card(user_id=user.id, title="Pending", description="d", price=3.0)
+    session.add_all([first, second, pending])
+    await session.commit()
+
+    views = await CardService.get_card_views_by_ids(session, [second.id, pending.id, first.id])
+    assert [view.id for view in views] == [second.id, first.id]
+    assert await CardService.get_card_views_by_ids(session, []) == []
+
+
+@pytest.mark.asyncio
+async def test_album_pages_by_key(session):
+    user = User(telegram_id=4601, username="album")
+    session.add(user)
+    await session.flush()
+    cards = [
+        Card(user_id=user.id, title=f"Album {i}", description="d", price=1.0, is_approved=True)
+        for i in range(5)
+    ]
+    session.add_all(cards)
+    session.add(Card(user_id=user.id, title="Album pending", description="d", price=1.0))
+    await session.commit()
+    album_ids = {card.id for card in cards}
+
+    seen = []
+    cursor = None
+    while True:
+        page, cursor = await CardService.get_album_page(session, cursor=cursor, limit=2)
+        seen.extend(view.id for view in page if view.id in album_ids)
+        if cursor is None:
+            break
+        assert len(page) == 2
+    assert seen == sorted(album_ids, reverse=True)
+
+
+@pytest.mark.asyncio
+async def test_catalog_steps_walk_by_key(session, count_queries):
+    category = Category(slug="steps-4801", name="Steps")
+    user = User(telegram_id=4801, username="walker")
+    session.add_all([category, user])
+    await session.flush()
+    prices = [30.0, 10.0, 20.0, 10.0]
+    cards = [
+        Card(user_id=user.id, title=f"Step {i}", description="d", price=price,
+             is_approved=True, category_id=category.id)
+        for i, price in enumerate(prices)
+    ]
+    session.add_all(cards)
+    await session.commit()
+
+    expected = [card.id for card in sorted(cards, key=lambda card: (card.price, card.id))]
+    step = await CardService.catalog_step(session, category.id, "asc")
+    seen = [step.item.id]
+    with count_queries() as counter:
+        while step.has_more:
+            step = await CardService.catalog_step(
+                session, category.id, "asc", cursor=(step.key, step.item.id)
+            )
+            seen.append(step.item.id)
+    counter.assert_max(len(expected) - 1)
+    assert seen == expected
+    assert await CardService.catalog_step(
+        session, category.id, "asc", cursor=(step.key, step.item.id)
+    ) is None
+
+    back = await CardService.catalog_step(
+        session, category.id, "asc", cursor=(step.key, step.item.id), forward=False
+    )
+    assert back.item.id == expected[-2] and back.has_more
+
+    # Категория видна в общем списке других тестов
+    for card in cards:
+        await session.delete(card)
+    await session.delete(category)
+    await session.commit()
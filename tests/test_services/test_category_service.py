@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy import select
+
+from src.database.models import Card, User
+from src.services.card_service import CardService
+from src.services.category_service import DEFAULT_CATEGORIES, CategoryService
+
+
+@pytest.mark.asyncio
+async def test_counts_follow_approvals_and_filter_catalog(session):
+    await CategoryService.ensure_defaults(session)
+    await CategoryService.ensure_defaults(session)
+    categories = {category.slug: category for category in await CategoryService.get_categories(session)}
+    assert set(categories) == {slug for slug, _ in DEFAULT_CATEGORIES}
+    hobby = categories["hobby"]
+    before = hobby.approved_count
+
+    user = User(telegram_id=4301, username="categorizer")
+    session.add(user)
+    await session.commit()
+    cards = [
+        await CardService.create_card(
+            session=session, user_id=user.id, title=f"Hobby {price}", description="d",
+            price=price, category_id=hobby.id,
+        )
+        for price in (30.0, 10.0, 20.0)
+    ]
+    for card in cards:
+        await CardService.approve_card(session, card.id)
+    # Повторное одобрение не должно увеличивать счетчик
+    await CardService.approve_card(session, cards[0].id)
+
+    await session.refresh(hobby)
+    assert hobby.approved_count == before + 3
+
+    cheap_first = await CardService.get_approved_card_views(
+        session, limit=100, category_id=hobby.id, sort="asc"
+    )
+    ours = [view.price for view in cheap_first if view.id in {card.id for card in cards}]
+    assert ours == [10.0, 20.0, 30.0]
+    expensive_first = await CardService.get_approved_card_views(
+        session, limit=100, category_id=hobby.id, sort="desc"
+    )
+    assert [view.price for view in expensive_first if view.title.startswith("Hobby")] == [30.0, 20.0, 10.0]
+
+    # Полный пересчет дает то же значение, что и инкрементальный
+    await CategoryService.recount(session)
+    await session.refresh(hobby)
+    approved = (
+        await session.execute(
+            select(Card.id).where(Card.category_id == hobby.id, Card.is_approved.is_(True))
+        )
+    ).all()
+    assert hobby.approved_count == len(approved) == before + 3
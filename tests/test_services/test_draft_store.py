@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.database.models import Card, CardDraft, User
+from src.services.card_service import CardService
+from src.services.draft_store import DraftStore
+
+
+@pytest.mark.asyncio
+async def test_drafts_are_written_behind_and_survive_restart(engine, session, count_queries):
+    pool = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    store = DraftStore(pool)
+
+    store.save(5001, "CardCreationStates:waiting_for_description", {"title": "Лампа"})
+    store.save(5001, "CardCreationStates:waiting_for_price", {"title": "Лампа", "description": "Настольная"})
+    store.save(5002, "CardCreationStates:waiting_for_description", {"title": "Стол"})
+    store.discard(5002)
+
+    # До записи черновик читается из буфера, в БД пусто
+    assert (await store.get(session, 5001))["description"] == "Настольная"
+    assert await store.get(session, 5002) is None
+    assert await session.scalar(select(func.count()).select_from(CardDraft)) == 0
+
+    with count_queries() as queries:
+        assert await store.flush() == 2
+    assert queries.count == 2  # DELETE + INSERT пачкой
+    assert store.pending == 0
+
+    # «Перезапуск»: новый буфер читает черновик из БД
+    restarted = DraftStore(pool)
+    draft = await restarted.get(session, 5001)
+    assert draft["step"] == "CardCreationStates:waiting_for_price"
+    assert (draft["title"], draft["description"], draft["price"]) == ("Лампа", "Настольная", None)
+
+    user = User(telegram_id=5001, username="drafter")
+    session.add(user)
+    await session.commit()
+    card = await CardService.create_card(
+        session, user.id, "Лампа", "Настольная", 350.0, draft_telegram_id=5001
+    )
+    restarted.discard(5001)
+    await restarted.flush()
+
+    assert await session.get(Card, card.id) is not None
+    assert await restarted.get(session, 5001) is None
+    assert await DraftStore(pool).get(session, 5001) is None
+
+    await session.delete(card)
+    await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_abandoned_drafts_are_purged_in_batches(engine, session):
+    pool = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    store = DraftStore(pool, ttl=3600.0, purge_batch_size=2)
+
+    old = datetime.utcnow() - timedelta(hours=2)
+    session.add_all([
+        CardDraft(telegram_id=5010 + i, step="CardCreationStates:waiting_for_price", title="x", updated_at=old)
+        for i in range(5)
+    ])
+    session.add(CardDraft(telegram_id=5020, step="CardCreationStates:waiting_for_price", title="y",
+                          updated_at=datetime.utcnow()))
+    await session.commit()
+
+    assert await store.purge_expired() == 5
+    remaining = (await session.execute(select(CardDraft.telegram_id))).scalars().all()
+    assert remaining == [5020]
+
+    store.discard(5020)
+    await store.flush()
@@ -0,0 +1,143 @@
+from contextlib import asynccontextmanager
+from datetime import datetime
+from unittest.mock import AsyncMock
+
+import pytest
+from aiogram.exceptions import TelegramForbiddenError
+from aiogram.methods import SendMessage
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.database.models import Card, OutboxMessage, User
+from src.services.outbox_dispatcher import OutboxDispatcher
+from src.services.payment_service import PaymentService
+
+
+@pytest.mark.asyncio
+async def test_process_payment_enqueues_seller_notification(session):
+    seller = User(telegram_id=2601, username="outbox_seller")
+    buyer = User(telegram_id=2602, username="outbox_buyer")
+    session.add_all([seller, buyer])
+    await session.commit()
+
+    card = Card(title="Outbox card", description="Desc", price=20.0, user_id=seller.id, is_approved=True)
+    session.add(card)
+    await session.commit()
+
+    purchase = await PaymentService.create_invoice(
+        session=session, user_id=buyer.id, card_id=card.id, amount=card.price
+    )
+    assert await PaymentService.process_payment(session, purchase.invoice_id) is True
+
+    stmt = select(OutboxMessage).where(OutboxMessage.chat_id == seller.telegram_id)
+    messages = (await session.execute(stmt)).scalars().all()
+    assert len(messages) == 1
+    assert messages[0].is_sent is False
+    assert "Outbox card" in messages[0].text
+
+
+@pytest.mark.asyncio
+async def test_seller_notification_escapes_html(session):
+    seller = User(telegram_id=2605, username="html_seller")
+    buyer = User(telegram_id=2606, username="html_buyer")
+    session.add_all([seller, buyer])
+    await session.commit()
+
+    card = Card(title="<Кот & пёс>", description="Desc", price=5.0, user_id=seller.id, is_approved=True)
+    session.add(card)
+    await session.commit()
+
+    purchase = await PaymentService.create_invoice(
+        session=session, user_id=buyer.id, card_id=card.id, amount=card.price
+    )
+    assert await PaymentService.process_payment(session, purchase.invoice_id) is True
+
+    stmt = select(OutboxMessage.text).where(OutboxMessage.chat_id == seller.telegram_id)
+    text = (await session.execute(stmt)).scalar_one()
+    assert "«&lt;Кот &amp; пёс&gt;»" in text
+    assert "<Кот" not in text
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_retries_failed_delivery(engine, session):
+    session.add_all(
+        [
+            OutboxMessage(chat_id=2603, text="first"),
+            OutboxMessage(chat_id=2604, text="second"),
+        ]
+    )
+    await session.commit()
+
+    bot = AsyncMock()
+
+    async def send_message(chat_id, text):
+        if chat_id == 2604:
+            raise RuntimeError("network down")
+
+    bot.send_message.side_effect = send_message
+    maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    dispatcher = OutboxDispatcher(bot, maker, batch_size=100)
+
+    assert await dispatcher.drain_once() >= 2
+
+    stmt = select(OutboxMessage).where(OutboxMessage.chat_id.in_([2603, 2604]))
+    rows = {
+        row.chat_id: row
+        for row in (await session.execute(stmt.execution_options(populate_existing=True))).scalars()
+    }
+    assert rows[2603].is_sent is True
+    assert rows[2604].is_sent is False
+    assert rows[2604].attempts == 1
+    assert rows[2604].last_error == "network down"
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_sends_outside_transaction(engine, session):
+    session.add_all([OutboxMessage(chat_id=2607, text="ok"), OutboxMessage(chat_id=2608, text="blocked")])
+    await session.commit()
+
+    maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    open_sessions = 0
+
+    @asynccontextmanager
+    async def pool():
+        nonlocal open_sessions
+        async with maker() as pooled:
+            open_sessions += 1
+            try:
+                yield pooled
+            finally:
+                open_sessions -= 1
+
+    seen = []
+
+    async def send_message(chat_id, text):
+        leased = await session.scalar(
+            select(OutboxMessage.next_attempt_at)
+            .where(OutboxMessage.chat_id == chat_id)
+            .execution_options(populate_existing=True)
+        )
+        seen.append((open_sessions, leased > datetime.utcnow()))
+        if chat_id == 2608:
+            raise TelegramForbiddenError(method=SendMessage(chat_id=chat_id, text=text), message="blocked")
+
+    bot = AsyncMock()
+    bot.send_message.side_effect = send_message
+    dispatcher = OutboxDispatcher(bot, pool, batch_size=100, max_attempts=5, lease=30.0)
+
+    assert await dispatcher.drain_once() >= 2
+    # Во время отправки сессий диспетчера нет, а строки уже отложены на lease
+    assert seen and all(item == (0, True) for item in seen)
+
+    stmt = select(OutboxMessage).where(OutboxMessage.chat_id.in_([2607, 2608]))
+    rows = {
+        row.chat_id: row
+        for row in (await session.execute(stmt.execution_options(populate_existing=True))).scalars()
+    }
+    assert rows[2607].is_sent is True
+    assert (rows[2608].is_sent, rows[2608].attempts) == (False, 5)
+    assert rows[2608].last_error.endswith("blocked")
+    assert await dispatcher.drain_once() == 0
+
+    await session.execute(delete(OutboxMessage))
+    await session.commit()
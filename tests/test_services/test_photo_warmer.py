@@ -0,0 +1,61 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from benchmarks.mock_bot import create_mocked_bot
+from src.database.models import Card, User
+from src.middlewares.photo_capture_middleware import PhotoCaptureMiddleware
+from src.services.card_service import CardService
+from src.services.photo_warmer import PhotoWarmer
+from src.utils.photo_cache import PhotoFileCache
+
+URL = "https://example.com/photos/4701.jpg"
+
+
+@pytest.mark.asyncio
+async def test_file_id_is_captured_from_url_sends_only():
+    cache = PhotoFileCache()
+    bot = create_mocked_bot()
+    bot.session.middleware(PhotoCaptureMiddleware(cache))
+
+    sent = await bot.send_photo(chat_id=1, photo=URL)
+    await bot.send_photo(chat_id=1, photo="existing-file-id")
+
+    card = Card(photo_url=URL, photo_file_id=None)
+    assert cache.photo_for(card) == sent.photo[-1].file_id != URL
+    assert cache.photo_for(Card(photo_url="https://example.com/other.jpg")) == "https://example.com/other.jpg"
+    assert cache.photo_for(Card(photo_url=URL, photo_file_id="stored")) == "stored"
+    assert cache.take_pending() == {URL: sent.photo[-1].file_id}
+
+
+@pytest.mark.asyncio
+async def test_warmer_uploads_url_photos_and_persists_file_ids(engine, session):
+    user = User(telegram_id=4701, username="photos")
+    session.add(user)
+    await session.flush()
+    url_only = Card(user_id=user.id, title="URL", description="d", price=1.0, photo_url=URL)
+    stored = Card(
+        user_id=user.id, title="Stored", description="d", price=1.0,
+        photo_url="https://example.com/photos/4702.jpg", photo_file_id="kept",
+    )
+    session.add_all([url_only, stored])
+    await session.commit()
+
+    cache = PhotoFileCache()
+    bot = create_mocked_bot()
+    warmer = PhotoWarmer(
+        bot, async_sessionmaker(engine, class_=AsyncSession), chat_id=-100, batch_size=1000, cache=cache
+    )
+    assert await warmer.warm_once() >= 1
+    assert bot.session.calls["DeleteMessage"] == bot.session.calls["SendPhoto"]
+    assert await warmer.flush() >= 1
+    assert cache.pending == 0
+
+    await session.refresh(url_only)
+    await session.refresh(stored)
+    assert url_only.photo_file_id and url_only.photo_file_id != URL
+    assert stored.photo_file_id == "kept"
+
+    # Новое фото - прежний file_id больше не годится
+    await CardService.update_card_attribute(session, url_only.id, "photo_url", "https://example.com/new.jpg")
+    await session.refresh(url_only)
+    assert url_only.photo_file_id is None
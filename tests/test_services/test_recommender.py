@@ -0,0 +1,92 @@
+import pytest
+
+from src.database.models import Card, User
+from src.services.recommender import Recommender
+
+CARDS = [
+    (1, "Шерстяной свитер", "Теплый свитер из шерсти"),
+    (2, "Свитер с оленями", "Новогодний шерстяной свитер"),
+    (3, "Смартфон Nokia", "Телефон с хорошей камерой"),
+    (4, "Чехол Nokia", "Силиконовый чехол для телефона"),
+    (5, "", ""),
+]
+
+
+def test_similar_cards_rank_by_shared_words():
+    recommender = Recommender(top_k=2)
+    recommender.build(CARDS)
+
+    assert len(recommender) == 4
+    assert recommender.similar(1) == [2]
+    assert recommender.similar(3) == [4]
+    assert recommender.similar(5) == []
+
+
+def test_batched_precompute_matches_single_queries():
+    single = Recommender(top_k=3)
+    single.build(CARDS)
+    batched = Recommender(top_k=3)
+    batched.build(CARDS)
+
+    batched.precompute([1, 2, 3, 4], batch_size=3)
+    assert batched._cache == {card_id: single.similar(card_id) for card_id in (1, 2, 3, 4)}
+
+
+def test_updates_change_neighbours():
+    recommender = Recommender(top_k=2)
+    recommender.build(CARDS)
+    assert recommender.similar(4) == [3]
+
+    recommender.update(6, "Nokia", "Камера для Nokia")
+    assert recommender.similar(4)[0] in (3, 6)
+    assert 6 in recommender.similar(3)
+
+    recommender.remove(6)
+    assert 6 not in recommender.similar(3)
+
+
+@pytest.mark.asyncio
+async def test_incremental_updates_match_compacted_matrix():
+    recommender = Recommender(top_k=3, max_pending=3)
+    recommender.build(CARDS + [(7, "Горный велосипед", "Велосипед"), (8, "Детский велосипед", "")])
+    recommender.precompute([1, 2, 3, 4, 7, 8])
+
+    recommender.update(6, "Nokia", "Камера для Nokia")
+    recommender.update(1, "Свитер", "Шерсть")
+    # Карточки без общих слов с измененными остаются в кэше
+    assert set(recommender._cache) == {7, 8}
+    assert recommender._compaction is None
+
+    card_ids = [1, 2, 3, 4, 6, 7, 8]
+    incremental = {card_id: set(recommender._compute([card_id])[card_id][0]) for card_id in card_ids}
+    assert 6 in incremental[3] and 6 in incremental[4]
+
+    recommender.remove(2)
+    assert set(recommender._cache) == {7, 8}
+    # Третье изменение запускает пересборку матрицы в потоке
+    assert recommender._compaction is not None
+    await recommender._compaction
+    assert not recommender._pending
+
+    del incremental[2]
+    for similar in incremental.values():
+        similar.discard(2)
+    assert {card_id: set(recommender._compute([card_id])[card_id][0]) for card_id in incremental} == incremental
+
+
+@pytest.mark.asyncio
+async def test_load_uses_approved_cards_only(session):
+    user = User(telegram_id=4501, username="recommended")
+    session.add(user)
+    await session.flush()
+    approved = Card(user_id=user.id, title="Уникальный гамак", description="d", price=1.0, is_approved=True)
+    twin = Card(user_id=user.id, title="Уникальный гамак XL", description="d", price=1.0, is_approved=True)
+    pending = Card(user_id=user.id, title="Уникальный гамак", description="d", price=1.0)
+    session.add_all([approved, twin, pending])
+    await session.commit()
+
+    recommender = Recommender(top_k=3)
+    await recommender.load(session)
+    similar = recommender.similar(approved.id)
+    assert similar[0] == twin.id
+    assert pending.id not in similar
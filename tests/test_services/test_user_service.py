@@ -1,6 +1,8 @@
+from datetime import datetime
+
 import pytest
 
-from src.database.models import User
+from src.database.models import User, WithdrawalRequest
 from src.services.user_service import UserService
 
 
@@ -43,3 +45,23 @@ async def test_create_withdrawal_request_validations(session):
             min_amount=100.0,
         )
 
+
+
+@pytest.mark.asyncio
+async def test_withdrawal_steps_newest_first(session):
+    user = User(telegram_id=4802, username="steps", balance=0.0)
+    session.add(user)
+    await session.flush()
+    requests = [
+        WithdrawalRequest(user_id=user.id, amount=100.0 + i, requisites="r", created_at=datetime(2099, 1, i + 1))
+        for i in range(3)
+    ]
+    session.add_all(requests)
+    await session.commit()
+
+    first = await UserService.withdrawal_step(session)
+    assert first.item.id == requests[2].id and first.item.user.username == "steps"
+    second = await UserService.withdrawal_step(session, cursor=(first.key, first.item.id))
+    assert second.item.id == requests[1].id
+    back = await UserService.withdrawal_step(session, cursor=(second.key, second.item.id), forward=False)
+    assert back.item.id == requests[2].id and not back.has_more
@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.database.models import Card, User
+from src.services.card_service import CardService
+from src.services.view_counter import ViewCounter
+
+
+@pytest.mark.asyncio
+async def test_views_are_flushed_in_bulk_and_drive_popularity(engine, session, count_queries):
+    user = User(telegram_id=4401, username="popular")
+    session.add(user)
+    await session.flush()
+    cards = [
+        Card(user_id=user.id, title=f"Views {i}", description="d", price=1.0, is_approved=True)
+        for i in range(3)
+    ]
+    session.add_all(cards)
+    await session.commit()
+
+    counter = ViewCounter(async_sessionmaker(engine, class_=AsyncSession), half_life=60.0)
+    for _ in range(5):
+        counter.record(cards[1].id)
+    counter.record(cards[2].id)
+
+    with count_queries() as queries:
+        assert await counter.flush() == 2
+    assert queries.count == 1
+    assert counter.pending == 0
+    assert await counter.flush() == 0
+
+    await counter.recompute_popularity()
+    for card in cards:
+        await session.refresh(card)
+    assert [card.view_count for card in cards] == [0, 5, 1]
+    assert [card.recent_views for card in cards] == [0, 0, 0]
+    assert cards[1].popularity == pytest.approx(5.0, rel=1e-3)
+
+    top = await CardService.get_approved_card_views(session, limit=100, sort="top")
+    ours = [view.id for view in top if view.title.startswith("Views")]
+    assert ours == [cards[1].id, cards[2].id, cards[0].id]
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_views():
+    def broken_pool():
+        raise RuntimeError("db down")
+
+    counter = ViewCounter(broken_pool)
+    counter.record(7)
+    counter.record(7)
+    with pytest.raises(RuntimeError):
+        await counter.flush()
+    assert counter.pending == 1
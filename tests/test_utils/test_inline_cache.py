@@ -0,0 +1,57 @@
+from unittest.mock import patch
+
+from src.services.card_service import CardView
+from src.utils.inline_cache import InlineResultCache
+
+
+def _card(card_id: int, title: str, description: str = "") -> CardView:
+    return CardView(card_id, title, description, 1.0, None, None, None)
+
+
+CARDS = [_card(1, "Квас хлебный"), _card(2, "Квашеная капуста"), _card(3, "Кварц", "кристалл")]
+
+
+def test_longer_query_is_filtered_from_complete_prefix():
+    cache = InlineResultCache()
+    assert cache.get("ква") is None
+    cache.put("ква", CARDS, complete=True, ttl=60)
+
+    assert [card.id for card in cache.get("Квас")] == [1]
+    assert [card.id for card in cache.get("квар крист")] == [3]
+    assert [card.id for card in cache.get("квас")] == [1]
+    assert (cache.hits, cache.prefix_hits, cache.misses) == (1, 2, 1)
+
+
+def test_incomplete_prefix_is_not_reused():
+    cache = InlineResultCache()
+    cache.put("ква", CARDS[:2], complete=False, ttl=60)
+
+    assert cache.get("квар") is None
+    assert len(cache.get("  КВА ")) == 2
+
+
+def test_entries_expire_and_are_evicted():
+    cache = InlineResultCache(maxsize=2)
+    with patch("src.utils.inline_cache.time.monotonic", return_value=100.0):
+        cache.put("a", CARDS, complete=True, ttl=10)
+        cache.put("b", CARDS, complete=True, ttl=60)
+    with patch("src.utils.inline_cache.time.monotonic", return_value=120.0):
+        assert cache.get("a") is None
+        assert cache.get("b") is not None
+        cache.put("c", [], complete=True, ttl=60)
+        cache.put("d", [], complete=True, ttl=60)
+    assert len(cache) == 2
+
+
+def test_query_without_words_does_not_replace_catalog():
+    cache = InlineResultCache()
+    cache.put("", CARDS, complete=True, ttl=60)
+    cache.put("!!!", [], complete=True, ttl=60)
+
+    assert len(cache.get("")) == 3
+    assert [card.id for card in cache.get("квас")] == [1]
+
+    empty = InlineResultCache()
+    empty.put("!!!", [], complete=True, ttl=60)
+    assert empty.get("") is None
+    assert empty.get("квас") is None
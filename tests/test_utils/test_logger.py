@@ -0,0 +1,81 @@
+import json
+import logging
+from logging.handlers import QueueListener
+
+from src.utils.logger import (
+    ContextFilter,
+    ContextQueueHandler,
+    DropOldestQueue,
+    JsonFormatter,
+    SamplingFilter,
+    log_context,
+    parse_sampling,
+)
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+
+
+def test_queue_drops_oldest_when_full():
+    log_queue = DropOldestQueue(maxsize=3)
+    for i in range(5):
+        log_queue.put_nowait(i)
+
+    assert log_queue.dropped == 2
+    assert [log_queue.get_nowait() for _ in range(3)] == [2, 3, 4]
+
+
+def test_sampling_filter_keeps_warnings():
+    sampler = SamplingFilter({"aiogram.event": 0.0, "aiogram": 1.0})
+    info = logging.LogRecord("aiogram.event", logging.INFO, __file__, 1, "handled", None, None)
+    other = logging.LogRecord("aiogram.dispatcher", logging.INFO, __file__, 1, "start", None, None)
+    warning = logging.LogRecord("aiogram.event", logging.WARNING, __file__, 1, "slow", None, None)
+
+    assert not sampler.filter(info)
+    assert sampler.filter(other)
+    assert sampler.filter(warning)
+    assert parse_sampling("aiogram.event=0.1, src.services=0.5") == {
+        "aiogram.event": 0.1,
+        "src.services": 0.5,
+    }
+
+
+def test_json_pipeline_carries_update_context():
+    log_queue = DropOldestQueue()
+    queue_handler = ContextQueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+    target = ListHandler()
+    target.setFormatter(JsonFormatter())
+    listener = QueueListener(log_queue, target)
+
+    logger = logging.getLogger("tests.logger_pipeline")
+    logger.propagate = False
+    logger.addHandler(queue_handler)
+    listener.start()
+    try:
+        token = log_context.set({"update_id": 3401, "user_id": 3402})
+        try:
+            logger.warning("Карточка %s обновлена", 7)
+            try:
+                raise RuntimeError("boom")
+            except RuntimeError:
+                logger.exception("Ошибка")
+        finally:
+            log_context.reset(token)
+        logger.warning("Вне апдейта")
+    finally:
+        listener.stop()
+        logger.removeHandler(queue_handler)
+
+    first, error, outside = (json.loads(line) for line in target.lines)
+    assert first["message"] == "Карточка 7 обновлена"
+    assert first["update_id"] == 3401 and first["user_id"] == 3402
+    assert error["message"] == "Ошибка"
+    assert "RuntimeError: boom" in error["exc"]
+    assert "update_id" not in outside
@@ -0,0 +1,74 @@
+import asyncio
+import logging
+import time
+from unittest.mock import patch
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.utils.health import HealthState
+from src.utils.loop_monitor import LoopLagMonitor
+from src.utils.metrics import MetricsRegistry
+from src.web_app.server import create_web_app
+
+
+def _blocking_call(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+@pytest.mark.asyncio
+async def test_stall_is_reported_with_blocking_stack(caplog):
+    monitor = LoopLagMonitor(interval=0.02, threshold=0.1, registry=MetricsRegistry())
+    task = asyncio.create_task(monitor.run())
+    await asyncio.sleep(0.05)
+
+    with caplog.at_level(logging.WARNING, logger="src.utils.loop_monitor"):
+        _blocking_call(0.3)
+        await asyncio.sleep(0.05)
+    task.cancel()
+
+    assert monitor.stalls == 1
+    assert monitor.max_lag >= 0.2
+    assert "_blocking_call" in caplog.text
+
+
+def test_max_lag_covers_recent_window_only():
+    with patch("src.utils.loop_monitor.time.monotonic", return_value=0.0):
+        monitor = LoopLagMonitor(registry=MetricsRegistry(), max_window=60.0)
+        monitor.observe(0.8)
+    with patch("src.utils.loop_monitor.time.monotonic", return_value=70.0):
+        monitor.observe(0.01)
+        assert monitor.max_lag == 0.8  # окно только что сменилось
+    with patch("src.utils.loop_monitor.time.monotonic", return_value=135.0):
+        assert monitor.max_lag == 0.01
+    with patch("src.utils.loop_monitor.time.monotonic", return_value=400.0):
+        assert monitor.max_lag == 0.0
+
+
+@pytest.mark.asyncio
+async def test_health_endpoints(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'health.db'}")
+    monitor = LoopLagMonitor(registry=MetricsRegistry())
+    health = HealthState(monitor, engine, max_loop_lag=1.0, max_update_age=60)
+    client = TestClient(TestServer(create_web_app(MetricsRegistry(), health)))
+    await client.start_server()
+    try:
+        health.mark_update()
+        response = await client.get("/healthz")
+        body = await response.json()
+        assert response.status == 200
+        assert body["last_update_age_s"] is not None
+        assert "db_pool" in body
+
+        response = await client.get("/readyz")
+        assert response.status == 200
+
+        monitor.observe(2.0)
+        response = await client.get("/readyz")
+        body = await response.json()
+        assert response.status == 503
+        assert any("loop lag" in problem for problem in body["problems"])
+    finally:
+        await client.close()
+        await engine.dispose()
@@ -0,0 +1,85 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.middlewares.metrics_middleware import (
+    HandlerNameMiddleware,
+    MetricsMiddleware,
+    instrument_engine,
+)
+from src.utils.metrics import MetricsRegistry, get_histogram, labels
+
+
+def test_histogram_render_is_cumulative():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Задержка", buckets=(0.1, 1.0), handler="a")
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value)
+    registry.counter("hits_total", handler="a").inc(2)
+    registry.register_callback("cache_size", lambda: {labels(kind="render"): 7})
+
+    output = registry.render()
+
+    assert "# TYPE latency_seconds histogram" in output
+    assert 'latency_seconds_bucket{handler="a",le="0.1"} 1' in output
+    assert 'latency_seconds_bucket{handler="a",le="1"} 3' in output
+    assert 'latency_seconds_bucket{handler="a",le="+Inf"} 4' in output
+    assert 'latency_seconds_count{handler="a"} 4' in output
+    assert 'hits_total{handler="a"} 2' in output
+    assert 'cache_size{kind="render"} 7' in output
+    assert histogram.quantile(0.5) == 1.0
+
+
+def test_metric_kind_conflict():
+    registry = MetricsRegistry()
+    registry.counter("events")
+    with pytest.raises(ValueError):
+        registry.histogram("events")
+
+
+async def _show_cards(event, data):
+    return "ok"
+
+
+@pytest.mark.asyncio
+async def test_middleware_records_handler_and_sql(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'metrics.db'}")
+    instrument_engine(engine)
+    registry = MetricsRegistry()
+    outer = MetricsMiddleware(registry, sample_rate=1.0)
+    inner = HandlerNameMiddleware()
+
+    async def handler(event, data):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            await conn.execute(text("SELECT 2"))
+        return await _show_cards(event, data)
+
+    async def through_inner(event, data):
+        data["handler"] = SimpleNamespace(callback=_show_cards)
+        return await inner(handler, event, data)
+
+    assert await outer(through_inner, object(), {}) == "ok"
+    await engine.dispose()
+
+    name = "test_metrics._show_cards"
+    assert get_histogram(registry, "bot_update_duration_seconds", handler=name).count == 1
+    assert get_histogram(registry, "bot_update_sql_queries", handler=name).sum == 2
+    assert get_histogram(registry, "bot_update_sql_seconds", handler=name).sum > 0
+
+
+@pytest.mark.asyncio
+async def test_unsampled_updates_are_only_counted():
+    registry = MetricsRegistry()
+    middleware = MetricsMiddleware(registry, sample_rate=0.0)
+
+    async def handler(event, data):
+        return None
+
+    for _ in range(5):
+        await middleware(handler, object(), {})
+
+    assert registry.counter("bot_updates_total").value == 5
+    assert get_histogram(registry, "bot_update_duration_seconds", handler="unhandled") is None
@@ -0,0 +1,70 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.utils.profiler import MemoryDiff, ProfilerController, SamplingProfiler, parse_limit
+
+
+def _busy_work(deadline: float) -> int:
+    loop = asyncio.new_event_loop()
+    try:
+        total = 0
+        start = loop.time()
+        while loop.time() - start < deadline:
+            total += sum(range(1000))
+        return total
+    finally:
+        loop.close()
+
+
+def test_sampling_profiler_collects_collapsed_stacks():
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start()
+    _busy_work(0.2)
+    profiler.stop()
+
+    assert profiler.samples > 0
+    output = profiler.collapsed()
+    assert "_busy_work (test_profiler.py:" in output
+    stack, count = output.splitlines()[0].rsplit(" ", 1)
+    assert ";" in stack and int(count) > 0
+
+
+def test_memory_diff_reports_growth():
+    diff = MemoryDiff(frames=5)
+    diff.start()
+    leak = [bytearray(1024) for _ in range(500)]
+    report = diff.stop()
+
+    assert leak
+    assert "Прирост памяти" in report
+    assert "test_profiler.py" in report
+
+
+def test_parse_limit():
+    assert parse_limit("30s") == (30.0, None)
+    assert parse_limit("200") == (None, 200)
+    with pytest.raises(ValueError):
+        parse_limit("0")
+
+
+@pytest.mark.asyncio
+async def test_controller_finishes_after_updates():
+    bot = MagicMock()
+    bot.send_document = AsyncMock()
+    controller = ProfilerController(interval=0.001)
+
+    assert controller.start("cpu", bot, chat_id=3301, updates=2)
+    assert not controller.start("mem", bot, chat_id=3301, seconds=1)
+
+    controller.on_update()
+    assert controller.active
+    controller.on_update()
+    await asyncio.sleep(0.01)
+
+    assert not controller.active
+    bot.send_document.assert_awaited_once()
+    chat_id, document = bot.send_document.await_args.args
+    assert chat_id == 3301
+    assert document.filename.endswith(".collapsed")
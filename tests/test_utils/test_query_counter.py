@@ -0,0 +1,67 @@
+import pytest
+from sqlalchemy import select
+
+from src.database.models import Card, User, WithdrawalRequest
+from src.services.card_service import CardService
+from src.services.user_service import UserService
+from src.utils.query_counter import TooManyQueries, normalize_sql
+
+
+@pytest.fixture
+async def seller(session):
+    user = await session.scalar(select(User).where(User.telegram_id == 3201))
+    if user is not None:
+        return user
+    user = User(telegram_id=3201, username="seller3201", balance=500.0)
+    session.add(user)
+    await session.flush()
+    for i in range(3):
+        session.add(Card(title=f"N+1 {i}", description="d", price=10, user_id=user.id, is_approved=True))
+    session.add(WithdrawalRequest(user_id=user.id, amount=150.0, requisites="card 3201"))
+    await session.commit()
+    return user
+
+
+def test_normalize_sql_collapses_literals():
+    assert normalize_sql("SELECT * FROM cards WHERE id = 5") == normalize_sql(
+        "SELECT *\n  FROM cards WHERE id = 17"
+    )
+
+
+@pytest.mark.asyncio
+async def test_show_cards_loads_sellers_in_one_query(session, seller, count_queries):
+    with count_queries() as counter:
+        cards = await CardService.get_approved_cards(session, limit=10)
+        usernames = [card.user.username for card in cards]
+
+    assert "seller3201" in usernames
+    counter.assert_max(1, "get_approved_cards")
+
+
+@pytest.mark.asyncio
+async def test_withdrawals_preload_users(session, seller, count_queries):
+    with count_queries() as counter:
+        requests = await UserService.get_pending_withdrawal_requests(session)
+        [request.user.telegram_id for request in requests]
+
+    counter.assert_max(2, "get_pending_withdrawal_requests")
+    counter.assert_no_repeats("get_pending_withdrawal_requests")
+
+
+@pytest.mark.asyncio
+async def test_repeated_queries_are_reported_with_origin(session, seller, count_queries):
+    cards = await CardService.get_approved_cards_simple(session, limit=3)
+    session.expunge_all()
+
+    with count_queries() as outer:
+        with count_queries() as counter:
+            for card in cards:
+                await CardService.get_card_by_id(session, card.id)
+
+    assert outer.count == counter.count
+    with pytest.raises(TooManyQueries) as error:
+        counter.assert_no_repeats("loop")
+    report = str(error.value)
+    assert "FROM cards" in report
+    assert "src/services/card_service.py" in report
+    assert "tests/test_utils/test_query_counter.py" in report
@@ -0,0 +1,43 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+from src.utils.render_cache import RenderCache, edit_message
+
+
+def _message(chat_id: int = 1, message_id: int = 10):
+    message = MagicMock()
+    message.chat.id = chat_id
+    message.message_id = message_id
+    message.edit_text = AsyncMock()
+    return message
+
+
+@pytest.mark.asyncio
+async def test_unchanged_edit_is_skipped():
+    cache = RenderCache()
+    message = _message()
+    markup = InlineKeyboardMarkup(
+        inline_keyboard=[[InlineKeyboardButton(text="🔄 Обновить", callback_data="balance_refresh")]]
+    )
+
+    assert await edit_message(message, text="Ваш баланс: 1.00 руб.", reply_markup=markup, cache=cache)
+    assert not await edit_message(message, text="Ваш баланс: 1.00 руб.", reply_markup=markup, cache=cache)
+    assert await edit_message(message, text="Ваш баланс: 2.00 руб.", reply_markup=markup, cache=cache)
+
+    assert message.edit_text.await_count == 2
+    assert cache.saved_calls == 1
+    assert cache.sent_edits == 2
+
+
+def test_cache_evicts_least_recently_used():
+    cache = RenderCache(maxsize=2)
+    cache.remember(1, 1, "a")
+    cache.remember(1, 2, "b")
+    cache.get(1, 1)
+    cache.remember(1, 3, "c")
+
+    assert cache.get(1, 2) is None
+    assert cache.get(1, 1) == "a"
+    assert len(cache) == 2